@@ -14,8 +14,7 @@ from plexapi.server import PlexServer
 import uuid
 import pytz
 import asyncio
-import secrets 
-from flask import Flask, jsonify, render_template, send_from_directory, request, session, redirect, flash, g, url_for, request
+from flask import Flask, jsonify, render_template, send_from_directory, request, session, redirect, flash, g, url_for, request, Response, stream_with_context
 from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_wtf.csrf import CSRFProtect 
 from flask_socketio import SocketIO, emit, join_room, leave_room
@@ -23,38 +22,45 @@ from utils.poster_view import set_current_movie, poster_bp, init_socket, get_pos
 from utils.default_poster_manager import init_default_poster_manager, default_poster_manager
 from utils.playback_monitor import PlaybackMonitor
 from utils.fetch_movie_links import fetch_movie_links
-from functools import lru_cache
+from functools import lru_cache, partial
 from utils.settings.routes import settings_bp
 from utils.settings import settings
 from utils.cache_manager import CacheManager
-from utils.youtube_trailer import search_youtube_trailer
+from utils.youtube_trailer import get_trailer_url
 from utils.appletv_discovery import scan_for_appletv, pair_appletv, submit_pin, clear_pairing, ROOT_CONFIG_PATH, turn_on_apple_tv, fix_config_format, check_credentials
-from utils.tmdb_service import tmdb_service
+from utils.tmdb_service import tmdb_service, merge_crew, project_credits
 from utils.enrichment_cache import enrichment_cache
+from utils.startup import startup
+from utils.leader_election import leadership
+from utils.secret_key import load_or_create_secret_key
+from utils.json_storage import write_json
+from utils.build_queue import build_queue, PRIORITY_HIGH, PRIORITY_NORMAL
 
-_seen_sessions: dict = {}
-_seen_sessions_lock = threading.Lock()
+from utils.shared_state import shared_state
+
+# Seen history lives in the shared state store so every worker sees the same deck
+SEEN_KEY_PREFIX = 'seen:'
+SEEN_TTL = 12 * 3600
 
 
 def _get_seen_ids(session_key):
     if not session_key:
         return set()
-    with _seen_sessions_lock:
-        return set(_seen_sessions.get(session_key, set()))
+    return shared_state.smembers(f'{SEEN_KEY_PREFIX}{session_key}')
 
 
 def _add_seen_id(session_key, movie_id):
     if not session_key or not movie_id:
         return
-    with _seen_sessions_lock:
-        _seen_sessions.setdefault(session_key, set()).add(str(movie_id))
+    key = f'{SEEN_KEY_PREFIX}{session_key}'
+    shared_state.sadd(key, str(movie_id))
+    shared_state.expire(key, SEEN_TTL)
 
 
 def _reset_seen(session_key):
     if not session_key:
         return
-    with _seen_sessions_lock:
-        _seen_sessions.pop(session_key, None)
+    shared_state.delete(f'{SEEN_KEY_PREFIX}{session_key}')
 from routes.trakt_routes import trakt_bp
 from routes.tracking_routes import tracking_bp
 from utils.emby_service import EmbyService
@@ -76,14 +82,18 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
 flask_secret = os.environ.get('FLASK_SECRET_KEY')
 if not flask_secret:
-    logger.warning("FLASK_SECRET_KEY environment variable not set. Generating a random key for this session.") 
-    flask_secret = secrets.token_hex(32)
+    # Shared by all workers, so sessions and CSRF tokens validate whichever worker answers
+    logger.warning("FLASK_SECRET_KEY environment variable not set. Using the key stored in /app/data.")
+    flask_secret = load_or_create_secret_key()
 app.secret_key = flask_secret
 
 csrf = CSRFProtect() 
 csrf.init_app(app) 
 _cors_origins = os.environ.get('CORS_ALLOWED_ORIGINS', '*')
-socketio = SocketIO(app, cors_allowed_origins=_cors_origins, manage_session=False)
+# Multiple workers relay Socket.IO broadcasts through a message queue (e.g. redis://redis:6379/0)
+_socketio_queue = os.getenv('SOCKETIO_MESSAGE_QUEUE') or None
+socketio = SocketIO(app, cors_allowed_origins=_cors_origins, manage_session=False,
+                    message_queue=_socketio_queue)
 init_socket(socketio)
 collection_service = CollectionService(app=app, socketio=socketio)
 
@@ -202,22 +212,106 @@ def load_settings():
 user_cache_managers = {}
 global_cache_manager = None
 
+_services_init_lock = threading.Lock()
+
+def _start_plex():
+    from utils.plex_service import PlexService
+    return PlexService(
+        url=os.getenv('PLEX_URL') or PLEX_SETTINGS.get('url'),
+        token=os.getenv('PLEX_TOKEN') or PLEX_SETTINGS.get('token'),
+        libraries=os.getenv('PLEX_MOVIE_LIBRARIES', '').split(',') if os.getenv('PLEX_MOVIE_LIBRARIES') else PLEX_SETTINGS.get('movie_libraries', []),
+        username=None,  
+        cache_manager=global_cache_manager  
+    )
+
+def _start_jellyfin():
+    from utils.jellyfin_service import JellyfinService
+    return JellyfinService(
+        url=os.getenv('JELLYFIN_URL') or JELLYFIN_SETTINGS.get('url'),
+        api_key=os.getenv('JELLYFIN_API_KEY') or JELLYFIN_SETTINGS.get('api_key'),
+        user_id=os.getenv('JELLYFIN_USER_ID') or JELLYFIN_SETTINGS.get('user_id'),
+        update_interval=600
+    )
+
+def _start_emby():
+    from utils.emby_service import EmbyService
+    return EmbyService(
+        url=os.getenv('EMBY_URL') or EMBY_SETTINGS.get('url'),
+        api_key=os.getenv('EMBY_API_KEY') or EMBY_SETTINGS.get('api_key'),
+        user_id=os.getenv('EMBY_USER_ID') or EMBY_SETTINGS.get('user_id')
+    )
+
+def _start_seerr(seerr_settings):
+    from utils.seerr_service import update_configuration
+    return update_configuration(
+        url=os.getenv('SEERR_URL') or seerr_settings.get('url', ''),
+        api_key=os.getenv('SEERR_API_KEY') or seerr_settings.get('api_key', '')
+    )
+
+def _start_ombi(ombi_settings):
+    from utils.ombi_service import update_configuration
+    return update_configuration(
+        url=os.getenv('OMBI_URL') or ombi_settings.get('url', ''),
+        api_key=os.getenv('OMBI_API_KEY') or ombi_settings.get('api_key', '')
+    )
+
+def _start_trakt():
+    if 'utils.trakt_service' in sys.modules:
+        del sys.modules['utils.trakt_service']
+    from utils.trakt_service import initialize_trakt
+    return initialize_trakt()
+
+def _leads_startup_enrichment():
+    """One worker runs the startup enrichment pass; the others read the shards it writes"""
+    return leadership.is_leader('startup-enrichment')
+
+def _build_enrichment_from_cache_file(cache_path, service_name):
+    if not os.path.exists(cache_path) or not _leads_startup_enrichment():
+        return
+    try:
+        with open(cache_path) as f:
+            cached_movies = json.load(f)
+        movies_for_enrichment = [m for m in cached_movies if m.get('tmdb_id')]
+        if movies_for_enrichment:
+            enrichment_cache.build_for_movies(movies_for_enrichment)
+    except Exception as e:
+        logger.error(f"Error loading {service_name} cache for enrichment: {e}")
+
 def initialize_services():
     """Initialize or reinitialize media services based on current settings"""
+    with _services_init_lock:
+        startup.begin()
+        try:
+            result = _initialize_services()
+        except Exception as e:
+            startup.finish(error=str(e))
+            raise
+        startup.finish()
+
+    try:
+        socketio.emit('services_ready', namespace='/')
+        logger.info("Emitted 'services_ready' signal via SocketIO.")
+    except Exception as emit_err:
+        logger.error(f"Failed to emit 'services_ready' signal: {emit_err}")
+    return result
+
+def _initialize_services():
     global plex, jellyfin, emby, PLEX_AVAILABLE, JELLYFIN_AVAILABLE, EMBY_AVAILABLE
     global cache_manager, global_cache_manager
     global HOMEPAGE_MODE, USE_LINKS, USE_FILTER, USE_GRID_VIEW, USE_WATCH_BUTTON, USE_NEXT_BUTTON
 
-    load_settings()
+    with startup.phase('settings'):
+        load_settings()
 
-    logger.info("Initializing TMDB service...")
-    try:
-        from utils.tmdb_service import tmdb_service
-        tmdb_service.initialize_service()
-        app.config['TMDB_SERVICE'] = tmdb_service
-        logger.info("TMDB service initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize TMDB service: {e}")
+    with startup.phase('tmdb'):
+        logger.info("Initializing TMDB service...")
+        try:
+            from utils.tmdb_service import tmdb_service
+            tmdb_service.initialize_service()
+            app.config['TMDB_SERVICE'] = tmdb_service
+            logger.info("TMDB service initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize TMDB service: {e}")
 
     tmdb_settings = settings.get('tmdb', {})
 
@@ -271,21 +365,27 @@ def initialize_services():
         os.getenv('EMBY_USER_ID')
     ])
 
-    if plex_enabled:
-        logger.info("Initializing Plex service...")
-        try:
-            from utils.plex_service import PlexService
-            
-            plex = PlexService(
-                url=os.getenv('PLEX_URL') or PLEX_SETTINGS.get('url'),
-                token=os.getenv('PLEX_TOKEN') or PLEX_SETTINGS.get('token'),
-                libraries=os.getenv('PLEX_MOVIE_LIBRARIES', '').split(',') if os.getenv('PLEX_MOVIE_LIBRARIES') else PLEX_SETTINGS.get('movie_libraries', []),
-                username=None,  
-                cache_manager=global_cache_manager  
-            )
+    initializers = {}
+    for name, enabled, starter in (('plex', plex_enabled, _start_plex),
+                                   ('jellyfin', jellyfin_enabled, _start_jellyfin),
+                                   ('emby', emby_enabled, _start_emby)):
+        if enabled:
+            initializers[name] = starter
+        else:
+            logger.info(f"{name.capitalize()} service is not configured")
+            startup.disable(name)
+
+    started = startup.start_group('media_services', initializers)
+    plex = started.get('plex')
+    jellyfin = started.get('jellyfin')
+    emby = started.get('emby')
+    PLEX_AVAILABLE = plex is not None
+    JELLYFIN_AVAILABLE = jellyfin is not None
+    EMBY_AVAILABLE = emby is not None
+
+    with startup.phase('media_setup'):
+        if plex:
             app.config['PLEX_SERVICE'] = plex
-            PLEX_AVAILABLE = True
-
             if not first_service_initialized:
                 logger.info("Plex is the first service, associating with global cache manager.")
                 if global_cache_manager:
@@ -293,47 +393,15 @@ def initialize_services():
                     global_cache_manager.start()
                     with global_cache_manager._cache_lock:
                         movies_snapshot = list(global_cache_manager._movies_memory_cache)
-                    if movies_snapshot:
+                    if movies_snapshot and _leads_startup_enrichment():
                         enrichment_cache.build_for_movies(movies_snapshot)
                 else:
                     logger.error("Cannot associate Plex with global_cache_manager as it's None.")
                 first_service_initialized = True
 
-            logger.info("Plex service initialized successfully")
-
-        except Exception as e:
-            logger.error(f"Failed to initialize Plex service: {e}")
-            plex = None
-            PLEX_AVAILABLE = False
-
-    else:
-        logger.info("Plex service is not configured")
-        plex = None
-        PLEX_AVAILABLE = False
-
-    if jellyfin_enabled:
-        logger.info("Initializing Jellyfin service...")
-        try:
-            from utils.jellyfin_service import JellyfinService
-            jellyfin = JellyfinService(
-                url=os.getenv('JELLYFIN_URL') or JELLYFIN_SETTINGS.get('url'),
-                api_key=os.getenv('JELLYFIN_API_KEY') or JELLYFIN_SETTINGS.get('api_key'),
-                user_id=os.getenv('JELLYFIN_USER_ID') or JELLYFIN_SETTINGS.get('user_id'),
-                update_interval=600
-            )
+        if jellyfin:
             app.config['JELLYFIN_SERVICE'] = jellyfin
-            JELLYFIN_AVAILABLE = True
-            logger.info("Jellyfin service initialized successfully")
-
-            if os.path.exists(jellyfin.cache_path):
-                try:
-                    with open(jellyfin.cache_path) as f:
-                        cached_jellyfin = json.load(f)
-                    movies_for_enrichment = [m for m in cached_jellyfin if m.get('tmdb_id')]
-                    if movies_for_enrichment:
-                        enrichment_cache.build_for_movies(movies_for_enrichment)
-                except Exception as e:
-                    logger.error(f"Error loading Jellyfin cache for enrichment: {e}")
+            _build_enrichment_from_cache_file(jellyfin.cache_path, 'Jellyfin')
 
             if not first_service_initialized:
                 logger.info("Jellyfin is the first service, associating with global cache manager.")
@@ -343,37 +411,10 @@ def initialize_services():
                 else:
                     logger.error("Cannot associate Jellyfin with global_cache_manager as it's None.")
                 first_service_initialized = True
-        except Exception as e:
-            logger.error(f"Failed to initialize Jellyfin service: {e}")
-            jellyfin = None 
-            JELLYFIN_AVAILABLE = False
-    else:
-        logger.info("Jellyfin service is not configured")
-        jellyfin = None 
-        JELLYFIN_AVAILABLE = False
 
-    if emby_enabled:
-        logger.info("Initializing Emby service...")
-        try:
-            from utils.emby_service import EmbyService
-            emby = EmbyService(
-                url=os.getenv('EMBY_URL') or EMBY_SETTINGS.get('url'),
-                api_key=os.getenv('EMBY_API_KEY') or EMBY_SETTINGS.get('api_key'),
-                user_id=os.getenv('EMBY_USER_ID') or EMBY_SETTINGS.get('user_id')
-            )
+        if emby:
             app.config['EMBY_SERVICE'] = emby
-            EMBY_AVAILABLE = True
-            logger.info("Emby service initialized successfully")
-
-            if os.path.exists(emby.cache_path):
-                try:
-                    with open(emby.cache_path) as f:
-                        cached_emby = json.load(f)
-                    movies_for_enrichment = [m for m in cached_emby if m.get('tmdb_id')]
-                    if movies_for_enrichment:
-                        enrichment_cache.build_for_movies(movies_for_enrichment)
-                except Exception as e:
-                    logger.error(f"Error loading Emby cache for enrichment: {e}")
+            _build_enrichment_from_cache_file(emby.cache_path, 'Emby')
 
             if not first_service_initialized:
                 logger.info("Emby is the first service, associating with global cache manager.")
@@ -384,14 +425,6 @@ def initialize_services():
                     logger.error("Cannot associate Emby with global_cache_manager as it's None.")
 
                 first_service_initialized = True
-        except Exception as e:
-            logger.error(f"Failed to initialize Emby service: {e}")
-            emby = None 
-            EMBY_AVAILABLE = False
-    else:
-        logger.info("Emby service is not configured")
-        emby = None 
-        EMBY_AVAILABLE = False
 
     if not first_service_initialized and global_cache_manager:
         if not getattr(global_cache_manager, 'running', False):
@@ -410,22 +443,6 @@ def initialize_services():
          bool(seerr_settings.get('api_key', '').strip()))
     )
 
-    if seerr_enabled:
-        logger.info("Initializing Seerr service...")
-        try:
-            from utils.seerr_service import update_configuration
-            if update_configuration(
-                url=os.getenv('SEERR_URL') or seerr_settings.get('url', ''),
-                api_key=os.getenv('SEERR_API_KEY') or seerr_settings.get('api_key', '')
-            ):
-                logger.info("Seerr service initialized successfully")
-            else:
-                logger.error("Failed to initialize Seerr service")
-        except Exception as e:
-            logger.error(f"Failed to initialize Seerr service: {e}")
-    else:
-        logger.info("Seerr service is disabled or not configured")
-
     ombi_settings = settings.get('ombi', {})
     ombi_enabled = (
         (bool(os.getenv('OMBI_URL')) and bool(os.getenv('OMBI_API_KEY'))) or
@@ -434,22 +451,6 @@ def initialize_services():
          bool(ombi_settings.get('api_key', '').strip()))
     )
 
-    if ombi_enabled:
-        logger.info("Initializing Ombi service...")
-        try:
-            from utils.ombi_service import update_configuration
-            if update_configuration(
-                url=os.getenv('OMBI_URL') or ombi_settings.get('url', ''),
-                api_key=os.getenv('OMBI_API_KEY') or ombi_settings.get('api_key', '')
-            ):
-                logger.info("Ombi service initialized successfully")
-            else:
-                logger.error("Failed to initialize Ombi service")
-        except Exception as e:
-            logger.error(f"Failed to initialize Ombi service: {e}")
-    else:
-        logger.info("Ombi service is disabled or not configured")
-
     trakt_settings = settings.get('trakt', {})
     trakt_enabled = (
         bool(all([
@@ -462,18 +463,20 @@ def initialize_services():
         (bool(trakt_settings.get('enabled')) and bool(trakt_settings.get('access_token')))
     )
 
-    if trakt_enabled:
-        logger.info("Initializing Trakt service...")
-        try:
-            if 'utils.trakt_service' in sys.modules:
-                del sys.modules['utils.trakt_service']
-            from utils.trakt_service import initialize_trakt
-            if not initialize_trakt():
-                logger.error("Failed to initialize Trakt service")
-                trakt_enabled = False
-        except Exception as e:
-            logger.error(f"Failed to initialize Trakt service: {e}")
-            trakt_enabled = False
+    initializers = {}
+    for name, enabled, starter in (('seerr', seerr_enabled, lambda: _start_seerr(seerr_settings)),
+                                   ('ombi', ombi_enabled, lambda: _start_ombi(ombi_settings)),
+                                   ('trakt', trakt_enabled, _start_trakt)):
+        if enabled:
+            initializers[name] = starter
+        else:
+            logger.info(f"{name.capitalize()} service is disabled or not configured")
+            startup.disable(name)
+
+    started = startup.start_group('integrations', initializers)
+    seerr_enabled = bool(started.get('seerr'))
+    ombi_enabled = bool(started.get('ombi'))
+    trakt_enabled = bool(started.get('trakt'))
 
     logger.info(f"Services initialization complete:")
     logger.info(f"- Plex: {PLEX_AVAILABLE}")
@@ -483,17 +486,18 @@ def initialize_services():
     logger.info(f"- Ombi: {ombi_enabled}")
     logger.info(f"- Trakt: {trakt_enabled}")
 
-    try:
-        socketio.emit('services_ready', namespace='/')
-        logger.info("Emitted 'services_ready' signal via SocketIO.")
-    except Exception as emit_err:
-        logger.error(f"Failed to emit 'services_ready' signal: {emit_err}")
-
     return True
 
+SERVICE_READY_WAIT = 30
+STARTUP_EXEMPT_PREFIXES = ('/health', '/static', '/style', '/js', '/logos', '/api/random_backdrops')
+
 @app.before_request
 def load_user_context_and_cache():
     """Load user data and the appropriate cache manager before each request."""
+    if not startup.is_ready() and not request.path.startswith(STARTUP_EXEMPT_PREFIXES):
+        # First requests after boot wait (bounded) for the background service init
+        startup.wait_ready(SERVICE_READY_WAIT)
+
     g.user = None
     g.media_service = plex or jellyfin or emby 
     g.cache_manager = global_cache_manager
@@ -744,7 +748,8 @@ def get_user_cache_manager(internal_username=None, plex_user_id=None, user_type=
 
         if user_cm.all_movies_cache_path and not os.path.exists(user_cm.all_movies_cache_path):
             logger.info(f"All movies cache missing for {display_username} at {user_cm.all_movies_cache_path}. Triggering build.")
-            socketio.start_background_task(user_cm.cache_all_plex_movies)
+            build_queue.submit(f"{user_cm.build_key}:all", partial(user_cm.cache_all_plex_movies, synchronous=True),
+                               PRIORITY_NORMAL, f"All-movies cache for {display_username}")
 
         cache_missing_or_empty = (
             user_cm.cache_file_path and
@@ -754,7 +759,8 @@ def get_user_cache_manager(internal_username=None, plex_user_id=None, user_type=
             logger.info(f"Unwatched cache missing or empty for {display_username} at {user_cm.cache_file_path}. Triggering build.")
             if global_cache_manager and user_cm != global_cache_manager:
                  global_cache_manager._initializing = False
-            socketio.start_background_task(user_cm.start_cache_build)
+            build_queue.submit(user_cm.build_key, user_cm.start_cache_build,
+                               PRIORITY_NORMAL, f"Cache build for {display_username}")
         return user_cm
         
     except Exception as e:
@@ -867,7 +873,7 @@ def enrich_movie_data(movie_data):
     """Enriches movie data with URLs, correct cast from TMDB, and collection information"""
     current_service = session.get('current_service', get_available_service())
     tmdb_url, trakt_url, imdb_url = fetch_movie_links(movie_data, current_service)
-    trailer_url = search_youtube_trailer(movie_data['title'], movie_data['year'])
+    trailer_url = get_trailer_url(movie_data.get('tmdb_id'), movie_data['title'], movie_data['year'])
 
     tmdb_id = movie_data.get('tmdb_id')
     if tmdb_id:
@@ -883,47 +889,12 @@ def enrich_movie_data(movie_data):
                 for actor in credits['cast']
             ]
 
-            directors_map = {}
-            for person in credits['crew']:
-                if person['job'] == 'Director' or person['department'] == 'Directing':
-                    director_id = person['id']
-                    if director_id in directors_map:
-                        directors_map[director_id]['jobs'].append(person.get('job', ''))
-                    else:
-                        directors_map[director_id] = {
-                            "name": person['name'],
-                            "id": person['id'],
-                            "type": "director",
-                            "job": person.get('job', ''),
-                            "jobs": [person.get('job', '')],
-                            "is_primary": person['job'] == 'Director'
-                        }
-
-            movie_data['directors_enriched'] = sorted(
-                list(directors_map.values()),
-                key=lambda x: (not x['is_primary'], x['name'])
-            )
-
-            writers_map = {}
-            for person in credits['crew']:
-                if person['department'] == 'Writing':
-                    writer_id = person['id']
-                    if writer_id in writers_map:
-                        writers_map[writer_id]['jobs'].append(person.get('job', ''))
-                    else:
-                        writers_map[writer_id] = {
-                            "name": person['name'],
-                            "id": person['id'],
-                            "type": "writer",
-                            "job": person.get('job', ''),
-                            "jobs": [person.get('job', '')],
-                            "is_primary": person['job'] in ['Writer', 'Screenplay']
-                        }
-
-            movie_data['writers_enriched'] = sorted(
-                list(writers_map.values()),
-                key=lambda x: (not x['is_primary'], x['name'])
-            )
+            movie_data['directors_enriched'] = [
+                dict(person, type='director') for person in merge_crew(credits['crew'], 'Directing')
+            ]
+            movie_data['writers_enriched'] = [
+                dict(person, type='writer') for person in merge_crew(credits['crew'], 'Writing')
+            ]
 
         try:
             logo_url = tmdb_service.get_movie_logo_url(tmdb_id)
@@ -974,7 +945,7 @@ def _merge_enrichment(movie_data):
         return movie_data
 
     movie = dict(movie_data)
-    movie['credits'] = enrichment.get('credits')
+    movie['credits'] = project_credits(enrichment.get('credits'))
     movie['tmdb_url'] = enrichment.get('tmdb_url') or movie.get('tmdb_url')
     movie['trakt_url'] = enrichment.get('trakt_url') or movie.get('trakt_url')
     movie['imdb_url'] = enrichment.get('imdb_url') or movie.get('imdb_url')
@@ -999,7 +970,7 @@ def fetch_movie_links_for_overlay(tmdb_id):
     return tmdb_service.get_movie_links(tmdb_id)
 
 def get_movie_details(movie_id):
-    tmdb_api_key = os.getenv('TMDB_API_KEY') or settings.get('tmdb', {}).get('api_key', '')
+    tmdb_api_key = settings.snapshot().tmdb_api_key
     tmdb_url = f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={tmdb_api_key}&append_to_response=credits,release_dates"
 
     try:
@@ -1029,7 +1000,7 @@ def get_movie_details(movie_id):
         tmdb_url, trakt_url, imdb_url = fetch_movie_links_for_overlay(movie_id)
         tracking_provider = get_tracking_provider(user_id)
         tracking_url = get_tracking_url(movie_id, trakt_url, user_id)
-        trailer_url = search_youtube_trailer(title, year)
+        trailer_url = get_trailer_url(movie_id, title, year)
 
         return {
             "title": title,
@@ -1068,6 +1039,7 @@ from utils.tracking_service import (
     get_tracking_url,
     get_watched_movies,
     is_tracking_enabled,
+    iter_movie_ratings,
     sync_watched_status,
 )
 
@@ -1125,18 +1097,23 @@ def update_default_poster_manager_service():
 
 app.config['update_default_poster_manager_service'] = update_default_poster_manager_service
 
-initialize_services()
-update_default_poster_manager_service()
+def _startup_services():
+    initialize_services()
+    update_default_poster_manager_service()
+
+# Services connect in the background so gunicorn can serve /health/ready and
+# static assets while a slow media server is still being reached
+startup.start_background('service-init', _startup_services)
 
 playback_monitor = PlaybackMonitor(app, interval=3)
 app.config['PLAYBACK_MONITOR'] = playback_monitor
 playback_monitor.start()
+settings.subscribe(lambda snapshot, changed: playback_monitor.update_authorized_users(), categories=('features',))
 
 @app.route('/')
 @auth_manager.require_auth
 def index():
-    features_settings = settings.get('features', {})
-    load_movie_on_start = features_settings.get('load_movie_on_start', False)
+    load_movie_on_start = settings.snapshot().load_movie_on_start
     enabled_but_unconfigured = []
 
     if PLEX_SETTINGS.get('enabled') and not all([
@@ -1198,13 +1175,13 @@ def start_loading():
         
         if not os.path.exists(current_cache_path):
             logger.info(f"Cache file does not exist at {current_cache_path}, starting build")
-            socketio.start_background_task(cache_manager.start_cache_build)
+            build_queue.submit(cache_manager.build_key, cache_manager.start_cache_build, PRIORITY_HIGH, "Cache build")
             return jsonify({"status": "Cache building started"})
         else:
             logger.info(f"Cache exists at {current_cache_path}, validating content")
             if not cache_manager._verify_cache_validity():
                 logger.info("Cache validation failed, rebuilding")
-                socketio.start_background_task(cache_manager.start_cache_build)
+                build_queue.submit(cache_manager.build_key, cache_manager.start_cache_build, PRIORITY_HIGH, "Cache rebuild")
                 return jsonify({"status": "Cache validation failed, rebuilding"})
             return jsonify({"status": "Cache already exists and is valid"})
     return jsonify({"status": "Loading not required"})
@@ -1493,7 +1470,7 @@ def random_movie():
                    user_creds = auth_manager.db.get_user(g.user['internal_username']) 
                    if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'): 
                        try: 
-                           emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
+                           emby_url = settings.snapshot().emby_url 
                            if not emby_url: raise ValueError("Emby URL not configured") 
                            emby_instance = EmbyService( 
                                url=emby_url,
@@ -1507,9 +1484,9 @@ def random_movie():
                        logger.warning(f"Emby user {g.user['display_username']} found, but missing credentials in DB.") 
                elif g.user['service_type'] == 'local' and g.user['is_admin']: 
                    try: 
-                       emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
-                       emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY') 
-                       emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID') 
+                       emby_url = settings.snapshot().emby_url 
+                       emby_api_key = settings.snapshot().emby_api_key 
+                       emby_user_id = settings.snapshot().emby_user_id 
                        if not all([emby_url, emby_api_key, emby_user_id]): 
                            raise ValueError("Emby not fully configured in settings for admin access.") 
                        emby_instance = EmbyService( 
@@ -1594,7 +1571,7 @@ def next_movie():
                    user_creds = auth_manager.db.get_user(g.user['internal_username']) 
                    if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'): 
                        try: 
-                           emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
+                           emby_url = settings.snapshot().emby_url 
                            if not emby_url: raise ValueError("Emby URL not configured") 
                            emby_instance = EmbyService( 
                                url=emby_url,
@@ -1608,9 +1585,9 @@ def next_movie():
                        logger.warning(f"Emby user {g.user['display_username']} found, but missing credentials in DB (next_movie).") 
                elif g.user['service_type'] == 'local' and g.user['is_admin']: 
                    try: 
-                       emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
-                       emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY') 
-                       emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID') 
+                       emby_url = settings.snapshot().emby_url 
+                       emby_api_key = settings.snapshot().emby_api_key 
+                       emby_user_id = settings.snapshot().emby_user_id 
                        logger.info(f"Admin Emby Settings Check: URL={emby_url}, Key={'******' if emby_api_key else 'None'}, UserID={emby_user_id}") 
                        if not all([emby_url, emby_api_key, emby_user_id]): 
                            logger.error(f"Admin Emby access failed: Settings incomplete. URL={emby_url}, Key={'******' if emby_api_key else 'None'}, UserID={emby_user_id}") 
@@ -1680,7 +1657,7 @@ def filter_movies():
                    user_creds = auth_manager.db.get_user(g.user['internal_username']) 
                    if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'): 
                        try: 
-                           emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
+                           emby_url = settings.snapshot().emby_url 
                            if not emby_url: raise ValueError("Emby URL not configured") 
                            emby_instance = EmbyService( 
                                url=emby_url,
@@ -1694,9 +1671,9 @@ def filter_movies():
                        logger.warning(f"Emby user {g.user['display_username']} found, but missing credentials in DB (filter_movies).") 
                elif g.user['service_type'] == 'local' and g.user['is_admin']: 
                    try: 
-                       emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL') 
-                       emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY') 
-                       emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID') 
+                       emby_url = settings.snapshot().emby_url 
+                       emby_api_key = settings.snapshot().emby_api_key 
+                       emby_user_id = settings.snapshot().emby_user_id 
                        if not all([emby_url, emby_api_key, emby_user_id]): 
                            raise ValueError("Emby not fully configured in settings for admin access.") 
                        emby_instance = EmbyService( 
@@ -1822,7 +1799,7 @@ def get_pg_ratings():
                     user_creds = auth_manager.db.get_user(g.user['internal_username'])
                     if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'):
                         try:
-                            emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
+                            emby_url = settings.snapshot().emby_url
                             if not emby_url: raise ValueError("Emby URL not configured")
                             emby_instance = EmbyService(
                                 url=emby_url,
@@ -1836,9 +1813,9 @@ def get_pg_ratings():
                         logger.warning(f"Emby user {g.user['display_username']} found, but missing credentials in DB (get_pg_ratings).")
                 elif g.user['service_type'] == 'local' and g.user['is_admin']:
                     try:
-                        emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
-                        emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY')
-                        emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID')
+                        emby_url = settings.snapshot().emby_url
+                        emby_api_key = settings.snapshot().emby_api_key
+                        emby_user_id = settings.snapshot().emby_user_id
                         if not all([emby_url, emby_api_key, emby_user_id]):
                             raise ValueError("Emby not fully configured in settings for admin access.")
                         emby_instance = EmbyService(
@@ -1921,7 +1898,7 @@ def filtered_movie_count():
                  logger.debug("Using default/admin Jellyfin credentials for count (no user context).")
 
             try:
-                jellyfin_url = settings.get('jellyfin', {}).get('url') or os.getenv('JELLYFIN_URL')
+                jellyfin_url = settings.snapshot().jellyfin_url
                 if not jellyfin_url:
                     raise ValueError("Jellyfin URL is not configured.")
 
@@ -1994,7 +1971,7 @@ def clients():
                     user_creds = auth_manager.db.get_user(g.user['internal_username'])
                     if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'):
                         try:
-                            emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
+                            emby_url = settings.snapshot().emby_url
                             if not emby_url: raise ValueError("Emby URL not configured")
                             emby_instance = EmbyService(
                                 url=emby_url,
@@ -2008,9 +1985,9 @@ def clients():
                         logger.warning(f"Emby user {g.user['display_username']} found, but missing credentials in DB (clients).")
                 elif g.user['service_type'] == 'local' and g.user['is_admin']:
                     try:
-                        emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
-                        emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY')
-                        emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID')
+                        emby_url = settings.snapshot().emby_url
+                        emby_api_key = settings.snapshot().emby_api_key
+                        emby_user_id = settings.snapshot().emby_user_id
                         if not all([emby_url, emby_api_key, emby_user_id]):
                             raise ValueError("Emby not fully configured in settings for admin access.")
                         emby_instance = EmbyService(
@@ -2051,8 +2028,8 @@ def web_client_info():
                 'url': jellyfin.server_url
             })
         if current_service == 'emby' and EMBY_AVAILABLE:
-            emby_url = (emby.server_url if emby else None) or settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
-            emby_api_key = (emby.api_key if emby else None) or settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY')
+            emby_url = (emby.server_url if emby else None) or settings.snapshot().emby_url
+            emby_api_key = (emby.api_key if emby else None) or settings.snapshot().emby_api_key
             if not emby_url or not emby_api_key:
                 return jsonify({'error': 'Emby not configured'}), 400
             resp = requests.get(
@@ -2097,7 +2074,7 @@ def play_movie(client_id):
                     user_creds = auth_manager.db.get_user(g.user['internal_username'])
                     if user_creds and user_creds.get('service_user_id') and user_creds.get('service_token'):
                         try:
-                            emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
+                            emby_url = settings.snapshot().emby_url
                             if not emby_url: raise ValueError("Emby URL not configured")
                             emby_instance = EmbyService(
                                 url=emby_url,
@@ -2113,9 +2090,9 @@ def play_movie(client_id):
                         result = {"status": "error", "error": "Missing Emby credentials for user"}
                 elif g.user['service_type'] == 'local' and g.user['is_admin']:
                     try:
-                        emby_url = settings.get('emby', {}).get('url') or os.getenv('EMBY_URL')
-                        emby_api_key = settings.get('emby', {}).get('api_key') or os.getenv('EMBY_API_KEY')
-                        emby_user_id = settings.get('emby', {}).get('user_id') or os.getenv('EMBY_USER_ID')
+                        emby_url = settings.snapshot().emby_url
+                        emby_api_key = settings.snapshot().emby_api_key
+                        emby_user_id = settings.snapshot().emby_user_id
                         if not all([emby_url, emby_api_key, emby_user_id]):
                             raise ValueError("Emby not fully configured in settings for admin access.")
                         emby_instance = EmbyService(
@@ -2290,6 +2267,7 @@ def debug_service():
             metadata_cache_path = current_cache_manager.metadata_cache_path
 
             return jsonify({
+                "leases": leadership.status(),
                 "service": "plex",
                 "plex_url": user_plex.PLEX_URL,
                 "total_movies": total_movies,
@@ -2322,6 +2300,7 @@ def debug_service():
                      logger.error(f"Error reading Jellyfin all movies cache ({all_movies_cache_path}): {json_e}")
 
             return jsonify({
+                "leases": leadership.status(),
                 "service": "jellyfin",
                 "jellyfin_url": jellyfin.server_url,
                 "total_movies": total_movies,
@@ -2352,6 +2331,7 @@ def debug_service():
                      logger.error(f"Error reading Emby all movies cache ({all_movies_cache_path}): {json_e}")
 
             return jsonify({
+                "leases": leadership.status(),
                 "service": "emby",
                 "emby_url": emby.server_url,
                 "total_movies": total_movies,
@@ -2440,6 +2420,7 @@ def debug_service():
                      logger.error(f"Failed to get Emby global debug info for admin: {str(e)}")
                      admin_debug_info['emby_global'] = {"error": f"Failed to get Emby global debug info: {str(e)}"}
 
+             admin_debug_info['leases'] = leadership.status()
              return jsonify(admin_debug_info)
 
         elif service_type == 'plex_managed':
@@ -2479,6 +2460,7 @@ def debug_service():
             metadata_cache_path = current_cache_manager.metadata_cache_path
 
             return jsonify({
+                "leases": leadership.status(),
                 "service": "plex_managed", 
                 "plex_url": user_plex.PLEX_URL,
                 "total_movies": total_movies,
@@ -2496,6 +2478,7 @@ def debug_service():
         elif service_type == 'local':
              logger.info(f"Debug service request for local user '{display_username}'")
              return jsonify({
+                 "leases": leadership.status(),
                  "service": "local",
                  "username": display_username,
                  "message": "Local users do not have media service debug information."
@@ -2512,7 +2495,10 @@ def debug_service():
 @app.route('/resync_cache')
 @auth_manager.require_auth 
 def trigger_resync():
-    resync_cache()
+    # Concurrent resync requests share one job and all return when it finishes
+    key = getattr(cache_manager, 'build_key', 'plex:global')
+    job, _ = build_queue.submit(key, resync_cache, PRIORITY_HIGH, "Cache resync")
+    job.wait()
     return jsonify({"status": "Cache resync completed"})
 
 @app.route('/trakt_watched_status')
@@ -2545,23 +2531,29 @@ def movie_ratings(tmdb_id):
 @app.route('/api/batch_movie_ratings', methods=['POST'])
 @auth_manager.require_auth
 def batch_movie_ratings():
-    movie_ids = request.json.get('movie_ids', [])
-    ratings = {}
-    for movie_id in movie_ids:
-        user_id = get_current_user_id()
-        ratings[movie_id] = get_movie_ratings(movie_id, user_id)
-    return jsonify(ratings)
+    """Ratings for many titles; pass "stream": true to receive NDJSON lines as each resolves"""
+    payload = request.get_json(silent=True) or {}
+    movie_ids = payload.get('movie_ids', [])
+    user_id = get_current_user_id()
+
+    if payload.get('stream'):
+        def generate():
+            for movie_id, ratings in iter_movie_ratings(movie_ids, user_id):
+                yield json.dumps({'movie_id': movie_id, 'ratings': ratings}) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    return jsonify(dict(iter_movie_ratings(movie_ids, user_id)))
 
 @app.route('/api/youtube_trailer')
 @auth_manager.require_auth
 def youtube_trailer():
+    tmdb_id = request.args.get('tmdb_id')
     title = request.args.get('title')
     year = request.args.get('year')
-    if not title or not year:
+    if not tmdb_id and (not title or not year):
         return "Missing title or year parameter", 400
 
-    trailer_url = search_youtube_trailer(title, year)
-    return trailer_url
+    return get_trailer_url(tmdb_id, title, year)
 
 @app.route('/is_movie_in_plex/<int:tmdb_id>')
 @auth_manager.require_auth
@@ -2831,6 +2823,18 @@ def service_status():
         'emby_available': EMBY_AVAILABLE
     })
 
+@app.route('/health/ready')
+def health_ready():
+    """Readiness probe: 200 once service initialization has finished, with per-service state"""
+    status = startup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+@app.route('/api/enrichment_status')
+@auth_manager.require_auth
+def enrichment_status():
+    """Return enrichment build progress, throughput and upstream call counters"""
+    return jsonify(enrichment_cache.get_stats())
+
 @app.route('/api/media/test_connection', methods=['POST'])
 @auth_manager.require_auth
 def test_media_connection():
@@ -3360,6 +3364,15 @@ def get_person_details_with_external_ids(person_id):
         return jsonify(details)
     return jsonify({'error': 'Person not found'}), 404
 
+@app.route('/api/movie_credits/<int:tmdb_id>')
+@auth_manager.require_auth
+def movie_credits(tmdb_id):
+    """Full TMDB cast and crew; movie payloads only carry the top-billed cast"""
+    credits = tmdb_service.get_movie_credits(tmdb_id)
+    if not credits:
+        return jsonify({'error': 'Credits not found'}), 404
+    return jsonify({'tmdb_id': tmdb_id, 'credits': credits})
+
 @app.route('/api/movie_details/<movie_id>')
 @auth_manager.require_auth
 def movie_details(movie_id):
@@ -3398,7 +3411,7 @@ def movie_details(movie_id):
         tmdb_url, trakt_url, imdb_url = tmdb_service.get_movie_links(movie_id)
         tracking_provider = get_tracking_provider(user_id)
         tracking_url = get_tracking_url(movie_id, trakt_url, user_id)
-        trailer_url = search_youtube_trailer(title, year)
+        trailer_url = get_trailer_url(movie_id, title, year)
         logo_url = tmdb_service.get_movie_logo_url(movie_id) 
 
         collection_info = {'is_in_collection': False, 'previous_movies': []} 
@@ -3523,8 +3536,7 @@ def get_version_info():
 
 def save_version_info(info):
     os.makedirs(os.path.dirname(VERSION_FILE), exist_ok=True)
-    with open(VERSION_FILE, 'w') as f:
-        json.dump(info, f)
+    write_json(VERSION_FILE, info)
 
 @app.route('/api/check_version')
 @auth_manager.require_auth
@@ -3564,11 +3576,10 @@ def check_version():
 @auth_manager.require_auth
 def dismiss_update():
     try:
-        with open('/app/data/last_update_check.json', 'w') as f:
-            json.dump({
-                'last_checked': datetime.now().isoformat(),
-                'dismissed': True
-            }, f)
+        write_json('/app/data/last_update_check.json', {
+            'last_checked': datetime.now().isoformat(),
+            'dismissed': True
+        })
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3762,7 +3773,10 @@ def get_collections():
     cache_manager = g.cache_manager if hasattr(g, 'cache_manager') else None
 
     logger.info(f"Rebuilding collections cache for user {user_id}. Reason: Tracking provider changed or cache is invalid/old.")
-    socketio.start_background_task(collection_service.build_collections_cache, app, current_service, cache_manager, user=user, sid=user_id, tracking_user_id=tracking_user_id)
+    build_queue.submit(f'collections:{user_id}:{current_service}',
+                       partial(collection_service.build_collections_cache, app, current_service, cache_manager,
+                               user=user, sid=user_id, tracking_user_id=tracking_user_id),
+                       PRIORITY_HIGH, f"Collections cache for {user_id}")
 
     return jsonify({"status": "building_cache"}), 202
 
@@ -3813,7 +3827,10 @@ def build_collections_cache_endpoint():
     current_service = session.get('current_service', get_available_service())
     cache_manager = g.cache_manager if hasattr(g, 'cache_manager') else None
 
-    socketio.start_background_task(collection_service.build_collections_cache, app, current_service, cache_manager, user=user, sid=user_id, tracking_user_id=tracking_user_id)
+    build_queue.submit(f'collections:{user_id}:{current_service}',
+                       partial(collection_service.build_collections_cache, app, current_service, cache_manager,
+                               user=user, sid=user_id, tracking_user_id=tracking_user_id),
+                       PRIORITY_HIGH, f"Collections cache for {user_id}")
     return jsonify({'status': 'cache build started'}), 202
 
 
@@ -3939,6 +3956,9 @@ from apscheduler.schedulers.background import BackgroundScheduler
 def schedule_cache_updates():
     """Schedule periodic cache updates."""
     def job():
+        if not leadership.is_leader('scheduled-cache-update'):
+            logger.info("Scheduler: another worker owns collection cache updates, skipping.")
+            return
         with app.app_context():
             logger.info("Scheduler job started: updating collection caches.")
             if auth_manager.auth_enabled:
@@ -1,11 +1,9 @@
 import os
 import json
 import logging
-import random
-from threading import Thread
 from flask import Blueprint, jsonify, request, session, current_app
-from utils.tmdb_service import TMDBService
-from utils.settings import settings as app_settings
+from utils.backdrop_pool import backdrop_pool
+from utils.build_queue import build_queue, PRIORITY_HIGH
 from utils.auth.manager import auth_manager
 from utils.auth.db import AuthDB
 
@@ -234,25 +232,31 @@ def refresh_global_cache_route():
 
         if service_to_refresh == 'plex':
             if global_cache_manager and global_cache_manager.plex_service:
-                logger.info(f"Triggering force_refresh on GLOBAL_CACHE_MANAGER for Plex.")
-                Thread(target=global_cache_manager.force_refresh).start()
-                return jsonify({"success": True, "message": "Global Plex cache refresh started."})
+                logger.info(f"Queueing force_refresh on GLOBAL_CACHE_MANAGER for Plex.")
+                job, created = build_queue.submit(global_cache_manager.build_key, global_cache_manager.force_refresh,
+                                                  PRIORITY_HIGH, 'Global Plex cache refresh')
+                return jsonify({"success": True, "job_id": job.id,
+                                "message": "Global Plex cache refresh started." if created else "Global Plex cache refresh already queued."})
             else:
                 logger.error("Global Cache Manager or its Plex service not found for Plex refresh.")
                 return jsonify({"success": False, "message": "Global Plex cache setup issue."}), 500
         elif service_to_refresh == 'jellyfin':
             if jellyfin_service and hasattr(jellyfin_service, 'initialize_cache'):
-                logger.info(f"Triggering initialize_cache on JELLYFIN_SERVICE.")
-                Thread(target=jellyfin_service.initialize_cache).start()
-                return jsonify({"success": True, "message": "Global Jellyfin cache refresh started."})
+                logger.info(f"Queueing initialize_cache on JELLYFIN_SERVICE.")
+                job, created = build_queue.submit('jellyfin:global', jellyfin_service.initialize_cache,
+                                                  PRIORITY_HIGH, 'Global Jellyfin cache refresh')
+                return jsonify({"success": True, "job_id": job.id,
+                                "message": "Global Jellyfin cache refresh started." if created else "Global Jellyfin cache refresh already queued."})
             else:
                 logger.error("Jellyfin service not available or no initialize_cache method.")
                 return jsonify({"success": False, "message": "Jellyfin service refresh unavailable."}), 500
         elif service_to_refresh == 'emby':
             if emby_service and hasattr(emby_service, 'initialize_cache'):
-                logger.info(f"Triggering initialize_cache on EMBY_SERVICE.")
-                Thread(target=emby_service.initialize_cache).start()
-                return jsonify({"success": True, "message": "Global Emby cache refresh started."})
+                logger.info(f"Queueing initialize_cache on EMBY_SERVICE.")
+                job, created = build_queue.submit('emby:global', emby_service.initialize_cache,
+                                                  PRIORITY_HIGH, 'Global Emby cache refresh')
+                return jsonify({"success": True, "job_id": job.id,
+                                "message": "Global Emby cache refresh started." if created else "Global Emby cache refresh already queued."})
             else:
                 logger.error("Emby service not available or no initialize_cache method.")
                 return jsonify({"success": False, "message": "Emby service refresh unavailable."}), 500
@@ -327,11 +331,13 @@ def build_user_cache(username):
         else:
             cm = user_cache_managers[username]
 
-        Thread(target=cm.start_cache_build).start()
+        job, created = build_queue.submit(cm.build_key, cm.start_cache_build, PRIORITY_HIGH,
+                                          f"Cache build for {username}")
 
         return jsonify({
             "success": True,
-            "message": f"Cache build started for user {username}"
+            "job_id": job.id,
+            "message": f"Cache build {'started' if created else 'already queued'} for user {username}"
         })
     except Exception as e:
         logger.error(f"Error building user cache: {e}")
@@ -394,154 +400,40 @@ def refresh_current_user_cache():
         else:
             cm = user_cache_managers[username]
 
-        Thread(target=cm.force_refresh).start()
+        job, created = build_queue.submit(cm.build_key, cm.force_refresh, PRIORITY_HIGH,
+                                          f"Cache refresh for {username}")
 
         return jsonify({
             "success": True,
-            "message": f"Cache refresh started for user {username}"
+            "job_id": job.id,
+            "message": f"Cache refresh {'started' if created else 'already queued'} for user {username}"
         })
     except Exception as e:
         logger.error(f"Error refreshing current user cache: {e}")
         return jsonify({"error": str(e)}), 500
 
+@user_cache_bp.route('/api/build_jobs')
+@auth_manager.require_admin
+def get_build_jobs():
+    """Queued, running and recently finished cache builds with their durations"""
+    return jsonify(build_queue.status())
+
+@user_cache_bp.route('/api/build_jobs/<int:job_id>/cancel', methods=['POST'])
+@auth_manager.require_admin
+def cancel_build_job(job_id):
+    """Cancel a queued build, or ask a running one to stop at its next progress update"""
+    if not build_queue.cancel(job_id):
+        return jsonify({"success": False, "message": f"No active build job {job_id}"}), 404
+    return jsonify({"success": True, "message": f"Cancellation requested for build job {job_id}"})
+
 @user_cache_bp.route('/api/random_backdrops', methods=['GET'])
 def get_random_backdrops():
     """Get a list of random movie backdrop URLs for the login page."""
     try:
-        tmdb_service = current_app.config.get('TMDB_SERVICE')
-        if not tmdb_service:
-            logger.info("TMDBService not in app.config, initializing for random_backdrops.")
-            tmdb_api_key = app_settings.get('tmdb', {}).get('api_key')
-            if not tmdb_api_key and not app_settings.get('tmdb', {}).get('enabled'):
-                tmdb_api_key = os.getenv('TMDB_API_KEY_DEFAULT', TMDBService.DEFAULT_API_KEY)
-            
-            if not tmdb_api_key:
-                 logger.error("Critical: TMDB API key is somehow still not available.")
-                 return jsonify({"error": "TMDB API key configuration is missing"}), 500
-
-            tmdb_service = TMDBService()
-
-        cache_file_path = None
-        service_movies = []
-
-        movies_data_for_processing = []
-        
-        plex_enabled = app_settings.get('plex', {}).get('enabled')
-        jellyfin_enabled = app_settings.get('jellyfin', {}).get('enabled')
-        emby_enabled = app_settings.get('emby', {}).get('enabled')
-
-        used_plex_all_movies_cache = False
-        if plex_enabled:
-            plex_all_movies_file_path = '/app/data/plex_all_movies.json'
-            if os.path.exists(plex_all_movies_file_path) and os.path.getsize(plex_all_movies_file_path) > 0:
-                logger.info("Login backdrops: Attempting to use Plex all_movies cache.")
-                try:
-                    with open(plex_all_movies_file_path, 'r') as f:
-                        plex_all_movies_data = json.load(f)
-                        if isinstance(plex_all_movies_data, list):
-                            for movie_obj in plex_all_movies_data:
-                                tmdb_id = movie_obj.get('tmdb_id')
-                                if tmdb_id:
-                                    movies_data_for_processing.append({'tmdb_id': str(tmdb_id), 'title': movie_obj.get('title', 'N/A')})
-                            if movies_data_for_processing:
-                                used_plex_all_movies_cache = True
-                                logger.info(f"Login backdrops: Successfully processed {len(movies_data_for_processing)} items from Plex all_movies cache.")
-                        else:
-                            logger.warning("Plex all_movies cache is not a list, falling back.")
-                except Exception as e:
-                    logger.error(f"Error loading or processing Plex all_movies cache: {e}", exc_info=True)
-            
-            if not used_plex_all_movies_cache and os.path.exists('/app/data/plex_metadata_cache.json'):
-                logger.info("Login backdrops: Using Plex metadata cache (fallback or all_movies not available/suitable).")
-                try:
-                    with open('/app/data/plex_metadata_cache.json', 'r') as f:
-                        plex_metadata = json.load(f)
-                        for movie_obj in plex_metadata.values():
-                            tmdb_id_from_guid = None
-                            guids = movie_obj.get('Guid', [])
-                            if isinstance(guids, list):
-                                for guid_entry in guids:
-                                    if isinstance(guid_entry, dict) and isinstance(guid_entry.get('id'), str) and guid_entry.get('id','').startswith('tmdb://'):
-                                        tmdb_id_from_guid = guid_entry['id'].replace('tmdb://', '')
-                                        break
-                            if tmdb_id_from_guid:
-                                movies_data_for_processing.append({'tmdb_id': tmdb_id_from_guid, 'title': movie_obj.get('title', 'N/A')})
-                except Exception as e:
-                    logger.error(f"Error loading Plex metadata cache: {e}", exc_info=True)
-
-        if not movies_data_for_processing and jellyfin_enabled and os.path.exists('/app/data/jellyfin_all_movies.json'):
-            logger.info("Login backdrops: Using Jellyfin all_movies cache.")
-            try:
-                with open('/app/data/jellyfin_all_movies.json', 'r') as f:
-                    jellyfin_movies = json.load(f)
-                    for movie_obj in jellyfin_movies:
-                        if movie_obj.get('tmdb_id'):
-                            movies_data_for_processing.append({'tmdb_id': str(movie_obj['tmdb_id']), 'title': movie_obj.get('title', 'N/A')})
-            except Exception as e:
-                logger.error(f"Error loading Jellyfin all_movies cache: {e}", exc_info=True)
-
-        elif emby_enabled and os.path.exists('/app/data/emby_all_movies.json'):
-            logger.info("Login backdrops: Using Emby all_movies cache.")
-            try:
-                with open('/app/data/emby_all_movies.json', 'r') as f:
-                    emby_movies = json.load(f) 
-                    for movie_obj in emby_movies:
-                        if movie_obj.get('tmdb_id'):
-                            movies_data_for_processing.append({'tmdb_id': str(movie_obj['tmdb_id']), 'title': movie_obj.get('title', 'N/A')})
-            except Exception as e:
-                logger.error(f"Error loading Emby all_movies cache: {e}", exc_info=True)
-        
-        else:
-            logger.warning("No suitable media service cache found for login backdrops (Plex all_movies, Plex metadata, or Jellyfin/Emby all_movies).")
-
-        if not movies_data_for_processing:
-            logger.warning("No movie data with TMDB IDs found in any selected cache. Cannot provide backdrops.")
-            return jsonify([])
-
-        random.shuffle(movies_data_for_processing)
-
-        backdrop_urls = []
-        processed_tmdb_ids = set()
-
-        for item_data in movies_data_for_processing:
-            if len(backdrop_urls) >= 20:
-                break
-
-            tmdb_id = item_data.get('tmdb_id')
-            movie_title_from_cache = item_data.get('title', 'N/A')
-
-            if tmdb_id and tmdb_id not in processed_tmdb_ids:
-                processed_tmdb_ids.add(tmdb_id)
-                logger.debug(f"Attempting to fetch TMDB details for ID: {tmdb_id} (from cached movie: {movie_title_from_cache})")
-                try:
-                    movie_details_from_tmdb = tmdb_service.get_movie_details(tmdb_id)
-                    
-                    if movie_details_from_tmdb:
-                        tmdb_movie_title = movie_details_from_tmdb.get('title', 'N/A')
-                        tmdb_backdrop_path_val = movie_details_from_tmdb.get('backdrop_path')
-                        logger.debug(f"TMDB details for {tmdb_id} ('{tmdb_movie_title}'): backdrop_path is '{tmdb_backdrop_path_val}'")
-
-                        if tmdb_backdrop_path_val:
-                            backdrop_url = tmdb_service.get_image_url(tmdb_backdrop_path_val, size='original')
-                            if backdrop_url:
-                                logger.debug(f"Successfully got backdrop URL for TMDB ID {tmdb_id}: {backdrop_url}")
-                                backdrop_urls.append(backdrop_url)
-                            else:
-                                logger.warning(f"get_image_url returned None for TMDB ID {tmdb_id}, path: {tmdb_backdrop_path_val}")
-                    else:
-                        logger.warning(f"Failed to fetch TMDB details for tmdb_id: {tmdb_id} (get_movie_details returned None).")
-                except Exception as e_tmdb:
-                    logger.error(f"Exception while fetching TMDB details or constructing image URL for tmdb_id {tmdb_id}: {e_tmdb}", exc_info=True)
-            
-            elif not tmdb_id:
-                 logger.debug(f"Skipping item due to missing TMDB ID: {movie_title_from_cache}")
-
-
+        backdrop_urls = backdrop_pool.sample(20)
         if not backdrop_urls:
-            logger.warning("No backdrop URLs constructed from service cache for login page. Final count: 0.")
-            
+            logger.info("Login backdrop pool is empty; a background refresh has been requested.")
         return jsonify(backdrop_urls)
-
     except Exception as e:
-        logger.error(f"Error getting random backdrops from service cache: {e}", exc_info=True)
+        logger.error(f"Error getting random backdrops from pool: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch random backdrops"}), 500
@@ -110,7 +110,7 @@ def shared_watchlist_movie():
     if not isinstance(plex_service, PlexService):
         return jsonify({'error': 'Plex not available or not the active service'}), 400
 
-    partner_id   = request.args.get('partner_username', '')
+    partner_id   = request.args.get('partner_username', '')  # comma-separated for group picks
     partner_mode = request.args.get('partner_mode', 'watchlist')
     if not partner_id:
         return jsonify({'error': 'No partner selected'}), 400
@@ -32,6 +32,7 @@ let infoRotationInterval;
 let currentInfoIndex = 0;
 const infoItems = [];
 let currentPlaybackPositionSeconds = 0;
+let currentMovieStateTag = null;
 
 if (posterBackdrop) {
     posterImage.addEventListener('load', function() {
@@ -612,6 +613,20 @@ function fetchPlaybackState() {
         });
 }
 
+function checkCurrentPoster() {
+    // Revalidates with If-None-Match, so an unchanged state costs a 304
+    fetch('/current_movie_state', { cache: 'no-cache' })
+        .then(response => response.json())
+        .then(data => {
+            if (currentMovieStateTag !== null && data.etag !== currentMovieStateTag) {
+                window.location.reload();
+                return;
+            }
+            currentMovieStateTag = data.etag;
+        })
+        .catch(error => console.error('Error checking current movie state:', error));
+}
+
 function handleResize() {
     const checkCount = isPWA ? 3 : 1;
 
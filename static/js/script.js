@@ -258,7 +258,8 @@ socket.on('loading_progress', function(data) {
         if (data.total === 0) {
             loadingCount.textContent = `Initializing...`;
         } else {
-            loadingCount.textContent = `${data.current}/${data.total}`;
+            const eta = data.eta > 0 ? ` · ~${Math.ceil(data.eta)}s left` : '';
+            loadingCount.textContent = `${data.current}/${data.total}${eta}`;
         }
     }
 
@@ -783,7 +784,7 @@ async function performSearch(query) {
                 updateMovieDisplay(currentMovie);
                 if (currentMovie && currentMovie.tmdb_id) {
                     fetchMovieDetailsAsync(currentMovie.tmdb_id);
-                    fetchTrailerAsync(currentMovie.title, currentMovie.year);
+                    fetchTrailerAsync(currentMovie.title, currentMovie.year, currentMovie.tmdb_id);
                 }
                 closeSearchModal();
             });
@@ -1590,7 +1591,7 @@ function applyEnrichment(movie) {
         handleAsyncTrailer(movie.trailer_url);
     } else if (movie && movie.tmdb_id) {
         fetchMovieDetailsAsync(movie.tmdb_id);
-        fetchTrailerAsync(movie.title, movie.year);
+        fetchTrailerAsync(movie.title, movie.year, movie.tmdb_id);
     }
     if (movie && movie.tmdb_id) {
         fetchCollectionAsync(movie.tmdb_id);
@@ -1624,10 +1625,11 @@ async function fetchMovieDetailsAsync(tmdbId) {
     }
 }
 
-async function fetchTrailerAsync(title, year) {
+async function fetchTrailerAsync(title, year, tmdbId) {
     console.log(`Async fetch: Fetching trailer for ${title} (${year})`);
     try {
-        const response = await fetch(`/api/youtube_trailer?title=${encodeURIComponent(title)}&year=${year}`);
+        const tmdbParam = tmdbId ? `&tmdb_id=${encodeURIComponent(tmdbId)}` : '';
+        const response = await fetch(`/api/youtube_trailer?title=${encodeURIComponent(title)}&year=${year}${tmdbParam}`);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -1671,7 +1673,7 @@ function handleAsyncMovieDetails(details, error = null) {
         if (details.credits?.crew) {
             const directors_enriched = details.credits.crew
                 .filter(p => p.department === 'Directing')
-                .map(p => ({ name: p.name, id: p.id, type: 'director', job: p.job, jobs: [p.job], is_primary: p.job === 'Director' }));
+                .map(p => ({ name: p.name, id: p.id, type: 'director', job: p.job, jobs: p.jobs || [p.job], is_primary: p.is_primary ?? p.job === 'Director' }));
 
             if (directors_enriched.length > 0) {
                 const maxDirectors = calcMobileMax(directorsEl, 'Directing: ', directors_enriched);
@@ -1715,7 +1717,7 @@ function handleAsyncMovieDetails(details, error = null) {
         if (details.credits?.crew) {
             const writers_enriched = details.credits.crew
                 .filter(p => p.department === 'Writing')
-                .map(p => ({ name: p.name, id: p.id, type: 'writer', job: p.job, jobs: [p.job], is_primary: ['Writer', 'Screenplay'].includes(p.job) }));
+                .map(p => ({ name: p.name, id: p.id, type: 'writer', job: p.job, jobs: p.jobs || [p.job], is_primary: p.is_primary ?? ['Writer', 'Screenplay'].includes(p.job) }));
 
             if (writers_enriched.length > 0) {
                 const maxWriters = calcMobileMax(writersEl, 'Writing: ', writers_enriched);
@@ -1762,7 +1764,7 @@ function handleAsyncMovieDetails(details, error = null) {
             if (actors_enriched.length > 0) {
                 const maxActors = calcMobileMax(actorsEl, 'Cast: ', actors_enriched);
                 const mainActors = actors_enriched.slice(0, maxActors);
-                const remainingCount = actors_enriched.length - maxActors;
+                const remainingCount = (details.credits.cast_total || actors_enriched.length) - maxActors;
 
                 const actorLinks = mainActors.map(actor => {
                     if (window.HOMEPAGE_MODE) {
@@ -2330,7 +2332,7 @@ function showAllActors(actors) {
     const castDialog = document.querySelector('.cast-dialog');
     const wasCastDialogVisible = castDialog !== null;
 
-    fetch(`/api/movie_details/${tmdbId}`)
+    fetch(`/api/movie_credits/${tmdbId}`)
         .then(response => response.json())
         .then(data => {
             hideLoadingOverlay();
@@ -2421,7 +2423,7 @@ function showAllDirectors(directors) {
    const castDialog = document.querySelector('.cast-dialog');
    const wasCastDialogVisible = castDialog !== null;
 
-   fetch(`/api/movie_details/${tmdbId}`)
+   fetch(`/api/movie_credits/${tmdbId}`)
        .then(response => response.json())
        .then(data => {
            hideLoadingOverlay('directors');
@@ -2532,7 +2534,7 @@ function showAllWriters(writers) {
    const castDialog = document.querySelector('.cast-dialog');
    const wasCastDialogVisible = castDialog !== null;
 
-   fetch(`/api/movie_details/${tmdbId}`)
+   fetch(`/api/movie_credits/${tmdbId}`)
        .then(response => response.json())
        .then(data => {
            hideLoadingOverlay('writers');
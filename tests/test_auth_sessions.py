@@ -0,0 +1,129 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from flask import Flask, g
+
+from utils.auth import db as auth_db
+from utils.auth.manager import AuthManager
+from utils.auth.session_store import SessionStore
+
+
+class AuthSessionStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.data_dir = Path(self.temp_dir.name)
+        patcher = patch.object(auth_db, 'SETTINGS_FILE', str(self.data_dir / 'settings.json'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Only explicit flushes write, so no background writer outlives the temp directory
+        writer_patcher = patch.object(SessionStore, '_schedule_persist')
+        writer_patcher.start()
+        self.addCleanup(writer_patcher.stop)
+
+    def _write_auth(self, data):
+        (self.data_dir / 'auth.json').write_text(json.dumps(data))
+
+    def test_sessions_are_kept_out_of_auth_json(self):
+        db = auth_db.AuthDB()
+        db.add_user('alice', 'password123', is_admin=True)
+        token = db.create_session('alice')
+
+        self.assertEqual(db.verify_session(token)['username'], 'alice')
+        db.sessions.flush()
+
+        auth_data = json.loads((self.data_dir / 'auth.json').read_text())
+        self.assertNotIn('sessions', auth_data)
+        stored = json.loads((self.data_dir / 'sessions.json').read_text())['sessions']
+        self.assertIn(token, stored)
+
+    def test_legacy_sessions_are_migrated(self):
+        self._write_auth({
+            'users': {'bob': {'is_admin': False, 'service_type': 'local'}},
+            'managed_users': {},
+            'sessions': {'tok': {'username': 'bob', 'expires': time.time() + 3600, 'user_type': 'local'}},
+        })
+
+        db = auth_db.AuthDB()
+
+        self.assertEqual(db.verify_session('tok')['username'], 'bob')
+        self.assertNotIn('sessions', json.loads((self.data_dir / 'auth.json').read_text()))
+        # Written synchronously during migration, not left to the background writer
+        stored = json.loads((self.data_dir / 'sessions.json').read_text())['sessions']
+        self.assertIn('tok', stored)
+
+    def test_expired_and_invalidated_sessions_are_dropped(self):
+        db = auth_db.AuthDB()
+        db.add_user('carol', 'password123')
+        keep = db.create_session('carol')
+        drop = db.create_session('carol')
+        db.sessions.extend(keep, time.time() - 1)
+
+        self.assertIsNone(db.verify_session(keep))
+        db.invalidate_user_sessions('carol')
+        self.assertIsNone(db.verify_session(drop))
+        self.assertEqual(len(db.sessions), 0)
+
+    def test_purge_pops_only_due_entries(self):
+        store = SessionStore(str(self.data_dir / 'store.json'))
+        now = time.time()
+        store.add('old', {'username': 'x', 'expires': now - 10})
+        store.add('new', {'username': 'y', 'expires': now + 3600})
+
+        self.assertEqual(store.purge_expired(force=True), 1)
+        self.assertIsNotNone(store.get('new'))
+        self.assertEqual(len(store), 1)
+
+
+class PrincipalCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        patcher = patch.object(auth_db, 'SETTINGS_FILE', str(Path(self.temp_dir.name) / 'settings.json'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Only explicit flushes write, so no background writer outlives the temp directory
+        writer_patcher = patch.object(SessionStore, '_schedule_persist')
+        writer_patcher.start()
+        self.addCleanup(writer_patcher.stop)
+        self.manager = AuthManager()
+        self.manager._auth_enabled = True
+        self.manager.db.add_user('dave', 'password123')
+        self.token = self.manager.db.create_session('dave')
+        self.app = Flask(__name__)
+
+    def test_principal_is_verified_once_per_request(self):
+        with self.app.test_request_context('/'):
+            with patch.object(self.manager.db, 'verify_session', wraps=self.manager.db.verify_session) as verify:
+                first = self.manager.verify_auth(self.token)
+                second = self.manager.verify_auth(self.token)
+
+            self.assertIs(first, second)
+            self.assertEqual(verify.call_count, 1)
+            self.assertEqual(g.auth_principal[0], self.token)
+
+    def test_cache_spans_requests_until_invalidated(self):
+        with self.app.test_request_context('/'):
+            self.manager.verify_auth(self.token)
+        with self.app.test_request_context('/'):
+            with patch.object(self.manager.db, 'verify_session') as verify:
+                self.assertEqual(self.manager.verify_auth(self.token)['username'], 'dave')
+            verify.assert_not_called()
+
+        self.manager.db.invalidate_user_sessions('dave')
+        with self.app.test_request_context('/'):
+            self.assertIsNone(self.manager.verify_auth(self.token))
+
+    def test_logout_drops_cached_principal(self):
+        with self.app.test_request_context('/'):
+            self.assertIsNotNone(self.manager.verify_auth(self.token))
+            self.manager.logout(self.token)
+            self.assertIsNone(self.manager.verify_auth(self.token))
+
+
+if __name__ == '__main__':
+    unittest.main()
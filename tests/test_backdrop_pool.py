@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from utils.backdrop_pool import BackdropPool
+
+
+def fake_backdrop(tmdb_id):
+    return None if tmdb_id == '3' else f'https://image.tmdb.org/t/p/original/{tmdb_id}.jpg'
+
+
+class BackdropPoolTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'login_backdrops.json')
+
+    def test_refresh_fills_pool_and_persists(self):
+        pool = BackdropPool(self.path, size=3)
+
+        with patch.object(BackdropPool, '_backdrop_url', side_effect=fake_backdrop) as lookup:
+            pool._refresh(['1', '2', '3', '4', '5'])
+
+        self.assertEqual(len(pool.sample(10)), 3)
+        self.assertLessEqual(lookup.call_count, 5)
+        with open(self.path) as f:
+            self.assertEqual(len(json.load(f)['backdrops']), 3)
+        self.assertEqual(sorted(BackdropPool(self.path, size=3).sample(10)), sorted(pool.sample(10)))
+
+    def test_refresh_keeps_known_backdrops_for_movies_still_in_library(self):
+        pool = BackdropPool(self.path, size=2)
+        with patch.object(BackdropPool, '_backdrop_url', side_effect=fake_backdrop):
+            pool._refresh(['1', '2'])
+
+        with patch.object(BackdropPool, '_backdrop_url', side_effect=fake_backdrop) as lookup:
+            pool._refresh(['1', '5'])
+
+        lookup.assert_called_once_with('5')
+        self.assertEqual(sorted(pool._backdrops), ['1', '5'])
+
+    def test_sample_never_calls_tmdb(self):
+        pool = BackdropPool(self.path)
+
+        with patch.object(pool, 'refresh_async') as refresh, \
+                patch.object(BackdropPool, '_backdrop_url') as lookup:
+            self.assertEqual(pool.sample(), [])
+
+        refresh.assert_called_once_with()
+        lookup.assert_not_called()
+
+    def test_followers_reload_the_leaders_pool_instead_of_calling_tmdb(self):
+        leader = BackdropPool(self.path, size=3)
+        follower = BackdropPool(self.path, size=3)
+        with patch.object(BackdropPool, '_backdrop_url', side_effect=fake_backdrop):
+            leader._refresh(['1', '2'])
+
+        with patch('utils.backdrop_pool.leadership.is_leader', return_value=False), \
+                patch.object(BackdropPool, '_backdrop_url') as lookup:
+            self.assertFalse(follower.refresh_async())
+
+        lookup.assert_not_called()
+        self.assertEqual(sorted(follower.sample(10)), sorted(leader.sample(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
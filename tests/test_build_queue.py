@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+import unittest
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from utils.build_queue import (BuildQueue, CANCELLED, DONE, FAILED, PRIORITY_HIGH, PRIORITY_LOW)
+from utils.cache_manager import CacheManager
+from utils.progress import ProgressReporter
+
+
+class BuildQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.queue = BuildQueue(max_concurrent=1)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def blocker(self, started=None):
+        def run():
+            if started:
+                started.set()
+            self.release.wait(5)
+        return run
+
+    def test_duplicate_submissions_share_one_job(self):
+        started = threading.Event()
+        job, created = self.queue.submit('plex:alice', self.blocker(started))
+        started.wait(2)
+        again, created_again = self.queue.submit('plex:alice', self.blocker())
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertIs(again, job)
+        self.release.set()
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.state, DONE)
+        self.assertEqual(self.queue.status()['finished'][0]['id'], job.id)
+
+    def test_priority_order_and_concurrency_limit(self):
+        order = []
+        started = threading.Event()
+        self.queue.submit('first', self.blocker(started))
+        started.wait(2)
+        low, _ = self.queue.submit('low', lambda: order.append('low'), PRIORITY_LOW)
+        high, _ = self.queue.submit('high', lambda: order.append('high'), PRIORITY_HIGH)
+
+        status = self.queue.status()
+        self.assertEqual(len(status['running']), 1)
+        self.assertEqual([j['key'] for j in status['queued']], ['high', 'low'])
+
+        self.release.set()
+        low.wait(2)
+        high.wait(2)
+        self.assertEqual(order, ['high', 'low'])
+
+    def test_cancel_queued_and_running_jobs(self):
+        started = threading.Event()
+        reached = threading.Event()
+
+        def build():
+            progress = ProgressReporter(MagicMock(), min_interval=0)
+            started.set()
+            for i in range(1000):
+                progress.update(i / 1000, current=i, total=1000, status='Building cache')
+                if i == 10:
+                    reached.set()
+                    self.release.wait(5)
+
+        running, _ = self.queue.submit('running', build)
+        queued, _ = self.queue.submit('queued', lambda: None)
+        started.wait(2)
+        reached.wait(2)
+
+        self.assertTrue(self.queue.cancel(queued.id))
+        self.assertTrue(self.queue.cancel(running.id))
+        self.release.set()
+
+        self.assertTrue(running.wait(2))
+        self.assertEqual((queued.state, running.state), (CANCELLED, CANCELLED))
+        self.assertFalse(self.queue.cancel(running.id))
+
+    def test_failures_are_recorded(self):
+        def broken():
+            raise RuntimeError('plex offline')
+
+        job, _ = self.queue.submit('broken', broken)
+        job.wait(2)
+
+        finished = self.queue.status()['finished'][0]
+        self.assertEqual((finished['state'], finished['error']), (FAILED, 'plex offline'))
+        self.assertIsNotNone(finished['run_seconds'])
+
+    def test_all_movies_build_runs_inside_the_job_and_can_be_cancelled(self):
+        reached = threading.Event()
+        plex_service = MagicMock()
+        plex_service.library_names = ['Movies']
+        movies = [SimpleNamespace(title=f'Movie {i}', isWatched=False) for i in range(50)]
+        plex_service._get_user_plex_instance.return_value.library.section.return_value.all.return_value = movies
+
+        def movie_data(movie):
+            if movie is movies[10]:
+                reached.set()
+                self.release.wait(5)
+            return {'title': movie.title}
+
+        plex_service.get_movie_data.side_effect = movie_data
+        manager = CacheManager(plex_service, MagicMock(), None, user_type='plex')
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        manager.all_movies_cache_path = os.path.join(tmp.name, 'plex_all_movies.json')
+
+        job, _ = self.queue.submit('all', partial(manager.cache_all_plex_movies, synchronous=True))
+        self.assertTrue(reached.wait(2))
+        self.assertEqual(self.queue.status()['running'][0]['id'], job.id)
+        self.queue.cancel(job.id)
+        self.release.set()
+
+        self.assertTrue(job.wait(2))
+        self.assertEqual(job.state, CANCELLED)
+        self.assertFalse(os.path.exists(manager.all_movies_cache_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
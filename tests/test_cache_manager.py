@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from utils.cache_manager import CacheManager
+
+class CacheFollowerTests(unittest.TestCase):
+    def test_follower_reloads_cache_rewritten_by_the_leader(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        plex_service = MagicMock()
+        manager = CacheManager(plex_service, MagicMock(), None, user_type='plex')
+        manager.cache_file_path = os.path.join(tmp.name, 'plex_unwatched_movies.json')
+        with open(manager.cache_file_path, 'w') as f:
+            f.write('[{"id": "1"}]')
+        manager._init_memory_cache()
+
+        manager._reload_if_changed_on_disk()
+        self.assertEqual(manager._movies_memory_cache, [{'id': '1'}])
+
+        with open(manager.cache_file_path, 'w') as f:
+            f.write('[]')
+        os.utime(manager.cache_file_path, ns=(0, manager._disk_mtime + 1))
+        manager._reload_if_changed_on_disk()
+
+        self.assertEqual((manager._movies_memory_cache, plex_service._movies_cache), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -96,9 +96,9 @@ class CollectionStatusTests(unittest.TestCase):
             'check_request_status',
             side_effect=lambda movie_id: movie_id == 3,
         ) as request_mock, patch(
-            'utils.collection_service.is_movie_watched_on_tracker',
-            side_effect=lambda movie_id: movie_id == 3,
-        ), patch(
+            'utils.collection_service.are_movies_watched_on_tracker',
+            side_effect=lambda movie_ids: {movie_id: movie_id == 3 for movie_id in movie_ids},
+        ) as watched_mock, patch(
             'utils.collection_service.get_tracking_provider',
             return_value='simkl',
         ):
@@ -119,6 +119,7 @@ class CollectionStatusTests(unittest.TestCase):
         self.assertTrue(result['collection_movies'][2]['is_requested'])
         self.assertEqual(result['current_movie_id'], 2)
         all_movies_mock.assert_called_once_with()
+        watched_mock.assert_called_once_with([1, 2, 3])
         request_mock.assert_called_once_with(3)
 
 
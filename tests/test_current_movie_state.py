@@ -0,0 +1,54 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from utils.current_movie_state import CurrentMovieState
+
+
+class CurrentMovieStateTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = Path(self.temp_dir.name) / 'current_movie.json'
+
+    def test_updates_bump_version_and_flush_latest(self):
+        state = CurrentMovieState(file_path=str(self.path), persist_interval=60)
+        state.set({'movie': {'id': '1'}, 'session_type': 'NEW'})
+        first_version = state.version
+        state.update(session_type='STOP')
+
+        self.assertGreater(state.version, first_version)
+        state.flush()
+        self.assertEqual(json.loads(self.path.read_text())['session_type'], 'STOP')
+
+    def test_get_returns_copy(self):
+        state = CurrentMovieState(file_path=str(self.path), persist_interval=60)
+        state.set({'movie': {'id': '1'}})
+
+        state.get()['movie']['id'] = 'changed'
+
+        self.assertEqual(state.get()['movie']['id'], '1')
+
+    def test_clear_removes_file_and_reload_restores_state(self):
+        self.path.write_text(json.dumps({'movie': {'id': '7'}}))
+        state = CurrentMovieState(file_path=str(self.path), persist_interval=60)
+        self.assertEqual(state.get()['movie']['id'], '7')
+
+        state.clear()
+        state.flush()
+
+        self.assertFalse(state.exists())
+        self.assertFalse(self.path.exists())
+
+    def test_etag_differs_across_process_restarts(self):
+        first = CurrentMovieState(file_path=str(self.path), persist_interval=60)
+        second = CurrentMovieState(file_path=str(self.path), persist_interval=60)
+
+        self.assertEqual(first.version, second.version)
+        self.assertNotEqual(first.etag, second.etag)
+        self.assertEqual(first.etag, first.etag_for(first.snapshot()[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
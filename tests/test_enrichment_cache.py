@@ -0,0 +1,227 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from utils import enrichment_cache as enrichment_module
+from utils.enrichment_cache import EnrichmentCache
+from utils.tmdb_service import tmdb_service
+
+
+class EnrichmentBuildTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = EnrichmentCache(temp_dir.name, legacy_file=f"{temp_dir.name}/legacy.json")
+        patches = [
+            patch.object(EnrichmentCache, '_save_to_disk'),
+            patch.object(EnrichmentCache, '_should_cache_logo', return_value=True),
+            patch.object(EnrichmentCache, '_link_sources', return_value=()),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_sources_are_fetched_concurrently(self):
+        # Every source waits for all four to be in flight, so a serial fetch would break the barrier
+        barrier = threading.Barrier(4, timeout=2)
+
+        def together(value):
+            def call(*args):
+                barrier.wait()
+                return value
+            return call
+
+        with patch.object(tmdb_service, 'get_movie_cast', side_effect=together({'cast': []})), \
+                patch.object(tmdb_service, 'get_movie_links', side_effect=together(('t', 'k', 'i'))), \
+                patch.object(tmdb_service, 'get_movie_logo_url', side_effect=together('logo')), \
+                patch('utils.youtube_trailer.trailer_resolver.resolve', side_effect=together('trailer')):
+            entry = self.cache.enrich_single(949, 'Heat', 1995)
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual(entry['credits'], {'cast': [], 'cast_total': 0, 'crew': []})
+        self.assertEqual((entry['tmdb_url'], entry['trakt_url'], entry['imdb_url']), ('t', 'k', 'i'))
+        self.assertEqual(entry['trailer_url'], 'trailer')
+        self.assertEqual(entry['logo_url'], 'logo')
+        self.assertEqual(self.cache.get_stats()['source_calls'], {'tmdb': 1, 'trakt': 0})
+
+    def test_failed_source_keeps_other_fields(self):
+        with patch.object(tmdb_service, 'get_movie_cast', side_effect=RuntimeError('down')), \
+                patch.object(tmdb_service, 'get_movie_links', return_value=(None, None, None)), \
+                patch.object(tmdb_service, 'get_movie_logo_url', return_value=None), \
+                patch('utils.youtube_trailer.trailer_resolver.resolve', return_value='trailer'):
+            entry = self.cache.enrich_single(949, 'Heat', 1995)
+
+        self.assertIsNone(entry['credits'])
+        self.assertEqual(entry['tmdb_url'], 'https://www.themoviedb.org/movie/949')
+        self.assertEqual(entry['trailer_url'], 'trailer')
+
+    def test_build_processes_movies_in_parallel_and_reports_progress(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def fake_enrich(tmdb_id, title, year):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            if str(tmdb_id) == '3':
+                raise RuntimeError('boom')
+            return {'tmdb_id': str(tmdb_id), 'enriched_at': time.time()}
+
+        self.cache.set(1, {'tmdb_id': '1', 'enriched_at': time.time()})
+        movies = [{'tmdb_id': i, 'title': f'Movie {i}'} for i in range(1, 9)] + [{'title': 'No id'}]
+
+        with patch.object(self.cache, 'enrich_single', side_effect=fake_enrich):
+            self.cache._queue_build(movies, force=False)
+            self.assertTrue(self.cache.wait_idle(timeout=5))
+
+        stats = self.cache.get_stats()
+        self.assertGreater(peak, 1)
+        self.assertLessEqual(peak, enrichment_module.BUILD_CONCURRENCY)
+        self.assertEqual((stats['total'], stats['processed'], stats['enriched'], stats['errors']), (7, 7, 6, 1))
+        self.assertFalse(stats['building'])
+        self.assertIsNone(self.cache.get(3))
+
+
+
+class EnrichmentQueueTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = EnrichmentCache(temp_dir.name, legacy_file=f"{temp_dir.name}/legacy.json", max_in_flight=1)
+        save = patch.object(EnrichmentCache, '_save_to_disk')
+        save.start()
+        self.addCleanup(save.stop)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+
+        def fake_enrich(tmdb_id, title, year):
+            self.order.append(tmdb_id)
+            self.started.set()
+            self.release.wait(timeout=5)
+            return {'tmdb_id': tmdb_id, 'enriched_at': time.time()}
+
+        enrich = patch.object(self.cache, 'enrich_single', side_effect=fake_enrich)
+        enrich.start()
+        self.addCleanup(enrich.stop)
+        self.addCleanup(self.release.set)
+
+    def test_on_demand_jumps_ahead_and_duplicates_coalesce(self):
+        self.cache._queue_build([{'tmdb_id': i} for i in (1, 2, 3)], force=False)
+        self.assertTrue(self.started.wait(timeout=5))
+
+        self.assertTrue(self.cache.enrich_on_demand(3, 'Three', 2000))
+        self.assertFalse(self.cache.enrich_on_demand(3, 'Three', 2000))
+        self.assertFalse(self.cache.enrich_on_demand(1, 'One', 2000))
+        queue = self.cache.get_stats()['queue']
+        self.release.set()
+
+        self.assertTrue(self.cache.wait_idle(timeout=5))
+        self.assertEqual(self.order, ['1', '3', '2'])
+        self.assertEqual((queue['in_flight'], queue['queued'], queue['queued_on_demand']), (1, 2, 1))
+        self.assertEqual(queue['coalesced'], 3)
+        self.assertEqual(self.cache.get_stats()['total'], 3)
+
+    def test_on_demand_queue_is_bounded(self):
+        with patch.object(enrichment_module, 'MAX_ON_DEMAND_QUEUE', 1):
+            self.cache.enrich_on_demand(1, 'One', 2000)
+            self.assertTrue(self.started.wait(timeout=5))
+            self.assertTrue(self.cache.enrich_on_demand(2, 'Two', 2000))
+            self.assertFalse(self.cache.enrich_on_demand(3, 'Three', 2000))
+
+        self.assertEqual(self.cache.get_stats()['queue']['dropped'], 1)
+        self.release.set()
+        self.assertTrue(self.cache.wait_idle(timeout=5))
+        self.assertEqual(self.order, ['1', '2'])
+
+
+class EnrichmentPersistenceTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache_dir = Path(self.temp_dir.name) / 'enrichment_cache'
+        self.legacy_file = Path(self.temp_dir.name) / 'enrichment_cache.json'
+
+    def _cache(self):
+        return EnrichmentCache(str(self.cache_dir), legacy_file=str(self.legacy_file))
+
+    def test_saving_one_entry_rewrites_only_its_shard(self):
+        cache = self._cache()
+        cache.set(1, {'tmdb_id': '1'})
+        cache.set(2, {'tmdb_id': '2'})
+        cache.flush()
+        first_shard = self.cache_dir / '01.json'
+        first_mtime = first_shard.stat().st_mtime_ns
+
+        cache.set(258, {'tmdb_id': '258'})
+        cache.flush()
+
+        self.assertEqual(sorted(p.name for p in self.cache_dir.iterdir()), ['01.json', '02.json'])
+        self.assertEqual(json.loads((self.cache_dir / '02.json').read_text()),
+                         {'2': {'tmdb_id': '2'}, '258': {'tmdb_id': '258'}})
+        self.assertEqual(first_shard.stat().st_mtime_ns, first_mtime)
+
+    def test_shards_load_lazily(self):
+        cache = self._cache()
+        cache.set(1, {'tmdb_id': '1'})
+        cache.set(2, {'tmdb_id': '2'})
+        cache.flush()
+
+        reloaded = self._cache()
+        self.assertEqual(reloaded.get(1), {'tmdb_id': '1'})
+        self.assertEqual(reloaded._loaded_shards, {1})
+        self.assertEqual(reloaded.get('2'), {'tmdb_id': '2'})
+
+    def test_legacy_file_is_split_into_shards(self):
+        self.legacy_file.write_text(json.dumps({'1': {'tmdb_id': '1'}, '513': {'tmdb_id': '513'}}))
+
+        cache = self._cache()
+
+        self.assertEqual(cache.get(513), {'tmdb_id': '513'})
+        self.assertFalse(self.legacy_file.exists())
+        self.assertEqual(self._cache().get(1), {'tmdb_id': '1'})
+
+    def test_legacy_entries_merge_into_existing_shards(self):
+        self.cache_dir.mkdir()
+        (self.cache_dir / '01.json').write_text(json.dumps({'1': {'tmdb_id': '1', 'fresh': True}}))
+        self.legacy_file.write_text(json.dumps({'1': {'tmdb_id': '1'}, '257': {'tmdb_id': '257'}}))
+
+        cache = self._cache()
+
+        self.assertEqual(cache.get(1), {'tmdb_id': '1', 'fresh': True})
+        self.assertEqual(cache.get(257), {'tmdb_id': '257'})
+        self.assertFalse(self.legacy_file.exists())
+
+    def test_failed_migration_keeps_legacy_file(self):
+        self.legacy_file.write_text(json.dumps({'1': {'tmdb_id': '1'}}))
+
+        with patch.object(enrichment_module, 'atomic_write_json', side_effect=OSError('disk full')):
+            self._cache().get(1)
+
+        self.assertTrue(self.legacy_file.exists())
+        self.assertEqual(self._cache().get(1), {'tmdb_id': '1'})
+
+    def test_raw_credits_are_slimmed_on_load(self):
+        raw = {'cast': [{'id': i, 'name': f'Actor {i}', 'order': i, 'credit_id': 'x'} for i in range(40)],
+               'crew': [{'id': 99, 'name': 'Sound', 'department': 'Sound', 'job': 'Mixer'}]}
+        self.legacy_file.write_text(json.dumps({'7': {'tmdb_id': '7', 'credits': raw}}))
+
+        self._cache().get(7)
+        stored = json.loads((self.cache_dir / '07.json').read_text())['7']['credits']
+
+        self.assertEqual(len(stored['cast']), 20)
+        self.assertEqual(stored['cast_total'], 40)
+        self.assertEqual(stored['crew'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
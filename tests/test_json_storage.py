@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from utils.json_storage import read_json, update_json, write_json
+
+
+class JsonStorageTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'nested', 'cache.json')
+
+    def test_reads_see_the_last_write_without_reparsing(self):
+        write_json(self.path, {'movies': [1, 2]})
+
+        with patch('builtins.open', wraps=open) as opened:
+            self.assertEqual(read_json(self.path), {'movies': [1, 2]})
+            opened.assert_not_called()
+
+    def test_external_changes_are_picked_up(self):
+        write_json(self.path, [1])
+        with open(self.path, 'w') as f:
+            json.dump([1, 2, 3], f)
+
+        self.assertEqual(read_json(self.path), [1, 2, 3])
+
+    def test_missing_or_corrupt_files_return_the_default(self):
+        self.assertEqual(read_json(self.path, default=[]), [])
+
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{"trunc')
+
+        self.assertIsNone(read_json(self.path))
+
+    def test_concurrent_updates_are_not_lost(self):
+        write_json(self.path, {'count': 0})
+
+        def bump(data):
+            data['count'] += 1
+
+        threads = [threading.Thread(target=update_json, args=(self.path, bump)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'count': 20})
+
+    def test_fsync_write_leaves_no_temp_files(self):
+        write_json(self.path, {'a': 1}, fsync=True, indent=2)
+
+        leftovers = [n for n in os.listdir(os.path.dirname(self.path)) if n.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+        self.assertEqual(read_json(self.path), {'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
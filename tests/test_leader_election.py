@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from utils.leader_election import LeaderElection
+
+
+class LeaderElectionTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        # Two elections on one lock directory stand in for two worker processes
+        self.worker_a = LeaderElection(temp_dir.name, retry_interval=0)
+        self.worker_b = LeaderElection(temp_dir.name, retry_interval=0)
+        self.addCleanup(self.worker_a.release, 'cache')
+        self.addCleanup(self.worker_b.release, 'cache')
+
+    def test_only_one_worker_leads_each_job(self):
+        self.assertTrue(self.worker_a.is_leader('cache'))
+        self.assertTrue(self.worker_a.is_leader('cache'))
+        self.assertFalse(self.worker_b.is_leader('cache'))
+        self.assertTrue(self.worker_b.is_leader('trakt'))
+        self.worker_b.release('trakt')
+
+    def test_follower_takes_over_when_the_leader_lets_go(self):
+        self.worker_a.is_leader('cache')
+        self.assertFalse(self.worker_b.is_leader('cache'))
+
+        self.worker_a.release('cache')
+
+        self.assertTrue(self.worker_b.is_leader('cache'))
+        self.assertFalse(self.worker_a.is_leader('cache'))
+
+    def test_status_reports_the_holder(self):
+        self.worker_a.is_leader('cache')
+        self.worker_b.is_leader('cache')
+
+        lease = self.worker_b.status()['leases']['cache']
+
+        self.assertFalse(lease['leader'])
+        self.assertEqual(lease['holder_pid'], os.getpid())
+        self.assertTrue(self.worker_a.status()['leases']['cache']['leader'])
+
+    def test_followers_retry_at_most_once_per_interval(self):
+        follower = LeaderElection(self.worker_a.lock_dir, retry_interval=3600)
+        self.worker_a.is_leader('cache')
+        self.assertFalse(follower.is_leader('cache'))
+
+        self.worker_a.release('cache')
+
+        self.assertFalse(follower.is_leader('cache'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from utils.json_storage import read_json
+from utils.library_fingerprint import fingerprint_path, save_fingerprint, verify_fingerprint
+
+
+class FakePlex:
+    """Answers count-only section queries from a {title: (key, total, unwatched)} table"""
+
+    def __init__(self, sections):
+        self.sections = sections
+        self.updated_at = datetime(2026, 1, 1)
+        self.queries = []
+        self.library = MagicMock()
+        self.library.sections.side_effect = lambda: [
+            SimpleNamespace(title=title, key=key, updatedAt=self.updated_at)
+            for title, (key, _, _) in self.sections.items()
+        ]
+
+    def query(self, path):
+        self.queries.append(path)
+        key = path.split('/')[3]
+        for section_key, total, unwatched in self.sections.values():
+            if section_key == key:
+                size = unwatched if 'unwatched=1' in path else total
+                return SimpleNamespace(attrib={'size': '0', 'totalSize': str(size)})
+        raise LookupError(path)
+
+
+class LibraryFingerprintTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, 'plex_unwatched_movies.json')
+        self.plex = FakePlex({'Movies': ('1', 120, 80), '4K': ('2', 10, 5), 'Other': ('3', 1, 1)})
+
+    def test_unchanged_library_is_valid_with_count_only_queries(self):
+        save_fingerprint(self.cache_path, self.plex, ['Movies', '4K'])
+
+        self.assertEqual(read_json(fingerprint_path(self.cache_path))['Movies']['unwatched'], 80)
+        self.assertTrue(verify_fingerprint(self.cache_path, self.plex, ['Movies', '4K'], 85))
+        self.assertTrue(all('X-Plex-Container-Size=0' in q for q in self.plex.queries))
+        self.assertFalse(any('/sections/3/' in q for q in self.plex.queries))
+
+    def test_watching_adding_or_rescanning_invalidates(self):
+        save_fingerprint(self.cache_path, self.plex, ['Movies'])
+        self.plex.sections['Movies'] = ('1', 120, 79)
+        self.assertFalse(verify_fingerprint(self.cache_path, self.plex, ['Movies'], 80))
+
+        save_fingerprint(self.cache_path, self.plex, ['Movies'])
+        self.plex.updated_at = datetime(2026, 2, 1)
+        self.assertFalse(verify_fingerprint(self.cache_path, self.plex, ['Movies'], 79))
+
+    def test_transient_errors_keep_the_cache(self):
+        save_fingerprint(self.cache_path, self.plex, ['Movies'])
+        self.plex.library.sections.side_effect = ConnectionError('timed out')
+
+        self.assertTrue(verify_fingerprint(self.cache_path, self.plex, ['Movies'], 0))
+
+    def test_failed_save_drops_the_stale_fingerprint(self):
+        save_fingerprint(self.cache_path, self.plex, ['Movies'])
+        self.plex.library.sections.side_effect = ConnectionError('timed out')
+
+        save_fingerprint(self.cache_path, self.plex, ['Movies'])
+        self.assertFalse(os.path.exists(fingerprint_path(self.cache_path)))
+
+        save_fingerprint(self.cache_path, None, ['Movies'])
+        self.assertFalse(os.path.exists(fingerprint_path(self.cache_path)))
+
+    def test_cache_without_fingerprint_is_checked_by_count(self):
+        self.assertFalse(verify_fingerprint(self.cache_path, self.plex, ['Movies'], 79))
+        self.assertFalse(os.path.exists(fingerprint_path(self.cache_path)))
+
+        self.assertTrue(verify_fingerprint(self.cache_path, self.plex, ['Movies'], 80))
+        self.assertTrue(os.path.exists(fingerprint_path(self.cache_path)))
+
+
+if __name__ == '__main__':
+    unittest.main()
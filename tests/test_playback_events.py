@@ -0,0 +1,281 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from utils.playback_events import MediaServerSessionListener, PlexSessionListener
+from utils.playback_monitor import PlaybackMonitor
+
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class FakeSessionSocketServer:
+    """Minimal websocket server that answers SessionsStart with one pushed session list."""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.received = []
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.port = self.server.getsockname()[1]
+        self.request_path = None
+        self.close_now = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _read_frame(self, conn):
+        header = conn.recv(2)
+        if len(header) < 2:
+            return None
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', conn.recv(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', conn.recv(8))[0]
+        mask = conn.recv(4)
+        payload = b''
+        while len(payload) < length:
+            payload += conn.recv(length - len(payload))
+        return bytes(b ^ mask[i % 4] for i, b in enumerate(payload)).decode()
+
+    def _send_frame(self, conn, text):
+        data = text.encode()
+        if len(data) < 126:
+            header = struct.pack('>BB', 0x81, len(data))
+        else:
+            header = struct.pack('>BBH', 0x81, 126, len(data))
+        conn.sendall(header + data)
+
+    def _serve(self):
+        conn, _ = self.server.accept()
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += conn.recv(1024)
+        lines = request.decode().split('\r\n')
+        self.request_path = lines[0].split(' ')[1]
+        key = next(line.split(':', 1)[1].strip() for line in lines
+                   if line.lower().startswith('sec-websocket-key'))
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        conn.sendall((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept}\r\n\r\n'
+        ).encode())
+
+        message = json.loads(self._read_frame(conn))
+        self.received.append(message)
+        self._send_frame(conn, json.dumps({'MessageType': 'Sessions', 'Data': self.sessions}))
+
+        self.close_now.wait(5)
+        conn.sendall(struct.pack('>BB', 0x88, 0))
+        conn.close()
+        self.server.close()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class MediaServerSessionListenerTests(unittest.TestCase):
+    def test_pushed_sessions_replace_polling_until_disconnect(self):
+        server = FakeSessionSocketServer([
+            {'UserName': 'alice', 'NowPlayingItem': {'Id': 'm1', 'Type': 'Movie', 'Name': 'Heat'}},
+            {'UserName': 'bob'},
+        ])
+        changes = []
+        listener = MediaServerSessionListener(
+            'jellyfin', f'http://127.0.0.1:{server.port}', 'secret',
+            on_change=changes.append, reconnect_delay=60,
+        )
+        listener.start()
+        self.addCleanup(listener.stop)
+
+        self.assertTrue(wait_for(lambda: listener.connected))
+        self.assertEqual(server.received[0]['MessageType'], 'SessionsStart')
+        self.assertTrue(server.request_path.startswith('/socket?api_key=secret'))
+        self.assertEqual([s['UserName'] for s in listener.sessions], ['alice'])
+        self.assertIn('jellyfin', changes)
+
+        server.close_now.set()
+        self.assertTrue(wait_for(lambda: not listener.connected))
+        self.assertIsNone(listener.sessions)
+
+    def test_progress_only_frames_do_not_notify(self):
+        changes = []
+        listener = MediaServerSessionListener('emby', 'http://127.0.0.1:1', 'key', on_change=changes.append)
+        playing = {'UserId': 'u1', 'NowPlayingItem': {'Id': 'm1'},
+                   'PlayState': {'IsPaused': False, 'PositionTicks': 10}}
+
+        def push(session):
+            listener._on_message(None, json.dumps({'MessageType': 'Sessions', 'Data': [session]}))
+
+        push(playing)
+        push(dict(playing, PlayState={'IsPaused': False, 'PositionTicks': 20}))
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(listener._sessions[0]['PlayState']['PositionTicks'], 20)
+
+        push(dict(playing, PlayState={'IsPaused': True, 'PositionTicks': 20}))
+        self.assertEqual(len(changes), 2)
+
+
+class FakeListener:
+    def __init__(self, sessions=None, connected=True):
+        self.sessions = sessions
+        self.connected = connected
+        self.states = {}
+
+    def is_alive(self):
+        return True
+
+    def stop(self):
+        pass
+
+    def get_state(self, rating_key, max_age=30):
+        return self.states.get(str(rating_key))
+
+
+class FakeMediaServer:
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.poll_count = 0
+
+    def get_active_sessions(self):
+        self.poll_count += 1
+        return self.sessions
+
+    def get_movie_by_id(self, movie_id):
+        return None
+
+
+class FakePlexServer:
+    def __init__(self):
+        self.session_calls = 0
+
+    def sessions(self):
+        self.session_calls += 1
+        return []
+
+
+class FakePlexService:
+    def __init__(self):
+        self.plex = FakePlexServer()
+
+
+def movie_session(user, item_id, paused=False):
+    return {'UserName': user, 'UserId': f"id-{user}",
+            'NowPlayingItem': {'Id': item_id, 'Type': 'Movie', 'Name': f"Movie {item_id}"},
+            'PlayState': {'IsPaused': paused, 'PositionTicks': 600_000_000}}
+
+
+class PlaybackMonitorEventTests(unittest.TestCase):
+    def setUp(self):
+        self.monitor = PlaybackMonitor(Flask(__name__), interval=1)
+        self.monitor.plex_available = False
+        self.monitor.emby_available = False
+        self.monitor.jellyfin_available = True
+        self.monitor.realtime_events = True
+        self.monitor.jellyfin_poster_users = ['alice']
+        self.monitor._wait_for_next_tick = lambda: setattr(self.monitor, 'running', False)
+
+    def run_once(self):
+        self.monitor.running = True
+        self.monitor.run()
+
+    def test_active_streams_come_from_pushed_snapshot(self):
+        service = FakeMediaServer([])
+        self.monitor.jellyfin_service = service
+        self.monitor._event_listeners['jellyfin'] = (
+            FakeListener([movie_session('alice', 'm1', paused=True)]), service
+        )
+
+        self.run_once()
+
+        self.assertEqual(service.poll_count, 0)
+        stream = self.monitor.active_streams['jellyfin_m1']
+        self.assertEqual(stream['status'], 'PAUSED')
+        self.assertEqual(stream['position'], 60)
+
+    def test_disconnected_listener_falls_back_to_polling(self):
+        service = FakeMediaServer([movie_session('alice', 'm2')])
+        self.monitor.jellyfin_service = service
+        self.monitor._event_listeners['jellyfin'] = (FakeListener(None, connected=False), service)
+
+        self.run_once()
+
+        self.assertEqual(service.poll_count, 1)
+        self.assertEqual(self.monitor.active_streams['jellyfin_m2']['status'], 'PLAYING')
+
+    def test_plex_sessions_only_refetched_after_notification(self):
+        plex_service = FakePlexService()
+        self.monitor.plex_service = plex_service
+        self.monitor._event_listeners['plex'] = (FakeListener(), plex_service)
+
+        self.monitor._get_plex_sessions()
+        self.monitor._get_plex_sessions()
+        self.assertEqual(plex_service.plex.session_calls, 1)
+
+        self.monitor._on_playback_event('plex')
+        self.monitor._get_plex_sessions()
+        self.assertEqual(plex_service.plex.session_calls, 2)
+
+    def test_playing_streams_keep_short_tick_under_push_events(self):
+        del self.monitor._wait_for_next_tick
+        service = FakeMediaServer([])
+        self.monitor.jellyfin_service = service
+        self.monitor._event_listeners['jellyfin'] = (FakeListener([]), service)
+        self.monitor.event_resync_interval = 300
+        timeouts = []
+        self.monitor._wake.wait = timeouts.append
+
+        self.monitor._wait_for_next_tick()
+        self.monitor.active_streams['jellyfin_m1'] = {'status': 'PLAYING'}
+        self.monitor._wait_for_next_tick()
+
+        self.assertEqual(timeouts, [300, 1])
+
+    def test_plex_sessions_refetched_when_pushed_state_is_missing(self):
+        plex_service = FakePlexService()
+        listener = FakeListener()
+        self.monitor.plex_service = plex_service
+        self.monitor._event_listeners['plex'] = (listener, plex_service)
+        self.monitor._last_plex_sessions = [type('Session', (), {'ratingKey': '7'})()]
+        self.monitor._last_plex_poll = time.time()
+
+        self.monitor._get_plex_sessions()
+        self.assertEqual(plex_service.plex.session_calls, 1)
+
+    def test_plex_listener_tracks_state_and_notifies_on_change(self):
+        changes = []
+        listener = PlexSessionListener(None, on_change=changes.append)
+
+        def alert(state, offset):
+            listener._on_alert({'type': 'playing', 'PlaySessionStateNotification': [
+                {'ratingKey': '42', 'state': state, 'viewOffset': offset}
+            ]})
+
+        alert('playing', 1000)
+        alert('playing', 11000)
+        alert('paused', 12000)
+
+        self.assertEqual(changes, ['plex', 'plex'])
+        self.assertEqual(listener.get_state('42'), {'state': 'paused', 'position': 12.0,
+                                                   'time': listener.get_state('42')['time']})
+
+
+if __name__ == '__main__':
+    unittest.main()
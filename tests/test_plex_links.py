@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from utils.enrichment_cache import EnrichmentCache
+from utils.plex_service import PlexService
+
+
+def fake_movie(rating_key='101', guids=None):
+    return SimpleNamespace(
+        ratingKey=rating_key,
+        guid=f'plex://movie/{rating_key}',
+        guids=guids if guids is not None else [],
+        title='Heat',
+        year=1995,
+        duration=170 * 60 * 1000,
+        summary='',
+        tagline='',
+        thumbUrl=None,
+        artUrl=None,
+        contentRating='R',
+        directors=[SimpleNamespace(tag='Michael Mann')],
+        writers=[],
+        roles=[SimpleNamespace(tag='Al Pacino')],
+        genres=[SimpleNamespace(tag='Crime')],
+    )
+
+
+class PlexBuildLinkTests(unittest.TestCase):
+    def setUp(self):
+        self.service = PlexService.__new__(PlexService)
+        self.service._metadata_cache = {}
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enrichment_cache = EnrichmentCache(temp_dir.name, legacy_file=f"{temp_dir.name}/legacy.json")
+        enrichment_patch = patch('utils.enrichment_cache.enrichment_cache', self.enrichment_cache)
+        enrichment_patch.start()
+        self.addCleanup(enrichment_patch.stop)
+
+    def test_basic_movie_data_makes_no_link_requests(self):
+        movie = fake_movie(guids=[SimpleNamespace(id='imdb://tt0113277'), SimpleNamespace(id='tmdb://949')])
+
+        with patch('utils.fetch_movie_links.fetch_movie_links') as fetch_links, \
+                patch('requests.get') as requests_get, \
+                patch.object(PlexService, '_get_guid_tmdb_id') as guid_lookup:
+            data = self.service._basic_movie_data(movie)
+
+        fetch_links.assert_not_called()
+        requests_get.assert_not_called()
+        guid_lookup.assert_not_called()
+        self.assertEqual(data['tmdb_id'], '949')
+        self.assertEqual(data['tmdb_url'], 'https://www.themoviedb.org/movie/949')
+        self.assertEqual(data['imdb_url'], 'https://www.imdb.com/title/tt0113277')
+        self.assertIsNone(data['trakt_url'])
+
+    def test_tmdb_id_read_from_fetched_metadata(self):
+        metadata = {'Guid': [{'id': 'tmdb://949'}]}
+
+        with patch.object(PlexService, '_get_guid_tmdb_id') as guid_lookup:
+            data = self.service._basic_movie_data(fake_movie(), metadata)
+
+        guid_lookup.assert_not_called()
+        self.assertEqual(data['tmdb_id'], '949')
+
+    def test_links_come_from_enrichment_cache(self):
+        self.enrichment_cache.set('949', {
+            'tmdb_url': 'https://www.themoviedb.org/movie/949',
+            'trakt_url': 'https://trakt.tv/movies/heat-1995',
+            'imdb_url': 'https://www.imdb.com/title/tt0113277',
+        })
+
+        data = self.service._basic_movie_data(fake_movie(guids=[SimpleNamespace(id='tmdb://949')]))
+
+        self.assertEqual(data['trakt_url'], 'https://trakt.tv/movies/heat-1995')
+        self.assertEqual(data['imdb_url'], 'https://www.imdb.com/title/tt0113277')
+
+    def test_cached_movie_gets_trakt_link_even_with_imdb_url(self):
+        self.enrichment_cache.set('949', {'trakt_url': 'https://trakt.tv/movies/heat-1995'})
+        self.service._movies_cache = [{
+            'id': '101', 'tmdb_id': '949', 'trakt_url': None,
+            'tmdb_url': 'https://www.themoviedb.org/movie/949',
+            'imdb_url': 'https://www.imdb.com/title/tt0113277',
+        }]
+
+        data = self.service.get_movie_by_id('101')
+
+        self.assertEqual(data['trakt_url'], 'https://trakt.tv/movies/heat-1995')
+
+
+class PlexUserPerspectiveTests(unittest.TestCase):
+    def setUp(self):
+        self.service = PlexService.__new__(PlexService)
+        self.service.username = 'bob'
+        self.service.PLEX_URL = 'http://plex:32400'
+        self.service._managed_user_server = None
+        self.service._user_token_server = None
+        self.service.plex = SimpleNamespace(myPlexAccount=lambda: SimpleNamespace(username='owner'))
+
+    def test_shared_user_counts_use_their_own_token(self):
+        users = {'plex_bob': {'plex_token': 'bob-token'}}
+        with patch('utils.auth.auth_manager.db.get_user', side_effect=users.get), \
+                patch('utils.plex_service.PlexServer', side_effect=lambda url, token: ('server', token)):
+            self.assertEqual(self.service._get_own_user_plex_instance(), ('server', 'bob-token'))
+
+    def test_no_admin_fallback_without_a_user_connection(self):
+        with patch('utils.auth.auth_manager.db.get_user', return_value=None):
+            self.assertIsNone(self.service._get_own_user_plex_instance())
+
+
+if __name__ == '__main__':
+    unittest.main()
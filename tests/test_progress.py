@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from utils.progress import ProgressReporter
+
+
+class ProgressReporterTests(unittest.TestCase):
+    def setUp(self):
+        self.socketio = MagicMock()
+        self.clock = 100.0
+        clock_patch = patch('utils.progress.time.monotonic', side_effect=lambda: self.clock)
+        clock_patch.start()
+        self.addCleanup(clock_patch.stop)
+
+    def test_per_item_updates_are_coalesced(self):
+        progress = ProgressReporter(self.socketio, room='alice', min_interval=0.25)
+
+        for i in range(1, 1001):
+            self.clock += 0.001
+            progress.update(i / 1000, current=i, total=1000, status='Building cache')
+
+        # The first update opens the stage; then roughly one per 0.25s of the 1s run
+        self.assertLessEqual(self.socketio.emit.call_count, 6)
+        self.assertTrue(all(call.kwargs['room'] == 'alice' for call in self.socketio.emit.call_args_list))
+
+    def test_payload_reports_rate_and_eta(self):
+        progress = ProgressReporter(self.socketio, min_interval=0)
+        progress.update(0.0, current=0, total=100, status='Building cache')
+        self.clock += 2
+        progress.update(0.5, current=50, total=100, status='Building cache')
+
+        event, payload = self.socketio.emit.call_args[0]
+        self.assertEqual(event, 'loading_progress')
+        self.assertEqual((payload['rate'], payload['eta']), (25.0, 2.0))
+        self.assertNotIn('room', self.socketio.emit.call_args.kwargs)
+
+    def test_stage_changes_and_finish_are_always_sent(self):
+        progress = ProgressReporter(self.socketio, room='bob', min_interval=60)
+        progress.update(0.1, current=0, total=10, status='Loading')
+        progress.update(0.2, current=1, total=10, status='Loading')
+        progress.update(0.5, current=0, total=10, status='Saving')
+        progress.finish(10)
+
+        events = [call[0][0] for call in self.socketio.emit.call_args_list]
+        self.assertEqual(events, ['loading_progress', 'loading_progress', 'loading_progress', 'loading_complete'])
+        self.assertEqual(self.socketio.emit.call_args_list[2][0][1]['progress'], 1.0)
+
+    def test_scale_and_custom_event(self):
+        progress = ProgressReporter(self.socketio, event='collections_cache_progress', room='sid',
+                                    complete_event=None, scale=100)
+        progress.update(0.5, current=5, total=10, status='Checking collections')
+        progress.complete()
+
+        self.socketio.emit.assert_called_once()
+        self.assertEqual(self.socketio.emit.call_args[0][1]['progress'], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
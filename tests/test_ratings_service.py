@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from utils import ratings_service as ratings_module
+from utils.rate_limit import TokenBucket
+from utils.ratings_service import RatingsService
+
+
+class RatingsServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.service = RatingsService(max_workers=4)
+        self.service._buckets = {}
+        self.addCleanup(lambda: self.service._executor and self.service._executor.shutdown(wait=True))
+
+    def test_cached_ratings_are_shared_across_users(self):
+        with patch.object(ratings_module, '_fetch_provider_rating', return_value=81) as fetch:
+            first = dict(self.service.iter_ratings('trakt', [1, 2], 'alice'))
+            second = dict(self.service.iter_ratings('trakt', [1, 2], 'bob'))
+
+        self.assertEqual(first, {1: 81, 2: 81})
+        self.assertEqual(second, first)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_misses_are_fetched_concurrently(self):
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def slow_fetch(provider, tmdb_id, user_id):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return int(tmdb_id)
+
+        with patch.object(ratings_module, '_fetch_provider_rating', side_effect=slow_fetch):
+            ratings = dict(self.service.iter_ratings('simkl', list(range(1, 9)), 'alice'))
+
+        self.assertEqual(ratings, {i: i for i in range(1, 9)})
+        self.assertGreater(peak, 1)
+
+    def test_duplicate_ids_share_one_fetch(self):
+        with patch.object(ratings_module, '_fetch_provider_rating', return_value=70) as fetch:
+            ratings = list(self.service.iter_ratings('trakt', [5, 5], 'alice'))
+
+        self.assertEqual(ratings, [(5, 70), (5, 70)])
+        fetch.assert_called_once()
+
+    def test_empty_ratings_expire_sooner(self):
+        with patch.object(ratings_module, '_fetch_provider_rating', return_value=0):
+            self.service.get_rating('trakt', 9, 'alice')
+
+        self.assertEqual(self.service.get_cached('trakt', 9), (True, 0))
+        with patch.object(ratings_module, 'EMPTY_RATING_TTL', -1):
+            self.assertEqual(self.service.get_cached('trakt', 9), (False, None))
+
+    def test_errors_yield_zero(self):
+        with patch.object(ratings_module, '_fetch_provider_rating', side_effect=RuntimeError('boom')):
+            self.assertEqual(self.service.get_rating('trakt', 3, 'alice'), 0)
+
+        self.assertEqual(self.service.get_cached('trakt', 3), (False, None))
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_bucket_limits_burst(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.assertFalse(bucket.acquire(timeout=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+from utils.secret_key import load_or_create_secret_key
+
+
+class SecretKeyTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'data', 'flask_secret_key')
+
+    def test_key_is_generated_once_and_reused(self):
+        key = load_or_create_secret_key(self.path)
+
+        self.assertEqual(len(key), 64)
+        self.assertEqual(load_or_create_secret_key(self.path), key)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['flask_secret_key'])
+
+    def test_existing_key_wins(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('from-another-worker\n')
+
+        self.assertEqual(load_or_create_secret_key(self.path), 'from-another-worker')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from utils.settings import manager
+
+
+class SettingsSnapshotTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        file_patch = patch.object(manager, 'SETTINGS_FILE', os.path.join(temp_dir.name, 'settings.json'))
+        file_patch.start()
+        self.addCleanup(file_patch.stop)
+        with patch.dict(os.environ, {}, clear=True):
+            self.settings = manager.Settings()
+
+    def test_snapshot_is_read_only_and_reused_until_a_change(self):
+        snapshot = self.settings.snapshot()
+
+        self.assertIs(self.settings.snapshot(), snapshot)
+        with self.assertRaises(TypeError):
+            snapshot.get('features')['load_movie_on_start'] = True
+
+    def test_update_publishes_a_new_version_and_keeps_old_snapshots_intact(self):
+        before = self.settings.snapshot()
+
+        self.settings.update('emby', {'url': 'http://emby:8096'})
+        after = self.settings.snapshot()
+
+        self.assertEqual(after.version, before.version + 1)
+        self.assertEqual(after.emby_url, 'http://emby:8096')
+        self.assertNotEqual(before.emby_url, 'http://emby:8096')
+        self.assertEqual(self.settings.get('emby')['url'], 'http://emby:8096')
+
+    def test_subscribers_are_notified_only_for_their_categories(self):
+        tmdb_listener = MagicMock()
+        any_listener = MagicMock()
+        self.settings.subscribe(tmdb_listener, categories=('tmdb',))
+        unsubscribe = self.settings.subscribe(any_listener)
+
+        self.settings.update('features', {'load_movie_on_start': True})
+        unsubscribe()
+        self.settings.update('tmdb', {'api_key': 'abc'})
+
+        tmdb_listener.assert_called_once()
+        snapshot, changed = tmdb_listener.call_args[0]
+        self.assertEqual(changed, frozenset({'tmdb'}))
+        self.assertEqual(snapshot.tmdb.get('api_key'), 'abc')
+        any_listener.assert_called_once()
+        self.assertTrue(any_listener.call_args[0][0].load_movie_on_start)
+
+    def test_failing_subscriber_does_not_block_others(self):
+        listener = MagicMock()
+        self.settings.subscribe(MagicMock(side_effect=RuntimeError('boom')))
+        self.settings.subscribe(listener)
+
+        self.settings.update('features', {'load_movie_on_start': True})
+
+        listener.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from utils.auth.session_store import SharedSessionStore
+from utils.shared_state import MemoryBackend, SQLiteBackend, create_backend
+
+
+class BackendContract:
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = temp_dir.name
+        self.backend = self.make_backend()
+
+    def test_strings_and_expiry(self):
+        self.backend.set('a', 1)
+        self.backend.set('b', 'x', ex=60)
+
+        self.assertEqual(self.backend.get('a'), '1')
+        self.assertEqual(self.backend.get('b'), 'x')
+        self.assertTrue(self.backend.expire('b', -1))
+        self.assertIsNone(self.backend.get('b'))
+        self.assertEqual(self.backend.delete('a', 'missing'), 1)
+        self.assertIsNone(self.backend.get('a'))
+
+    def test_sets(self):
+        self.assertEqual(self.backend.sadd('seen:s1', '1', 2), 2)
+        self.assertEqual(self.backend.sadd('seen:s1', '2', '3'), 1)
+
+        self.assertEqual(self.backend.smembers('seen:s1'), {'1', '2', '3'})
+        self.assertEqual(self.backend.smembers('seen:other'), set())
+        self.assertEqual(self.backend.keys('seen:*'), ['seen:s1'])
+
+    def test_hashes(self):
+        self.assertEqual(self.backend.hset('h', 'k1', 'v1'), 1)
+        self.assertEqual(self.backend.hset('h', 'k1', 'v2'), 0)
+        self.backend.hset('h', 'k2', 'v3')
+
+        self.assertEqual(self.backend.hget('h', 'k1'), 'v2')
+        self.assertEqual(self.backend.hgetall('h'), {'k1': 'v2', 'k2': 'v3'})
+        self.assertEqual(self.backend.hdel('h', 'k1', 'nope'), 1)
+        self.assertEqual(self.backend.hlen('h'), 1)
+
+
+class MemoryBackendTests(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return MemoryBackend()
+
+
+class SQLiteBackendTests(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return SQLiteBackend(os.path.join(self.dir, 'state.db'))
+
+    def test_state_is_visible_to_other_connections(self):
+        path = os.path.join(self.dir, 'state.db')
+        self.backend.sadd('seen:s1', '7')
+
+        self.assertEqual(SQLiteBackend(path).smembers('seen:s1'), {'7'})
+
+    def test_create_backend_from_url(self):
+        path = os.path.join(self.dir, 'url.db')
+
+        self.assertIsInstance(create_backend(f'sqlite://{path}'), SQLiteBackend)
+        self.assertIsInstance(create_backend('memory://'), MemoryBackend)
+
+
+class SharedSessionStoreTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.file_path = os.path.join(temp_dir.name, 'sessions.json')
+        self.db_path = os.path.join(temp_dir.name, 'state.db')
+
+    def test_workers_share_logins_and_logouts(self):
+        worker_a = SharedSessionStore(self.file_path, SQLiteBackend(self.db_path))
+        worker_b = SharedSessionStore(self.file_path, SQLiteBackend(self.db_path))
+
+        worker_a.add('tok', {'username': 'alice', 'expires': time.time() + 60})
+        self.assertEqual(worker_b.get('tok')['username'], 'alice')
+
+        worker_b.delete('tok')
+        self.assertIsNone(worker_a.get('tok'))
+
+    def test_imports_existing_file_and_drops_expired(self):
+        with open(self.file_path, 'w') as f:
+            json.dump({'sessions': {
+                'live': {'username': 'a', 'expires': time.time() + 60},
+                'old': {'username': 'b', 'expires': time.time() - 60},
+            }}, f)
+
+        store = SharedSessionStore(self.file_path, MemoryBackend())
+
+        self.assertTrue(store.loaded_from_disk)
+        self.assertEqual(store.purge_expired(force=True), 1)
+        self.assertIn('live', store)
+        self.assertTrue(store.extend('live', time.time() + 120))
+        self.assertEqual(store.delete_where(lambda token, s: s['username'] == 'a'), 1)
+        self.assertEqual(len(store), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
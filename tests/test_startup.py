@@ -0,0 +1,71 @@
+import threading
+import unittest
+
+from utils.startup import StartupOrchestrator, READY, FAILED, DISABLED
+
+
+class StartupOrchestratorTests(unittest.TestCase):
+    def setUp(self):
+        self.startup = StartupOrchestrator()
+        self.startup.begin()
+
+    def test_group_starts_services_concurrently(self):
+        # Each starter waits for the others, so a serial start would break the barrier
+        barrier = threading.Barrier(3, timeout=2)
+
+        def starter(value):
+            def start():
+                barrier.wait()
+                return value
+            return start
+
+        results = self.startup.start_group('media', {
+            'plex': starter('plex'), 'jellyfin': starter('jellyfin'), 'emby': starter('emby'),
+        })
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual(results, {'plex': 'plex', 'jellyfin': 'jellyfin', 'emby': 'emby'})
+        self.assertEqual(self.startup.status()['phases'][0]['name'], 'media')
+
+    def test_failures_are_recorded_per_service(self):
+        def broken():
+            raise ConnectionError('offline')
+
+        results = self.startup.start_group('integrations', {
+            'seerr': lambda: True, 'ombi': lambda: False, 'plex': broken,
+        })
+        self.startup.disable('trakt')
+        services = self.startup.status()['services']
+
+        self.assertEqual(results, {'seerr': True, 'ombi': False, 'plex': None})
+        self.assertEqual(services['seerr']['state'], READY)
+        self.assertEqual(services['ombi']['state'], FAILED)
+        self.assertEqual((services['plex']['state'], services['plex']['error']), (FAILED, 'offline'))
+        self.assertEqual(services['trakt']['state'], DISABLED)
+
+    def test_readiness_only_gates_the_first_boot(self):
+        self.assertFalse(self.startup.wait_ready(0))
+        self.startup.finish()
+        self.assertTrue(self.startup.status()['ready'])
+
+        self.startup.begin()
+        self.assertTrue(self.startup.is_ready())
+        self.assertTrue(self.startup.status()['initializing'])
+
+    def test_failed_round_still_sets_readiness(self):
+        self.startup.finish(error='settings unreadable')
+
+        status = self.startup.status()
+        self.assertEqual((status['ready'], status['initializing'], status['error']),
+                         (True, False, 'settings unreadable'))
+
+    def test_background_loop_starts_once(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        self.assertTrue(self.startup.start_background('loop', lambda: release.wait(5)))
+        self.assertFalse(self.startup.start_background('loop', lambda: release.wait(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from utils.tmdb_service import merge_crew, project_credits
+
+
+RAW_CREDITS = {
+    'cast': [
+        {'id': 2, 'name': 'Robert De Niro', 'character': 'Neil', 'order': 1, 'profile_path': '/b.jpg',
+         'credit_id': 'x', 'gender': 2, 'popularity': 10.0},
+        {'id': 1, 'name': 'Al Pacino', 'character': 'Vincent', 'order': 0, 'profile_path': '/a.jpg'},
+        {'id': 3, 'name': 'Val Kilmer', 'character': 'Chris', 'order': 2},
+    ],
+    'crew': [
+        {'id': 10, 'name': 'Michael Mann', 'department': 'Directing', 'job': 'Director'},
+        {'id': 10, 'name': 'Michael Mann', 'department': 'Writing', 'job': 'Screenplay'},
+        {'id': 10, 'name': 'Michael Mann', 'department': 'Writing', 'job': 'Writer'},
+        {'id': 11, 'name': 'Assistant', 'department': 'Directing', 'job': 'First Assistant Director'},
+        {'id': 12, 'name': 'Composer', 'department': 'Sound', 'job': 'Original Music Composer'},
+    ],
+}
+
+
+class ProjectCreditsTests(unittest.TestCase):
+    def test_keeps_top_cast_and_merged_directors_and_writers(self):
+        credits = project_credits(RAW_CREDITS, cast_limit=2)
+
+        self.assertEqual(credits['cast'], [
+            {'id': 1, 'name': 'Al Pacino', 'character': 'Vincent', 'profile_path': '/a.jpg'},
+            {'id': 2, 'name': 'Robert De Niro', 'character': 'Neil', 'profile_path': '/b.jpg'},
+        ])
+        self.assertEqual(credits['cast_total'], 3)
+        self.assertEqual([(p['id'], p['department'], p['jobs']) for p in credits['crew']], [
+            (10, 'Directing', ['Director']),
+            (11, 'Directing', ['First Assistant Director']),
+            (10, 'Writing', ['Screenplay', 'Writer']),
+        ])
+
+    def test_projection_is_idempotent(self):
+        credits = project_credits(RAW_CREDITS)
+
+        self.assertIs(project_credits(credits), credits)
+        self.assertIsNone(project_credits(None))
+
+    def test_primary_jobs_sort_first(self):
+        writers = merge_crew([
+            {'id': 5, 'name': 'Aaron', 'department': 'Writing', 'job': 'Story'},
+            {'id': 6, 'name': 'Zed', 'department': 'Writing', 'job': 'Screenplay'},
+        ], 'Writing')
+
+        self.assertEqual([w['name'] for w in writers], ['Zed', 'Aaron'])
+        self.assertEqual([w['is_primary'] for w in writers], [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from utils.tmdb_service import TMDBService, MOVIE_APPENDS, PERSON_APPENDS
+
+
+MOVIE = {
+    'id': 949,
+    'title': 'Heat',
+    'imdb_id': 'tt0113277',
+    'credits': {'cast': [{'id': 1, 'name': 'Al Pacino'}], 'crew': [{'id': 10, 'job': 'Director'}]},
+    'videos': {'results': [{'site': 'YouTube', 'key': 'abc', 'type': 'Trailer'}]},
+    'images': {'logos': []},
+    'external_ids': {'imdb_id': 'tt0113277'},
+}
+
+PERSON = {
+    'id': 1158,
+    'name': 'Al Pacino',
+    'external_ids': {'imdb_id': 'nm0000199'},
+    'combined_credits': {
+        'cast': [{'id': 949, 'media_type': 'movie', 'title': 'Heat'},
+                 {'id': 5, 'media_type': 'tv', 'name': 'Show'}],
+        'crew': [],
+    },
+}
+
+
+class TMDBRecordTests(unittest.TestCase):
+    def setUp(self):
+        self.service = TMDBService()
+
+    def test_movie_accessors_share_one_request(self):
+        with patch.object(self.service, '_make_request', return_value=MOVIE) as request:
+            details = self.service.get_movie_details(949)
+            credits = self.service.get_movie_credits('949')
+            cast = self.service.get_movie_cast(949)
+            videos = self.service.get_movie_videos(949)
+
+        request.assert_called_once_with('movie/949', {'append_to_response': MOVIE_APPENDS})
+        self.assertIs(details, MOVIE)
+        self.assertEqual(credits['id'], 949)
+        self.assertEqual(cast, {'cast': MOVIE['credits']['cast'], 'crew': MOVIE['credits']['crew']})
+        self.assertEqual(videos[0]['key'], 'abc')
+
+    def test_person_accessors_share_one_request(self):
+        with patch.object(self.service, '_make_request', return_value=PERSON) as request:
+            with_ids = self.service.get_person_details_with_external_ids(1158)
+            with_credits = self.service.get_person_details_with_credits(1158)
+            movies = self.service.get_person_movies(1158)
+
+        request.assert_called_once_with('person/1158', {'append_to_response': PERSON_APPENDS})
+        self.assertEqual(with_ids['imdb_id'], 'nm0000199')
+        self.assertEqual(with_credits['credits'], PERSON['combined_credits'])
+        self.assertEqual([m['id'] for m in movies], [949])
+
+    def test_failures_are_not_cached(self):
+        with patch.object(self.service, '_make_request', side_effect=[None, MOVIE]) as request:
+            self.assertIsNone(self.service.get_movie_details(949))
+            self.assertIs(self.service.get_movie_details(949), MOVIE)
+
+        self.assertEqual(request.call_count, 2)
+
+    def test_concurrent_lookups_single_flight(self):
+        release = threading.Event()
+
+        def slow_request(endpoint, params=None):
+            release.wait(timeout=5)
+            return MOVIE
+
+        results = []
+        with patch.object(self.service, '_make_request', side_effect=slow_request) as request:
+            threads = [threading.Thread(target=lambda: results.append(self.service.get_movie_record(949)))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            release.set()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        request.assert_called_once()
+        self.assertEqual(results, [MOVIE] * 4)
+
+    def test_clear_cache_drops_records(self):
+        with patch.object(self.service, '_make_request', return_value=MOVIE) as request:
+            self.service.get_movie_details(949)
+            self.service.clear_cache()
+            self.service.get_movie_details(949)
+
+        self.assertEqual(request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from utils import trakt_id_map as trakt_id_map_module
+from utils.trakt_id_map import TraktIdMap
+
+
+HEAT_IDS = {'trakt': 1104, 'slug': 'heat-1995', 'imdb': 'tt0113277', 'tmdb': 949}
+
+
+class TraktIdMapTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = Path(self.temp_dir.name) / 'trakt_id_map.json'
+        self.id_map = TraktIdMap(str(self.path))
+        # Persist only through explicit flush() so no writer thread outlives the temp dir
+        schedule = patch.object(self.id_map._writer, 'schedule')
+        schedule.start()
+        self.addCleanup(schedule.stop)
+
+    def test_watched_payload_ids_need_no_search(self):
+        self.id_map.record_many([HEAT_IDS, {'trakt': None, 'tmdb': 1}])
+
+        with patch.object(TraktIdMap, '_search') as search:
+            entry = self.id_map.resolve(949)
+            links = self.id_map.links('949')
+
+        search.assert_not_called()
+        self.assertEqual(entry['trakt'], 1104)
+        self.assertEqual(links, ('https://trakt.tv/movies/heat-1995', 'https://www.imdb.com/title/tt0113277'))
+
+    def test_search_result_is_persisted(self):
+        with patch.object(TraktIdMap, '_search', return_value=HEAT_IDS) as search:
+            self.id_map.resolve_many([949, '949', 949])
+        self.id_map.flush()
+
+        self.assertEqual(search.call_count, 1)
+        reloaded = TraktIdMap(str(self.path))
+        self.assertEqual(reloaded.lookup(949), (True, {'trakt': 1104, 'slug': 'heat-1995', 'imdb': 'tt0113277'}))
+
+    def test_misses_are_cached_until_ttl(self):
+        with patch.object(TraktIdMap, '_search', return_value=None) as search:
+            self.assertIsNone(self.id_map.resolve(5))
+            self.assertIsNone(self.id_map.resolve(5))
+            self.assertEqual(search.call_count, 1)
+
+            with patch.object(trakt_id_map_module, 'NEGATIVE_TTL', -1):
+                self.id_map.resolve(5)
+            self.assertEqual(search.call_count, 2)
+
+    def test_transient_errors_are_not_cached(self):
+        with patch.object(TraktIdMap, '_search', side_effect=requests.ConnectionError()):
+            self.assertIsNone(self.id_map.resolve(949))
+
+        self.assertEqual(self.id_map.lookup(949), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from utils.watch_party import WatchPartyEngine
+
+
+def movie(movie_id, watched=False):
+    return {'id': movie_id, 'title': f'Movie {movie_id}', 'watched': watched,
+            'plex_guid': f'plex://movie/hex{movie_id}'}
+
+
+class WatchPartyEngineTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = temp_dir.name
+        self.engine = WatchPartyEngine()
+
+    def write(self, name, movies, mtime=1_000_000_000):
+        path = os.path.join(self.dir, f'{name}.json')
+        with open(path, 'w') as f:
+            json.dump(movies, f)
+        os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def test_library_pool_intersects_any_number_of_participants(self):
+        paths = [
+            self.write('a', [movie(1), movie(2), movie(3, watched=True), movie(4, watched=True)]),
+            self.write('b', [movie(1), movie(2, watched=True), movie(3, watched=True), movie(4, watched=True)]),
+            self.write('c', [movie(1), movie(3, watched=True), movie(4, watched=True)]),
+        ]
+
+        def ids(status):
+            return [m['id'] for m in self.engine.library_pool(paths, status)]
+
+        self.assertEqual(ids('unwatched'), [1])
+        self.assertEqual(ids('watched'), [3, 4])
+        self.assertEqual(ids('all'), [1, 3, 4])
+
+    def test_library_pool_is_cached_until_a_file_changes(self):
+        a = self.write('a', [movie(1), movie(2)])
+        b = self.write('b', [movie(1), movie(2)])
+
+        with patch('builtins.open', wraps=open) as opened:
+            first = self.engine.library_pool([a, b])
+            self.assertIs(self.engine.library_pool([a, b]), first)
+            self.assertEqual(opened.call_count, 2)
+
+        self.write('b', [movie(1), movie(2, watched=True)], mtime=2_000_000_000)
+        self.assertEqual([m['id'] for m in self.engine.library_pool([a, b])], [1])
+
+    def test_missing_participant_library_yields_empty_pool(self):
+        a = self.write('a', [movie(1)])
+
+        self.assertEqual(self.engine.library_pool([a, os.path.join(self.dir, 'missing.json')]), [])
+
+    def test_watchlist_pool_intersects_and_reuses_watchlists(self):
+        library = self.write('lib', [movie(1), movie(2), movie(3)])
+        me = MagicMock(return_value={'plex://movie/hex1', 'plex://movie/hex2', 'plex://movie/hex9'})
+        friend = MagicMock(return_value={'plex://movie/hex1', 'plex://movie/hex2'})
+        other = MagicMock(return_value={'plex://movie/hex2', 'plex://movie/hex3'})
+        fetchers = {'me': me, 'friend': friend, 'other': other}
+
+        pool = self.engine.watchlist_pool(fetchers, library)
+        self.engine.watchlist_pool(fetchers, library)
+
+        self.assertEqual([m['id'] for m in pool], [2])
+        for fetch in fetchers.values():
+            fetch.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
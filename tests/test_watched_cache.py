@@ -0,0 +1,53 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from utils.watched_cache import WatchedSetCache, are_ids_in
+
+
+class WatchedSetCacheTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'watched.json')
+        self.cache = WatchedSetCache()
+
+    def write(self, ids, mtime):
+        with open(self.path, 'w') as f:
+            json.dump(ids, f)
+        os.utime(self.path, ns=(mtime, mtime))
+
+    def test_file_is_read_once_until_it_changes(self):
+        self.write([1, 2], mtime=1_000_000_000)
+
+        with patch('builtins.open', wraps=open) as opened:
+            self.assertEqual(self.cache.get_set(self.path), frozenset({1, 2}))
+            self.assertEqual(self.cache.get_list(self.path), [1, 2])
+            self.assertEqual(opened.call_count, 1)
+
+        self.write([1, 2, 3], mtime=2_000_000_000)
+        self.assertEqual(self.cache.get_set(self.path), frozenset({1, 2, 3}))
+
+    def test_put_publishes_without_reading(self):
+        self.write([7], mtime=1_000_000_000)
+        self.cache.put(self.path, [7])
+
+        with patch('builtins.open') as opened:
+            self.assertEqual(self.cache.get_set(self.path), frozenset({7}))
+        opened.assert_not_called()
+
+    def test_missing_or_invalid_file_is_empty(self):
+        self.assertEqual(self.cache.get_list(self.path), [])
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        self.assertEqual(self.cache.get_set(self.path), frozenset())
+
+    def test_bulk_lookup_normalizes_ids(self):
+        self.assertEqual(are_ids_in(frozenset({1, 2}), ['1', 2, 3, 'x']),
+                         {'1': True, 2: True, 3: False, 'x': False})
+
+
+if __name__ == '__main__':
+    unittest.main()
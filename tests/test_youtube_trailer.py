@@ -0,0 +1,82 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import requests
+
+from utils import youtube_trailer
+from utils.tmdb_service import tmdb_service
+from utils.youtube_trailer import TrailerResolver, pick_tmdb_trailer
+
+
+VIDEOS = [
+    {'site': 'YouTube', 'key': 'teaser', 'type': 'Teaser', 'official': True, 'iso_639_1': 'en'},
+    {'site': 'YouTube', 'key': 'fan-cut', 'type': 'Trailer', 'official': False, 'iso_639_1': 'en'},
+    {'site': 'Vimeo', 'key': 'vimeo', 'type': 'Trailer', 'official': True, 'iso_639_1': 'en'},
+    {'site': 'YouTube', 'key': 'german', 'type': 'Trailer', 'official': True, 'iso_639_1': 'de'},
+    {'site': 'YouTube', 'key': 'official', 'type': 'Trailer', 'official': True, 'iso_639_1': 'en'},
+]
+
+
+class TrailerResolverTests(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / 'trailer_cache.json'
+        self.resolver = TrailerResolver(str(self.path))
+        schedule = patch.object(self.resolver._writer, 'schedule')
+        schedule.start()
+        self.addCleanup(schedule.stop)
+
+    def test_prefers_official_english_youtube_trailer(self):
+        self.assertEqual(pick_tmdb_trailer(VIDEOS), 'https://www.youtube.com/embed/official')
+        self.assertIsNone(pick_tmdb_trailer([{'site': 'YouTube', 'key': 'x', 'type': 'Clip'}]))
+
+    def test_tmdb_videos_skip_youtube_and_are_cached(self):
+        with patch.object(tmdb_service, 'get_movie_videos', return_value=VIDEOS) as videos, \
+                patch.object(youtube_trailer, '_scrape_youtube_trailer') as scrape:
+            first = self.resolver.resolve(949, 'Heat', 1995)
+            second = self.resolver.resolve('949', 'Heat', 1995)
+
+        self.assertEqual(first, 'https://www.youtube.com/embed/official')
+        self.assertEqual(second, first)
+        videos.assert_called_once()
+        scrape.assert_not_called()
+
+        self.resolver.flush()
+        self.assertEqual(TrailerResolver(str(self.path))._cached('949'), (True, first))
+
+    def test_youtube_fallback_and_negative_cache(self):
+        with patch.object(tmdb_service, 'get_movie_videos', return_value=[]), \
+                patch.object(youtube_trailer, '_scrape_youtube_trailer', return_value=None) as scrape:
+            self.assertIsNone(self.resolver.resolve(5, 'Obscure', 1970))
+            self.assertIsNone(self.resolver.resolve(5, 'Obscure', 1970))
+
+        scrape.assert_called_once_with('Obscure', 1970)
+        self.assertEqual(self.resolver.stats['not_found'], 1)
+        self.assertEqual(self.resolver.stats['cache_hits'], 1)
+
+    def test_request_errors_are_not_cached(self):
+        with patch.object(tmdb_service, 'get_movie_videos', return_value=None), \
+                patch.object(youtube_trailer, '_scrape_youtube_trailer', side_effect=requests.Timeout()):
+            self.assertIsNone(self.resolver.resolve(6, 'Slow', 2001))
+
+        self.assertEqual(self.resolver._cached('6'), (False, None))
+        self.assertEqual(self.resolver.stats['errors'], 1)
+
+    def test_tmdb_outage_is_not_cached_as_missing_trailer(self):
+        with patch.object(tmdb_service, 'get_movie_videos', return_value=None), \
+                patch.object(youtube_trailer, '_scrape_youtube_trailer', return_value=None):
+            self.assertIsNone(self.resolver.resolve(7, 'Heat', 1995))
+
+        self.assertEqual(self.resolver._cached('7'), (False, None))
+        self.assertEqual(self.resolver.stats['not_found'], 0)
+
+        with patch.object(tmdb_service, 'get_movie_videos', side_effect=ValueError('bad json')):
+            self.assertIsNone(self.resolver.resolve(8, 'Ronin', 1998))
+        self.assertEqual(self.resolver._cached('8'), (False, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
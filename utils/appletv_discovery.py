@@ -5,6 +5,7 @@ import os
 import json
 import pexpect
 from flask import session
+from utils.json_storage import write_json
 
 logger = logging.getLogger(__name__)
 
@@ -103,8 +104,7 @@ def fix_config_format():
         # Save the fixed configuration
         config["devices"] = fixed_devices
 
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        write_json(config_path, config, indent=2)
 
         logger.info("Fixed Apple TV configuration format")
 
@@ -154,8 +154,7 @@ def clear_pairing(device_id):
                     if 'credentials' in device['protocols']['companion']:
                         del device['protocols']['companion']['credentials']
 
-            with open(PERSISTENT_PATH, 'w') as f:
-                json.dump(config, f)
+            write_json(PERSISTENT_PATH, config)
             logger.info("Pairing cleared successfully")
         return True
     except Exception as e:
@@ -176,8 +175,7 @@ def ensure_config_path():
 
         # Create new config if it doesn't exist
         if not os.path.exists(PERSISTENT_PATH):
-            with open(PERSISTENT_PATH, 'w') as f:
-                json.dump(initial_config, f, indent=2)
+            write_json(PERSISTENT_PATH, initial_config, indent=2)
             logger.info("Created initial config file")
         else:
             # Read existing config and ensure it has correct structure
@@ -192,14 +190,12 @@ def ensure_config_path():
                         "devices": existing_config.get("devices", [])
                     })
 
-                    with open(PERSISTENT_PATH, 'w') as f:
-                        json.dump(existing_config, f, indent=2)
+                    write_json(PERSISTENT_PATH, existing_config, indent=2)
                     logger.info("Updated config file structure")
 
             except json.JSONDecodeError:
                 # If config is invalid, create new one
-                with open(PERSISTENT_PATH, 'w') as f:
-                    json.dump(initial_config, f, indent=2)
+                write_json(PERSISTENT_PATH, initial_config, indent=2)
                 logger.info("Reset invalid config file")
 
         # Handle the symlink
@@ -259,8 +255,7 @@ def save_credentials(device_id, credentials):
             config["devices"].append(new_device)
 
         # Save updated config
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        write_json(config_path, config, indent=2)
 
         logger.info(f"Saved credentials with config: {json.dumps(config, indent=2)}")
 
@@ -1,6 +1,5 @@
 import os
 import json
-import hashlib
 import secrets
 import time
 from datetime import datetime, timedelta
@@ -8,6 +7,9 @@ import logging
 import os
 from utils.settings import settings
 from utils.settings.manager import SETTINGS_FILE
+from utils.json_storage import write_json
+from .session_store import SessionStore
+from .password_hasher import password_hasher, PasswordHasherBusy, PBKDF2_ITERATIONS
 
 logger = logging.getLogger(__name__)
 
@@ -24,19 +26,20 @@ class AuthDB:
         logger.info(f"Using auth database path: {self.db_path}")
         self.users = {}
         self.managed_users = {}
-        self.sessions = {}
+        self.sessions = SessionStore.for_path(os.path.join(settings_dir, 'sessions.json'))
         self.last_load_time = 0
+        self.generation = 0  # bumped whenever cached principals may be stale
         self._failed_attempts = {}  # {username: {'count': N, 'locked_until': timestamp}}
         self.load_db()
 
     def load_db(self):
         """Load the auth database from disk if it has changed."""
         if not os.path.exists(self.db_path):
-            if self.users or self.managed_users or self.sessions:
+            if self.users or self.managed_users:
                  logger.warning("Auth database file disappeared. Resetting state.")
                  self.users = {}
                  self.managed_users = {}
-                 self.sessions = {}
+                 self.sessions.clear()
                  self.last_load_time = 0
             # else:
             return
@@ -49,36 +52,38 @@ class AuthDB:
                     data = json.load(f)
                     self.users = data.get('users', {})
                     self.managed_users = data.get('managed_users', {})
-                    self.sessions = data.get('sessions', {})
-                    self._clean_expired_sessions()
                     self.last_load_time = current_mtime
+                    self.generation += 1
                     logger.info(f"Loaded auth database with {len(self.users)} users and {len(self.managed_users)} managed users")
+                if 'sessions' in data:
+                    # Sessions used to live in auth.json; move them to the session store once
+                    if not self.sessions.loaded_from_disk:
+                        self.sessions.import_sessions(data['sessions'])
+                    # Persist the store before auth.json drops its copy so a crash loses nothing
+                    self.sessions.flush()
+                    self.save_db()
 
         except FileNotFoundError:
              logger.warning("Auth database file not found during load check. Resetting state.")
              self.users = {}
              self.managed_users = {}
-             self.sessions = {}
+             self.sessions.clear()
              self.last_load_time = 0
         except Exception as e:
             logger.error(f"Error loading auth database: {e}")
             self.users = {}
             self.managed_users = {}
-            self.sessions = {}
             self.last_load_time = 0
 
     def save_db(self):
-        """Save the auth database to disk"""
+        """Save user records to disk (sessions are persisted separately by the session store)"""
         try:
-            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-            with open(self.db_path, 'w') as f:
-                json.dump({
-                    'users': self.users,
-                    'managed_users': self.managed_users,
-                    'sessions': self.sessions
-                }, f, indent=2)
+            write_json(self.db_path, {
+                'users': self.users,
+                'managed_users': self.managed_users
+            }, fsync=True, indent=2)
+            self.generation += 1
             try:
-                 time.sleep(0.1)
                  self.last_load_time = os.path.getmtime(self.db_path)
             except OSError:
                  self.last_load_time = time.time()
@@ -86,41 +91,20 @@ class AuthDB:
         except Exception as e:
             logger.error(f"Error saving auth database: {e}")
 
-    _PBKDF2_ITERATIONS = 260000
+    _PBKDF2_ITERATIONS = PBKDF2_ITERATIONS
+    _BUSY_MESSAGE = "Too many login attempts in progress. Please try again shortly."
 
     def _hash_password(self, password):
-        """Hash a password using PBKDF2-HMAC-SHA256."""
-        salt = secrets.token_hex(16)
-        pw_hash = hashlib.pbkdf2_hmac(
-            'sha256', password.encode(), salt.encode(), self._PBKDF2_ITERATIONS
-        ).hex()
-        return {
-            'hash': pw_hash,
-            'salt': salt,
-            'algo': 'pbkdf2',
-            'iterations': self._PBKDF2_ITERATIONS
-        }
+        """Hash a password using PBKDF2-HMAC-SHA256 (off the request loop)."""
+        return password_hasher.hash(password, self._PBKDF2_ITERATIONS)
 
     def _verify_password(self, password, pw_data):
         """Verify a password against stored hash data.
 
         Supports both legacy SHA-256 (no 'algo' key) and PBKDF2.
-        Returns True if the password matches.
+        Returns True if the password matches; raises PasswordHasherBusy when saturated.
         """
-        algo = pw_data.get('algo')
-        salt = pw_data['salt']
-        stored_hash = pw_data['hash']
-
-        if algo == 'pbkdf2':
-            iterations = pw_data.get('iterations', self._PBKDF2_ITERATIONS)
-            computed = hashlib.pbkdf2_hmac(
-                'sha256', password.encode(), salt.encode(), iterations
-            ).hex()
-        else:
-            # Legacy single-round SHA-256
-            computed = hashlib.sha256((password + salt).encode()).hexdigest()
-
-        return computed == stored_hash
+        return password_hasher.verify(password, pw_data)
 
     def _check_lockout(self, username):
         """Return (is_locked, seconds_remaining) for a username."""
@@ -147,18 +131,6 @@ class AuthDB:
         """Clear failed-attempt state after a successful login."""
         self._failed_attempts.pop(username, None)
 
-    def _clean_expired_sessions(self):
-        """Remove expired sessions"""
-        now = time.time()
-        expired = [token for token, session in self.sessions.items() 
-                  if session.get('expires', 0) < now]
-        
-        for token in expired:
-            del self.sessions[token]
-        
-        if expired:
-            logger.info(f"Cleaned {len(expired)} expired sessions")
-            self.save_db()
     
     def add_user(self, username, password, is_admin=False, service_type='local', **kwargs):
         """
@@ -300,15 +272,12 @@ class AuthDB:
 
     def invalidate_user_sessions(self, username, except_token=None):
         """Invalidate all sessions for a user, optionally preserving one (the current session)."""
-        before = len(self.sessions)
-        self.sessions = {
-            token: session for token, session in self.sessions.items()
-            if session.get('username') != username or token == except_token
-        }
-        invalidated = before - len(self.sessions)
+        invalidated = self.sessions.delete_where(
+            lambda token, session: session.get('username') == username and token != except_token
+        )
+        self.generation += 1
         if invalidated:
             logger.info(f"Invalidated {invalidated} session(s) for user '{username}' after password change")
-        self.save_db()
 
     def update_password(self, username, new_password):
         """Update a user's password"""
@@ -332,8 +301,7 @@ class AuthDB:
         
         del self.users[username]
         
-        self.sessions = {token: session for token, session in self.sessions.items()
-                        if session.get('username') != username}
+        self.sessions.delete_where(lambda token, session: session.get('username') == username)
         
         self.save_db()
         logger.info(f"Deleted user: {username}")
@@ -352,7 +320,12 @@ class AuthDB:
         user = self.users[username]
         pw_data = user['password']
 
-        if not self._verify_password(password, pw_data):
+        try:
+            password_ok = self._verify_password(password, pw_data)
+        except PasswordHasherBusy:
+            return False, self._BUSY_MESSAGE
+
+        if not password_ok:
             self._record_failed_attempt(username)
             return False, "Invalid username or password"
 
@@ -426,8 +399,9 @@ class AuthDB:
 
         del self.managed_users[username]
 
-        self.sessions = {token: session for token, session in self.sessions.items()
-                        if session.get('username') != username or session.get('user_type') != 'plex_managed'}
+        self.sessions.delete_where(
+            lambda token, session: session.get('username') == username and session.get('user_type') == 'plex_managed'
+        )
 
         self.save_db()
         logger.info(f"Deleted managed user: {username}")
@@ -451,7 +425,12 @@ class AuthDB:
 
         password_data = user['password']
 
-        if not self._verify_password(password, password_data):
+        try:
+            password_ok = self._verify_password(password, password_data)
+        except PasswordHasherBusy:
+            return False, self._BUSY_MESSAGE, None
+
+        if not password_ok:
             self._record_failed_attempt(username)
             logger.warning(f"Failed password authentication attempt for managed user: {username}")
             return False, "Invalid username or password", None
@@ -549,7 +528,7 @@ class AuthDB:
         
         expires = time.time() + expires_in
         
-        self.sessions[token] = {
+        self.sessions.add(token, {
             'username': username,
             'created_at': time.time(),
             'expires': expires,
@@ -557,19 +536,16 @@ class AuthDB:
             'is_admin': is_admin,
             'service_type': service_type,
             'plex_user_id': plex_user_id if user_type == 'plex_managed' else None
-        }
+        })
 
-        self.save_db()
         return token
     
     def verify_session(self, token):
         """Verify if a session is valid"""
-        self._clean_expired_sessions()
-
-        if token not in self.sessions:
+        session = self.sessions.get(token)
+        if session is None:
             return None
 
-        session = self.sessions[token]
         username = session['username']
         user_type = session.get('user_type', 'local')
 
@@ -598,8 +574,8 @@ class AuthDB:
 
 
         if not user_exists:
-            del self.sessions[token]
-            self.save_db()
+            self.sessions.delete(token)
+            self.generation += 1
             return None
 
         session_info = {
@@ -634,7 +610,7 @@ class AuthDB:
 
     def extend_session(self, token):
         """Extend an existing session using configured lifetime"""
-        if token not in self.sessions:
+        if self.sessions.get(token) is None:
             return False
         
         try:
@@ -643,17 +619,12 @@ class AuthDB:
             expires_in = 86400
             logger.warning(f"Invalid session_lifetime setting found, defaulting to {expires_in} seconds.")
         
-        self.sessions[token]['expires'] = time.time() + expires_in
-        self.save_db()
-        return True
+        return self.sessions.extend(token, time.time() + expires_in)
     
     def delete_session(self, token):
         """Delete a session"""
-        if token in self.sessions:
-            del self.sessions[token]
-            self.save_db()
-            return True
-        return False
+        self.generation += 1
+        return self.sessions.delete(token)
     
     def get_users(self):
         """Get a list of all regular users (without password data)"""
@@ -1,7 +1,7 @@
 import os
 import logging
 import traceback
-from flask import request, session, redirect, url_for
+from flask import request, session, redirect, url_for, g, has_request_context
 from functools import wraps
 import requests
 import uuid
@@ -11,6 +11,7 @@ import json
 from pathlib import Path
 from datetime import datetime, timedelta
 import base64
+import threading
 
 from webauthn import (
     generate_registration_options,
@@ -38,6 +39,7 @@ from webauthn.helpers.cose import COSEAlgorithmIdentifier
 from webauthn.helpers.exceptions import WebAuthnException
 
 from .db import AuthDB
+from utils.json_storage import write_json
 from utils.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -45,9 +47,14 @@ logger = logging.getLogger(__name__)
 class AuthManager:
     """Manager for authentication operations"""
 
+    # How long a verified token -> principal mapping is reused without touching AuthDB
+    PRINCIPAL_CACHE_TTL = 5
+
     def __init__(self):
         self.db = AuthDB()
         self._auth_enabled = None
+        self._principal_cache = {}  # {token: (cached_at, db_generation, user_data)}
+        self._principal_lock = threading.Lock()
         self._plex_pins = {}
         self._pins_file = Path('/tmp/movie_roulette_pins.json')
         self._load_pins_from_disk()
@@ -98,16 +105,68 @@ class AuthManager:
 
     def logout(self, token):
         """Logout a user"""
+        self.invalidate_principal_cache(token=token)
         return self.db.delete_session(token)
 
-    def verify_auth(self, token):
-        """Verify authentication token"""
-        self.db.load_db()
+    def invalidate_principal_cache(self, token=None, username=None):
+        """Drop cached principals for a token, a user, or everything"""
+        with self._principal_lock:
+            if token is None and username is None:
+                self._principal_cache.clear()
+            else:
+                self._principal_cache = {
+                    t: entry for t, entry in self._principal_cache.items()
+                    if t != token and entry[2].get('username') != username
+                }
+        if has_request_context():
+            g.pop('auth_principal', None)
+
+    def _get_cached_principal(self, token):
+        now = time.time()
+        with self._principal_lock:
+            entry = self._principal_cache.get(token)
+            if not entry:
+                return None
+            cached_at, generation, user_data = entry
+            if (now - cached_at > self.PRINCIPAL_CACHE_TTL or generation != self.db.generation
+                    or user_data.get('expires', 0) < now):
+                del self._principal_cache[token]
+                return None
+            return user_data
+
+    def _cache_principal(self, token, user_data):
+        now = time.time()
+        with self._principal_lock:
+            if len(self._principal_cache) > 1000:
+                self._principal_cache = {
+                    t: entry for t, entry in self._principal_cache.items()
+                    if now - entry[0] <= self.PRINCIPAL_CACHE_TTL
+                }
+            self._principal_cache[token] = (now, self.db.generation, user_data)
 
+    def verify_auth(self, token):
+        """Verify authentication token, reusing the result for the rest of the request"""
         if not self.auth_enabled:
             return {'username': 'admin', 'is_admin': True}
 
-        return self.db.verify_session(token)
+        if not token:
+            return None
+
+        if has_request_context():
+            cached = g.get('auth_principal')
+            if cached and cached[0] == token:
+                return cached[1]
+
+        user_data = self._get_cached_principal(token)
+        if user_data is None:
+            self.db.load_db()
+            user_data = self.db.verify_session(token)
+            if user_data:
+                self._cache_principal(token, user_data)
+
+        if has_request_context():
+            g.auth_principal = (token, user_data)
+        return user_data
 
     def require_auth(self, f):
         """Decorator to require authentication for a route"""
@@ -121,7 +180,7 @@ class AuthManager:
             if not token:
                 return redirect(url_for('auth.login', next=request.path))
 
-            user_data = self.db.verify_session(token)
+            user_data = self.verify_auth(token)
 
             if not user_data:
                 return redirect(url_for('auth.login', next=request.path))
@@ -170,7 +229,7 @@ class AuthManager:
             if not token:
                 return redirect(url_for('auth.login', next=request.url))
 
-            user_data = self.db.verify_session(token)
+            user_data = self.verify_auth(token)
 
             if not user_data:
                 return redirect(url_for('auth.login', next=request.url))
@@ -207,6 +266,7 @@ class AuthManager:
 
     def update_password(self, username, new_password):
         """Update a user's password"""
+        self.invalidate_principal_cache(username=username)
         return self.db.update_password(username, new_password)
 
     def delete_user(self, username):
@@ -228,8 +288,7 @@ class AuthManager:
                     'expires_at': pin_data['expires_at']
                 }
 
-            with open(self._pins_file, 'w') as f:
-                json.dump(pins_data, f)
+            write_json(self._pins_file, pins_data)
 
             logger.info(f"Saved {len(pins_data)} PINs to disk")
         except Exception as e:
@@ -0,0 +1,303 @@
+import atexit
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.json_storage import atomic_write_json, WriteBehind
+from utils.shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Session rows kept apart from user records.
+
+    Sessions live in a dict indexed by token with a min-heap of (expires, token) beside it,
+    so lookups are O(1) and expiry only pops what is actually due. Changes are written to
+    ``sessions.json`` write-behind, at most once per ``persist_interval`` seconds, so logins
+    never wait on disk.
+    """
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, file_path, persist_interval=2.0):
+        self.file_path = file_path
+        self.persist_interval = persist_interval
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._expiry = []
+        self._last_purge = 0
+        self._version = 0
+        self.loaded_from_disk = False
+        self._load_from_disk()
+        self._writer = WriteBehind(self._snapshot, self._write, interval=persist_interval,
+                                   name='auth-session-writer')
+
+    @classmethod
+    def for_path(cls, file_path):
+        """Return the process-wide store for a file so every AuthDB shares one view.
+
+        When a cross-process shared state backend is configured the sessions live
+        there instead, so a login or logout on one worker is seen by all of them.
+        """
+        with cls._stores_lock:
+            store = cls._stores.get(file_path)
+            if store is None:
+                if shared_state.shared:
+                    store = SharedSessionStore(file_path, shared_state)
+                else:
+                    store = cls(file_path)
+                    atexit.register(store.flush)
+                cls._stores[file_path] = store
+            return store
+
+    def _load_from_disk(self):
+        try:
+            if os.path.exists(self.file_path):
+                with open(self.file_path, 'r') as f:
+                    data = json.load(f)
+                self._replace_all(data.get('sessions', {}))
+                self.loaded_from_disk = True
+                logger.info(f"Loaded {len(self._sessions)} sessions from {self.file_path}")
+        except Exception as e:
+            logger.error(f"Error loading session store {self.file_path}: {e}")
+
+    def _replace_all(self, sessions):
+        self._sessions = dict(sessions)
+        self._expiry = [(s.get('expires', 0), token) for token, s in self._sessions.items()]
+        heapq.heapify(self._expiry)
+
+    def import_sessions(self, sessions):
+        """One-time migration of sessions that used to be stored inside auth.json"""
+        if not sessions:
+            return 0
+        with self._lock:
+            added = 0
+            for token, session in sessions.items():
+                if token not in self._sessions:
+                    self._sessions[token] = session
+                    heapq.heappush(self._expiry, (session.get('expires', 0), token))
+                    added += 1
+            if added:
+                self._version += 1
+        if added:
+            logger.info(f"Migrated {added} sessions from auth.json into {self.file_path}")
+            self._schedule_persist()
+        return added
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, token):
+        """Return the live session for a token; expired rows are dropped on sight"""
+        self.purge_expired()
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session.get('expires', 0) < time.time():
+                del self._sessions[token]
+                self._version += 1
+                expired = True
+            else:
+                return session
+        if expired:
+            self._schedule_persist()
+        return None
+
+    def add(self, token, session):
+        with self._lock:
+            self._sessions[token] = session
+            heapq.heappush(self._expiry, (session.get('expires', 0), token))
+            self._version += 1
+        self._schedule_persist()
+
+    def extend(self, token, expires):
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return False
+            session['expires'] = expires
+            # The old heap entry becomes stale and is skipped when popped
+            heapq.heappush(self._expiry, (expires, token))
+            self._version += 1
+        self._schedule_persist()
+        return True
+
+    def delete(self, token):
+        with self._lock:
+            if self._sessions.pop(token, None) is None:
+                return False
+            self._version += 1
+        self._schedule_persist()
+        return True
+
+    def delete_where(self, predicate):
+        """Delete every session for which predicate(token, session) is true; returns the count"""
+        with self._lock:
+            doomed = [token for token, session in self._sessions.items() if predicate(token, session)]
+            for token in doomed:
+                del self._sessions[token]
+            if doomed:
+                self._version += 1
+        if doomed:
+            self._schedule_persist()
+        return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            if not self._sessions:
+                return
+            self._sessions = {}
+            self._expiry = []
+            self._version += 1
+        self._schedule_persist()
+
+    def purge_expired(self, force=False):
+        """Pop due entries off the expiry heap, at most once per PURGE_INTERVAL unless forced"""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_purge < self.PURGE_INTERVAL:
+                return 0
+            self._last_purge = now
+            removed = 0
+            while self._expiry and self._expiry[0][0] < now:
+                expires, token = heapq.heappop(self._expiry)
+                session = self._sessions.get(token)
+                if session is not None and session.get('expires', 0) < now:
+                    del self._sessions[token]
+                    removed += 1
+            # Tokens deleted explicitly leave entries behind; rebuild once they dominate the heap
+            if len(self._expiry) > 2 * len(self._sessions) + 64:
+                self._replace_all(self._sessions)
+            if removed:
+                self._version += 1
+        if removed:
+            logger.info(f"Cleaned {removed} expired sessions")
+            self._schedule_persist()
+        return removed
+
+    def _snapshot(self):
+        with self._lock:
+            return self._version, dict(self._sessions)
+
+    def _write(self, sessions):
+        atomic_write_json(self.file_path, {'sessions': sessions})
+        logger.debug(f"Persisted {len(sessions)} sessions")
+
+    def _schedule_persist(self):
+        self._writer.schedule()
+
+    def flush(self):
+        """Write the current sessions to disk now if anything changed"""
+        self._writer.flush()
+
+
+class SharedSessionStore:
+    """SessionStore backed by a hash in the shared state store (SQLite or Redis).
+
+    Same interface as SessionStore; every call goes to the backend so all workers
+    agree. An existing ``sessions.json`` is imported the first time the hash is empty.
+    """
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, file_path, backend, key=None):
+        self.file_path = file_path
+        self.backend = backend
+        self.key = key or f'auth:sessions:{os.path.basename(file_path)}'
+        self._last_purge = 0
+        self.loaded_from_disk = self.backend.hlen(self.key) > 0
+        if not self.loaded_from_disk and os.path.exists(file_path):
+            try:
+                with open(file_path, 'r') as f:
+                    self.import_sessions(json.load(f).get('sessions', {}))
+                self.loaded_from_disk = True
+            except Exception as e:
+                logger.error(f"Error importing session store {file_path}: {e}")
+
+    def _all(self):
+        sessions = {}
+        for token, raw in self.backend.hgetall(self.key).items():
+            try:
+                sessions[token] = json.loads(raw)
+            except (TypeError, ValueError):
+                continue
+        return sessions
+
+    def import_sessions(self, sessions):
+        if not sessions:
+            return 0
+        existing = set(self.backend.hgetall(self.key))
+        added = 0
+        for token, session in sessions.items():
+            if token not in existing:
+                self.backend.hset(self.key, token, json.dumps(session))
+                added += 1
+        if added:
+            logger.info(f"Migrated {added} sessions into shared state")
+        return added
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def __len__(self):
+        return self.backend.hlen(self.key)
+
+    def get(self, token):
+        self.purge_expired()
+        raw = self.backend.hget(self.key, token)
+        if raw is None:
+            return None
+        session = json.loads(raw)
+        if session.get('expires', 0) < time.time():
+            self.backend.hdel(self.key, token)
+            return None
+        return session
+
+    def add(self, token, session):
+        self.backend.hset(self.key, token, json.dumps(session))
+
+    def extend(self, token, expires):
+        raw = self.backend.hget(self.key, token)
+        if raw is None:
+            return False
+        session = json.loads(raw)
+        session['expires'] = expires
+        self.backend.hset(self.key, token, json.dumps(session))
+        return True
+
+    def delete(self, token):
+        return self.backend.hdel(self.key, token) > 0
+
+    def delete_where(self, predicate):
+        doomed = [token for token, session in self._all().items() if predicate(token, session)]
+        if doomed:
+            self.backend.hdel(self.key, *doomed)
+        return len(doomed)
+
+    def clear(self):
+        self.backend.delete(self.key)
+
+    def purge_expired(self, force=False):
+        now = time.time()
+        if not force and now - self._last_purge < self.PURGE_INTERVAL:
+            return 0
+        self._last_purge = now
+        removed = self.delete_where(lambda token, session: session.get('expires', 0) < now)
+        if removed:
+            logger.info(f"Cleaned {removed} expired sessions")
+        return removed
+
+    def flush(self):
+        """Nothing to do; every change is already in the shared store"""
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import random
+import time
+from threading import Lock, Thread
+
+from utils.json_storage import atomic_write_json
+from utils.leader_election import leadership
+from utils.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BACKDROP_POOL_FILE = '/app/data/login_backdrops.json'
+POOL_SIZE = 300
+REFRESH_INTERVAL = 24 * 60 * 60
+RETRY_INTERVAL = 5 * 60
+
+PLEX_ALL_MOVIES_FILE = '/app/data/plex_all_movies.json'
+PLEX_METADATA_FILE = '/app/data/plex_metadata_cache.json'
+JELLYFIN_ALL_MOVIES_FILE = '/app/data/jellyfin_all_movies.json'
+EMBY_ALL_MOVIES_FILE = '/app/data/emby_all_movies.json'
+
+
+def _load_json(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Error loading {path} for login backdrops: {e}")
+        return None
+
+
+def _tmdb_ids_from_movies(movies):
+    if not isinstance(movies, list):
+        return []
+    return [str(m['tmdb_id']) for m in movies if isinstance(m, dict) and m.get('tmdb_id')]
+
+
+def _tmdb_ids_from_plex_metadata(metadata):
+    ids = []
+    for movie in (metadata or {}).values():
+        for guid in movie.get('Guid', []) or []:
+            guid_id = guid.get('id') if isinstance(guid, dict) else None
+            if isinstance(guid_id, str) and guid_id.startswith('tmdb://'):
+                ids.append(guid_id[len('tmdb://'):])
+                break
+    return ids
+
+
+def library_tmdb_ids():
+    """TMDB ids from the first available media service cache file"""
+    if settings.get('plex', {}).get('enabled'):
+        ids = _tmdb_ids_from_movies(_load_json(PLEX_ALL_MOVIES_FILE))
+        if not ids:
+            ids = _tmdb_ids_from_plex_metadata(_load_json(PLEX_METADATA_FILE))
+        if ids:
+            return ids
+    if settings.get('jellyfin', {}).get('enabled'):
+        ids = _tmdb_ids_from_movies(_load_json(JELLYFIN_ALL_MOVIES_FILE))
+        if ids:
+            return ids
+    if settings.get('emby', {}).get('enabled'):
+        return _tmdb_ids_from_movies(_load_json(EMBY_ALL_MOVIES_FILE))
+    return []
+
+
+class BackdropPool:
+    """A persisted pool of TMDB backdrop URLs for the login page.
+
+    The pool is refreshed in a background thread after library cache builds, so
+    serving the login page never reads library caches or calls TMDB.
+    """
+
+    def __init__(self, file_path=BACKDROP_POOL_FILE, size=POOL_SIZE):
+        self.file_path = file_path
+        self.size = size
+        self._lock = Lock()
+        self._backdrops = {}
+        self._urls = []
+        self._refreshed_at = 0
+        self._attempted_at = 0
+        self._refreshing = False
+        self._load_from_disk()
+
+    def _load_from_disk(self):
+        data = _load_json(self.file_path)
+        if not isinstance(data, dict):
+            return
+        self._backdrops = data.get('backdrops', {}) or {}
+        self._urls = list(self._backdrops.values())
+        self._refreshed_at = data.get('refreshed_at', 0)
+        logger.info(f"Loaded {len(self._urls)} login backdrops from disk")
+
+    def sample(self, count=20):
+        """Random backdrop URLs; kicks off a refresh when the pool is empty or stale"""
+        with self._lock:
+            urls = self._urls
+            now = time.time()
+            due = (not urls or now - self._refreshed_at > REFRESH_INTERVAL) \
+                and now - self._attempted_at > RETRY_INTERVAL
+        if due:
+            self.refresh_async()
+        return random.sample(urls, min(count, len(urls)))
+
+    def refresh_async(self, movies=None):
+        """Rebuild the pool in a daemon thread from ``movies`` or the library cache files.
+
+        Only the worker holding the refresh lease calls TMDB; the others reload the
+        pool it persisted.
+        """
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._attempted_at = time.time()
+            leader = leadership.is_leader('backdrop-pool-refresh')
+            self._refreshing = leader
+        if not leader:
+            self._load_from_disk()
+            return False
+        tmdb_ids = _tmdb_ids_from_movies(movies) if movies is not None else None
+        Thread(target=self._refresh, args=(tmdb_ids,), daemon=True, name='backdrop-pool-refresh').start()
+        return True
+
+    def _refresh(self, tmdb_ids=None):
+        try:
+            if tmdb_ids is None:
+                tmdb_ids = library_tmdb_ids()
+            if not tmdb_ids:
+                logger.warning("No movies with TMDB ids available for login backdrops")
+                return
+
+            library = set(tmdb_ids)
+            with self._lock:
+                kept = {k: v for k, v in self._backdrops.items() if k in library}
+            candidates = [i for i in library if i not in kept]
+            random.shuffle(candidates)
+
+            backdrops = dict(kept)
+            for tmdb_id in candidates:
+                if len(backdrops) >= self.size:
+                    break
+                url = self._backdrop_url(tmdb_id)
+                if url:
+                    backdrops[tmdb_id] = url
+
+            with self._lock:
+                self._backdrops = backdrops
+                self._urls = list(backdrops.values())
+                self._refreshed_at = time.time()
+                data = {'refreshed_at': self._refreshed_at, 'backdrops': backdrops}
+            atomic_write_json(self.file_path, data)
+            logger.info(f"Login backdrop pool refreshed: {len(backdrops)} backdrops "
+                        f"({len(backdrops) - len(kept)} new)")
+        except Exception as e:
+            logger.error(f"Error refreshing login backdrop pool: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    @staticmethod
+    def _backdrop_url(tmdb_id):
+        from utils.tmdb_service import tmdb_service
+        try:
+            details = tmdb_service.get_movie_details(tmdb_id)
+            if details and details.get('backdrop_path'):
+                return tmdb_service.get_image_url(details['backdrop_path'], size='original')
+        except Exception as e:
+            logger.debug(f"Could not get backdrop for tmdb_id {tmdb_id}: {e}")
+        return None
+
+
+backdrop_pool = BackdropPool()
@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+MAX_CONCURRENT = int(os.getenv('CACHE_BUILD_MAX_CONCURRENT', '2'))
+
+_current = threading.local()
+
+
+class BuildCancelled(BaseException):
+    """Raised inside a running build whose job was cancelled.
+
+    A BaseException, like GreenletExit, so the per-movie ``except Exception``
+    handlers in the build loops do not swallow it.
+    """
+
+
+class BuildJob:
+    """One queued cache build; ``key`` names the cache it writes"""
+
+    def __init__(self, job_id, key, func, priority, description):
+        self.id = job_id
+        self.key = key
+        self.func = func
+        self.priority = priority
+        self.description = description or key
+        self.state = QUEUED
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+        self._finished = threading.Event()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started_at or (now if self.state == QUEUED else self.finished_at)
+        return {
+            'id': self.id,
+            'key': self.key,
+            'description': self.description,
+            'priority': self.priority,
+            'state': self.state,
+            'error': self.error,
+            'cancel_requested': self.cancel_requested.is_set(),
+            'submitted_at': self.submitted_at,
+            'queued_seconds': round((started or now) - self.submitted_at, 3),
+            'run_seconds': round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class BuildQueue:
+    """Runs cache builds with per-key deduplication, priorities and a concurrency cap.
+
+    Submitting a key that is already queued or running returns the existing job,
+    so double clicks and overlapping triggers never run the same build twice.
+    Queued jobs can be cancelled outright; running ones are asked to stop and do
+    so at their next progress update (see check_cancelled).
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, history=50):
+        self.max_concurrent = max(1, max_concurrent)
+        self._lock = threading.Lock()
+        self._heap = []
+        self._active = {}
+        self._running = 0
+        self._finished = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+
+    def submit(self, key, func, priority=PRIORITY_NORMAL, description=None):
+        """Queue func as the build for key; returns (job, created)"""
+        with self._lock:
+            job = self._active.get(key)
+            if job is not None:
+                if job.state == QUEUED and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                return job, False
+            job = BuildJob(next(self._ids), key, func, priority, description)
+            self._active[key] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+        logger.info(f"Queued build '{job.description}' (job {job.id}, priority {priority})")
+        self._dispatch()
+        return job, True
+
+    def _dispatch(self):
+        to_start = []
+        with self._lock:
+            while self._heap and self._running < self.max_concurrent:
+                priority, _, job = heapq.heappop(self._heap)
+                # Skip cancelled jobs and stale entries left behind by a priority bump
+                if job.state != QUEUED or priority != job.priority:
+                    continue
+                job.state = RUNNING
+                job.started_at = time.time()
+                self._running += 1
+                to_start.append(job)
+        for job in to_start:
+            threading.Thread(target=self._run, args=(job,), daemon=True, name=f'build-{job.id}').start()
+
+    def _run(self, job):
+        _current.job = job
+        try:
+            job.func()
+            job.state = CANCELLED if job.cancel_requested.is_set() else DONE
+        except BuildCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.state = FAILED
+            job.error = str(e)
+            logger.error(f"Build '{job.description}' failed: {e}", exc_info=True)
+        finally:
+            _current.job = None
+            job.finished_at = time.time()
+            logger.info(f"Build '{job.description}' {job.state} in {job.finished_at - job.started_at:.1f}s")
+            with self._lock:
+                self._running -= 1
+                self._active.pop(job.key, None)
+                self._finished.appendleft(job)
+            job._finished.set()
+            self._dispatch()
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or ask a running one to stop; False if no such active job"""
+        with self._lock:
+            job = next((j for j in self._active.values() if j.id == job_id), None)
+            if job is None:
+                return False
+            job.cancel_requested.set()
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+                self._finished.appendleft(job)
+                job._finished.set()
+        logger.info(f"Cancellation requested for build '{job.description}' (job {job.id})")
+        return True
+
+    def get(self, key):
+        with self._lock:
+            return self._active.get(key)
+
+    def status(self):
+        with self._lock:
+            active = list(self._active.values())
+            finished = list(self._finished)
+        return {
+            'max_concurrent': self.max_concurrent,
+            'queued': [j.to_dict() for j in sorted(active, key=lambda j: (j.priority, j.id)) if j.state == QUEUED],
+            'running': [j.to_dict() for j in active if j.state == RUNNING],
+            'finished': [j.to_dict() for j in finished],
+        }
+
+
+def check_cancelled():
+    """Raise BuildCancelled when the build running on this thread has been cancelled"""
+    job = getattr(_current, 'job', None)
+    if job is not None and job.cancel_requested.is_set():
+        raise BuildCancelled(job.key)
+
+
+build_queue = BuildQueue()
@@ -3,7 +3,12 @@ import json
 import os
 import logging
 from threading import Thread, Lock, RLock
-from functools import lru_cache
+from functools import lru_cache, partial
+from utils.build_queue import build_queue, BuildCancelled, PRIORITY_LOW
+from utils.leader_election import leadership
+from utils.json_storage import write_json
+from utils.library_fingerprint import save_fingerprint, verify_fingerprint
+from utils.progress import ProgressReporter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,6 +26,7 @@ class CacheManager:
         self._cache_lock = RLock()
         self._movies_memory_cache = []
         self._initializing = False
+        self._disk_mtime = None
         self.username = username
         self.service_type = service_type
         self.plex_user_id = plex_user_id
@@ -49,73 +55,20 @@ class CacheManager:
              logger.info(f"All movies cache path not applicable for this user ({self.username}, {self.user_type}).")
 
     def _verify_cache_validity(self):
-        """Verify cache is still valid by checking unwatched status using switchUser"""
-        try:
-            if not self._movies_memory_cache:
-                logger.info("Cache verification failed: No movies in memory cache")
-                return False
-
-            plex_instance = self.plex_service.plex
-            user_switched = False
-
-            if hasattr(self, 'username') and self.username:
-                try:
-                    plex_instance = self.plex_service.plex.switchUser(self.username)
-                    user_switched = True
-                    logger.info(f"Successfully switched to user perspective for cache validation: {self.username}")
-                except Exception as e:
-                    logger.error(f"Error switching to user {self.username} for cache validation: {e}")
-                    if hasattr(self, 'username') and self.username:
-                        logger.error(f"Cannot validate user cache for {self.username} without their perspective. Cache validation FAILED.")
-                        return False
-                    logger.warning(f"Falling back to admin perspective for cache validation")
-
-            import random
-            sample_size = min(5, len(self._movies_memory_cache))
-            sample_movies = random.sample(self._movies_memory_cache, sample_size)
-            logger.info(f"Cache Validation: Checking {sample_size} random movies...")
-
-            for movie in sample_movies:
-                movie_title = movie.get('title', 'Unknown')
-                movie_id = movie.get('id', 'N/A')
-                logger.info(f"Cache Validation: Checking movie '{movie_title}' (ID: {movie_id})")
-
-                movie_found_and_unwatched = False
-                failure_reason = "Not found in any library or is watched"
-
-                for library in self.plex_service.libraries:
-                    try:
-                        check_library = library
-                        if user_switched:
-                            check_library = plex_instance.library.section(library.title)
-
-                        plex_movie = check_library.fetchItem(int(movie['id']))
-
-                        if plex_movie:
-                            if not plex_movie.isWatched:
-                                movie_found_and_unwatched = True
-                                logger.info(f"Cache Validation: Movie '{movie_title}' (ID: {movie_id}) PASSED (found and unwatched in library '{check_library.title}')")
-                                break
-                            else:
-                                failure_reason = f"Found in library '{check_library.title}' but isWatched=True"
-                                logger.warning(f"Cache Validation: Movie '{movie_title}' (ID: {movie_id}) FAILED ({failure_reason})")
-                                break
-
-                    except Exception as e:
-                        logger.error(f"Cache Validation: Error checking movie '{movie_title}' (ID: {movie_id}) in library '{library.title}': {e}")
-                        failure_reason = f"Error during check in library '{library.title}': {e}"
-
-                if not movie_found_and_unwatched:
-                    logger.warning(f"Cache Validation: FINAL RESULT for movie '{movie_title}' (ID: {movie_id}): FAILED. Reason: {failure_reason}")
-                    logger.warning(f"Cache validation failed due to movie '{movie_title}' (ID: {movie_id}). Rebuilding cache.")
-                    return False
-
-            logger.info("Cache Validation: All sampled movies PASSED.")
+        """Check the cache against the library fingerprint recorded when it was saved"""
+        if not self._movies_memory_cache:
+            logger.info("Cache verification failed: No movies in memory cache")
+            return False
+        if not self.cache_file_path or not self.plex_service:
             return True
+        return verify_fingerprint(self.cache_file_path, self._fingerprint_plex(),
+                                  self.plex_service.library_names, len(self._movies_memory_cache))
 
-        except Exception as e:
-            logger.error(f"Error verifying cache: {e}")
-            return False
+    def _fingerprint_plex(self):
+        """The Plex instance whose perspective (watched state) this cache reflects"""
+        if hasattr(self.plex_service, '_get_own_user_plex_instance'):
+            return self.plex_service._get_own_user_plex_instance()
+        return self.plex_service.plex
 
     def _get_cache_paths(self):
         """Determines the appropriate cache paths based on user type and ID."""
@@ -173,6 +126,15 @@ class CacheManager:
         
         return user_data_dir, cache_file_path, all_movies_cache_path, metadata_cache_path
 
+    @property
+    def build_key(self):
+        """Build-queue key for this manager's caches; builds with the same key never overlap"""
+        return f"plex:{self.username or 'global'}"
+
+    def _progress_reporter(self, room=None):
+        """Progress for this manager's builds, sent only to its user's room (global builds broadcast)"""
+        return ProgressReporter(self.socketio, room=room or self.username)
+
     def start_cache_build(self):
         """Start the cache building process with progress updates"""
         with self._cache_lock:
@@ -182,25 +144,17 @@ class CacheManager:
 
             self._initializing = True
 
+        progress = self._progress_reporter()
+        cancelled = False
         try:
-            self.socketio.emit('loading_progress', {
-                'progress': 0.05,
-                'current': 0,
-                'total': 0,
-                'status': 'Starting cache build...'
-            }, namespace='/')
+            progress.update(0.05, current=0, total=0, status='Starting cache build...')
 
             if hasattr(self, '_build_for_user') and self._build_for_user and self.all_movies_cache_path and os.path.exists(self.all_movies_cache_path):
                 with open(self.all_movies_cache_path, 'r') as f:
                     all_movies_data = json.load(f)
 
                 total_movies = len(all_movies_data)
-                self.socketio.emit('loading_progress', {
-                    'progress': 0.1,
-                    'current': 0,
-                    'total': total_movies,
-                    'status': 'Finding unwatched movies'
-                }, namespace='/')
+                progress.update(0.1, current=0, total=total_movies, status='Finding unwatched movies')
 
                 unwatched_movies = []
 
@@ -208,27 +162,14 @@ class CacheManager:
                     if not movie.get('watched', False):
                         unwatched_movies.append(movie)
 
-                    if i % 10 == 0:
-                        progress = (i / total_movies) * 0.8
-                        self.socketio.emit('loading_progress', {
-                            'progress': progress,
-                            'current': i,
-                            'total': total_movies,
-                            'status': 'Finding unwatched movies'
-                        }, namespace='/')
+                    progress.update((i / total_movies) * 0.8, current=i, total=total_movies,
+                                    status='Finding unwatched movies')
 
                 with self._cache_lock:
                     self._movies_memory_cache = unwatched_movies
                 self._save_cache_to_disk()
 
-                self.socketio.emit('loading_progress', {
-                    'progress': 1.0,
-                    'current': total_movies,
-                    'total': total_movies,
-                    'status': 'Cache complete'
-                }, namespace='/')
-
-                self.socketio.emit('loading_complete', namespace='/')
+                progress.finish(total_movies)
                 self._initializing = False
                 return
 
@@ -257,33 +198,25 @@ class CacheManager:
             total_movies = len(self._movies_memory_cache)
             logger.info(f"Cache build completed with {total_movies} movies for {self.username or 'global'}")
 
-            self.socketio.emit('loading_progress', {
-                'progress': 1.0,
-                'current': total_movies,
-                'total': total_movies,
-                'status': 'Cache complete'
-            }, namespace='/')
-
-            self.socketio.emit('loading_complete', namespace='/')
+            progress.finish(total_movies)
 
             from utils.enrichment_cache import enrichment_cache
             with self._cache_lock:
                 movies_snapshot = list(self._movies_memory_cache)
             enrichment_cache.build_for_movies(movies_snapshot)
 
+        except BuildCancelled:
+            cancelled = True
+            raise
         except Exception as e:
             logger.error(f"Error building cache: {e}")
-            self.socketio.emit('loading_progress', {
-                'progress': 1.0,
-                'error': str(e),
-                'status': 'Error building cache'
-            }, namespace='/')
+            progress.error(str(e))
         finally:
             self._initializing = False
             if hasattr(self.plex_service, '_is_coordinated_build'):
                 self.plex_service._is_coordinated_build = False
 
-            if (not self.username or self.username == "admin") and self.user_type == 'plex':
+            if not cancelled and (not self.username or self.username == "admin") and self.user_type == 'plex':
                 logger.info(f"Global cache build for '{self.username or 'global'}' completed for unwatched. Now ensuring all_movies_cache is built.")
                 try:
                     self.cache_all_plex_movies(synchronous=True)
@@ -307,22 +240,19 @@ class CacheManager:
             logger.info(f"Skipping rebuild_user_cache for non-Plex user {username} ({self.service_type})")
             return
 
-        if self._initializing:
-            logger.info(f"Cache rebuild already initializing for {username}, skipping.")
-            return
-
         if not self.all_movies_cache_path or not self.cache_file_path:
              logger.error(f"Cannot rebuild user cache for {username}: Required cache paths are not defined even though service_type is plex.")
              return
 
-        self._initializing = True
+        with self._cache_lock:
+            if self._initializing:
+                logger.info(f"Cache rebuild already initializing for {username}, skipping.")
+                return
+            self._initializing = True
+        progress = self._progress_reporter(room=username)
+        cancelled = False
         try:
-            self.socketio.emit('loading_progress', {
-                'progress': 0.1,
-                'current': 0,
-                'total': 100,
-                'status': 'Building user-specific cache'
-            }, namespace='/')
+            progress.update(0.1, current=0, total=100, status='Building user-specific cache')
 
             original_username = getattr(self.plex_service, 'username', None)
             self.plex_service.username = username
@@ -344,12 +274,8 @@ class CacheManager:
 
                     all_movies.extend(library_movies)
 
-                    self.socketio.emit('loading_progress', {
-                        'progress': 0.3,
-                        'current': len(all_movies),
-                        'total': 100,
-                        'status': f'Loaded library: {library.title}'
-                    }, namespace='/')
+                    progress.update(0.3, current=len(all_movies), total=100,
+                                    status=f'Loaded library: {library.title}')
                 except Exception as e:
                     logger.error(f"Error loading library {library.title}: {e}")
 
@@ -367,44 +293,22 @@ class CacheManager:
                 except Exception as e:
                     logger.error(f"Error processing movie {getattr(movie, 'title', 'Unknown')}: {e}")
 
-                if i % 10 == 0:
-                    progress = 0.3 + (0.4 * (i / len(all_movies)))
-                    self.socketio.emit('loading_progress', {
-                        'progress': progress,
-                        'current': i,
-                        'total': len(all_movies),
-                        'status': 'Processing all movies'
-                    }, namespace='/')
-
-            os.makedirs(self.user_data_dir, exist_ok=True)
+                progress.update(0.3 + (0.4 * (i / len(all_movies))), current=i, total=len(all_movies),
+                                status='Processing all movies')
 
-            temp_all_path = self.all_movies_cache_path + ".tmp"
             try:
-                with open(temp_all_path, 'w') as f:
-                    json.dump(processed_movies, f)
-                os.replace(temp_all_path, self.all_movies_cache_path)
+                write_json(self.all_movies_cache_path, processed_movies)
                 logger.info(f"Saved all movies cache for {username} to {self.all_movies_cache_path}")
             except Exception as save_all_err:
                  logger.error(f"Error saving all movies cache to {self.all_movies_cache_path}: {save_all_err}")
-                 if os.path.exists(temp_all_path):
-                     try:
-                         os.remove(temp_all_path)
-                     except Exception as remove_e:
-                         logger.error(f"Error removing temporary all movies cache file {temp_all_path}: {remove_e}")
 
             unwatched_movies = []
             for i, movie in enumerate(processed_movies):
                 if not movie.get('watched', False):
                     unwatched_movies.append(movie)
 
-                if i % 10 == 0:
-                    progress = 0.7 + (0.25 * (i / len(processed_movies)))
-                    self.socketio.emit('loading_progress', {
-                        'progress': progress,
-                        'current': i,
-                        'total': len(processed_movies),
-                        'status': 'Finding unwatched movies'
-                    }, namespace='/')
+                progress.update(0.7 + (0.25 * (i / len(processed_movies))), current=i,
+                                total=len(processed_movies), status='Finding unwatched movies')
 
             with self._cache_lock:
                 self._movies_memory_cache = unwatched_movies
@@ -414,27 +318,23 @@ class CacheManager:
             if original_username:
                 self.plex_service.username = original_username
 
-            self.socketio.emit('loading_progress', {
-                'progress': 1.0,
-                'current': len(processed_movies),
-                'total': len(processed_movies),
-                'status': 'Cache complete'
-            }, namespace='/')
-
             logger.info(f"Completed user cache build for {username}: {len(unwatched_movies)} unwatched of {len(processed_movies)} total")
 
-            self.socketio.emit('loading_complete', namespace='/')
+            progress.finish(len(processed_movies))
 
             from utils.enrichment_cache import enrichment_cache
             with self._cache_lock:
                 movies_snapshot = list(self._movies_memory_cache)
             enrichment_cache.build_for_movies(movies_snapshot)
 
+        except BuildCancelled:
+            cancelled = True
+            raise
         except Exception as e:
             logger.error(f"Error rebuilding user cache for {username}: {e}")
         finally:
             self._initializing = False
-            if self.username and self.user_type == 'plex':
+            if not cancelled and self.username and self.user_type == 'plex':
                 logger.info(f"User cache rebuild for '{username}' completed for unwatched. Now ensuring user's all_movies_cache is built.")
                 try:
                     self.cache_all_plex_movies(synchronous=True)
@@ -461,6 +361,7 @@ class CacheManager:
 
         try:
             if os.path.exists(self.cache_file_path):
+                self._disk_mtime = os.stat(self.cache_file_path).st_mtime_ns
                 with open(self.cache_file_path, 'r') as f:
                     self._movies_memory_cache = json.load(f)
                 logger.info(f"Loaded {len(self._movies_memory_cache)} movies into memory cache from {self.cache_file_path}")
@@ -471,6 +372,22 @@ class CacheManager:
             logger.error(f"Error initializing memory cache from {self.cache_file_path}: {e}")
             self._movies_memory_cache = []
 
+    def _reload_if_changed_on_disk(self):
+        """Pick up a cache file rewritten by another worker (the update leader)"""
+        if not self.cache_file_path or self._initializing:
+            return
+        try:
+            mtime = os.stat(self.cache_file_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._disk_mtime:
+            return
+        logger.info(f"Cache file {self.cache_file_path} changed on disk, reloading memory cache for {self.username or 'global'}")
+        with self._cache_lock:
+            self._init_memory_cache()
+            if self.plex_service and hasattr(self.plex_service, '_movies_cache'):
+                self.plex_service._movies_cache = self._movies_memory_cache.copy()
+
     def start(self):
         """Start the cache manager background thread"""
         logger.info(f"Starting cache manager background thread for {self.username or 'global'}")
@@ -499,7 +416,9 @@ class CacheManager:
 
                 logger.debug(f"Update check: Time since last update: {time_since_last_update:.1f}s, Interval: {self.update_interval}s")
 
-                if self.cache_file_path and os.path.exists(self.cache_file_path) and (time_since_last_update >= self.update_interval):
+                if (self.cache_file_path and os.path.exists(self.cache_file_path) and
+                        time_since_last_update >= self.update_interval and
+                        leadership.is_leader(f"cache-update:{self.username or 'global'}")):
                     logger.info(f"Update interval reached, checking for changes for {self.username or 'global'}")
                     with self._cache_lock:
                         self.check_for_changes()
@@ -515,6 +434,8 @@ class CacheManager:
                     if not self.running:
                         break
                     time.sleep(sleep_interval)
+                    # Only the leader checks Plex; the other workers follow its cache file
+                    self._reload_if_changed_on_disk()
 
                 remaining_time = time_to_next_update % sleep_interval
                 if remaining_time > 0 and self.running:
@@ -551,7 +472,8 @@ class CacheManager:
             logger.info(f"Starting to check for library changes for {self.username or 'global'}...")
             self.is_updating = True
 
-            self.cache_all_plex_movies()
+            build_queue.submit(f"{self.build_key}:all", partial(self.cache_all_plex_movies, synchronous=True),
+                               PRIORITY_LOW, f"All-movies cache for {self.username or 'global'}")
 
             current_unwatched = set()
 
@@ -740,26 +662,18 @@ class CacheManager:
             logger.debug(f"Unwatched cache path not defined for {self.username or 'global'} ({self.service_type}), skipping save cache to disk.")
             return
 
-        temp_path = None
         try:
-            os.makedirs(self.user_data_dir, exist_ok=True)
-            temp_path = self.cache_file_path + ".tmp"
             with self._cache_lock:
                 cache_data_to_save = list(self._movies_memory_cache)
 
-            with open(temp_path, 'w') as f:
-                json.dump(cache_data_to_save, f)
-
-            os.replace(temp_path, self.cache_file_path)
+            write_json(self.cache_file_path, cache_data_to_save)
+            self._disk_mtime = os.stat(self.cache_file_path).st_mtime_ns
 
             logger.info(f"Saved {len(cache_data_to_save)} movies to disk cache: {self.cache_file_path}")
+            if self.plex_service:
+                save_fingerprint(self.cache_file_path, self._fingerprint_plex(), self.plex_service.library_names)
         except Exception as e:
             logger.error(f"Error saving cache to disk {self.cache_file_path}: {e}")
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except Exception as remove_e:
-                    logger.error(f"Error removing temporary cache file {temp_path}: {remove_e}")
 
     def cache_all_plex_movies(self, synchronous=False):
         """Cache all movies (watched and unwatched) for Plex, if applicable."""
@@ -787,6 +701,9 @@ class CacheManager:
                 logger.info(f"plex_service is available for {self.username or 'global'}, proceeding with all movies cache build.")
                 processed_movies = []
                 total_movies = 0
+                # Its own event so the loading overlay stays hidden; updates are also the cancellation point
+                progress = ProgressReporter(self.socketio, event='all_movies_cache_progress',
+                                            room=self.username, complete_event=None)
 
                 plex_instance = self.plex_service._get_user_plex_instance()
 
@@ -809,16 +726,12 @@ class CacheManager:
                                     processed_movies.append(movie_data)
                             except Exception as e:
                                 logger.error(f"Error processing movie {movie.title}: {e}")
+                            progress.update(len(processed_movies) / max(total_movies, 1), current=len(processed_movies),
+                                            total=total_movies, status=f'Caching all movies: {library_name}')
                     except Exception as lib_err:
                          logger.error(f"Error accessing library {library_name} from perspective {self.username or 'global'}: {lib_err}")
 
-                if self.username:
-                    os.makedirs(os.path.dirname(self.all_movies_cache_path), exist_ok=True)
-
-                temp_path = f"{self.all_movies_cache_path}.tmp"
-                with open(temp_path, 'w') as f:
-                    json.dump(processed_movies, f)
-                os.replace(temp_path, self.all_movies_cache_path)
+                write_json(self.all_movies_cache_path, processed_movies)
 
                 logger.info(f"Successfully cached {len(processed_movies)} total Plex movies for {self.username or 'global'}")
             except Exception as e:
@@ -863,7 +776,7 @@ class CacheManager:
             logger.info(f"Starting forced cache refresh for {self.username or 'global'}")
             with self._cache_lock:
                 self.plex_service.refresh_cache(force=True)
-                self.cache_all_plex_movies()
+                self.cache_all_plex_movies(synchronous=True)
                 self._init_memory_cache()
                 self.last_update = time.time()
             logger.info("Forced refresh completed successfully")
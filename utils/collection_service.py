@@ -1,6 +1,6 @@
+import copy
 import logging
 import os
-import json
 from functools import lru_cache
 from datetime import datetime
 from utils.tmdb_service import tmdb_service
@@ -9,10 +9,13 @@ from utils.tracking_service import (
     get_local_watched_movies,
     get_tracking_provider,
     get_watched_movies as get_tracking_watched_movies,
-    is_movie_watched as is_movie_watched_on_tracker,
+    are_movies_watched as are_movies_watched_on_tracker,
+    get_local_watched_set,
     is_tracking_enabled,
 )
 from utils.settings import settings
+from utils.json_storage import read_json, write_json
+from utils.progress import ProgressReporter
 
 logger = logging.getLogger(__name__)
 
@@ -238,6 +241,7 @@ class CollectionService:
 
         previous_movie_ids = {int(movie['id']) for movie in previous_movies}
         all_library_movies = self.get_all_movies()
+        watched_on_tracker = are_movies_watched_on_tracker([movie['id'] for movie in parts])
         result_movies = []
         result_previous = []
         result_other = []
@@ -255,7 +259,7 @@ class CollectionService:
                 logger.error(f"Error checking library status for movie {movie['id']}: {e}")
 
             is_watched_in_library = self._is_movie_watched(movie['id'], all_library_movies)
-            is_watched_tracker = is_movie_watched_on_tracker(movie['id'])
+            is_watched_tracker = watched_on_tracker[movie['id']]
             is_requested = self.check_request_status(movie['id']) if not in_library else False
 
             movie_id = int(movie['id'])
@@ -314,10 +318,8 @@ class CollectionService:
     def _is_movie_in_plex(self, tmdb_id):
         """Check if a movie exists in the Plex library"""
         try:
-            cache_path = '/app/data/plex_all_movies.json'
-            if os.path.exists(cache_path):
-                with open(cache_path, 'r') as f:
-                    all_movies = json.load(f)
+            all_movies = read_json('/app/data/plex_all_movies.json')
+            if all_movies:
                 return any(str(m.get('tmdb_id')) == str(tmdb_id) for m in all_movies) 
         except Exception as e:
             logger.error(f"Error checking Plex library for movie {tmdb_id}: {e}")
@@ -326,10 +328,8 @@ class CollectionService:
     def _is_movie_in_jellyfin(self, tmdb_id):
         """Check if a movie exists in the Jellyfin library"""
         try:
-            cache_path = '/app/data/jellyfin_all_movies.json'
-            if os.path.exists(cache_path):
-                with open(cache_path, 'r') as f:
-                    all_movies = json.load(f)
+            all_movies = read_json('/app/data/jellyfin_all_movies.json')
+            if all_movies:
                 return any(str(m.get('tmdb_id')) == str(tmdb_id) for m in all_movies)
         except Exception as e:
             logger.error(f"Error checking Jellyfin library for movie {tmdb_id}: {e}")
@@ -338,10 +338,8 @@ class CollectionService:
     def _is_movie_in_emby(self, tmdb_id):
         """Check if a movie exists in the Emby library"""
         try:
-            cache_path = '/app/data/emby_all_movies.json'
-            if os.path.exists(cache_path):
-                with open(cache_path, 'r') as f:
-                    all_movies = json.load(f)
+            all_movies = read_json('/app/data/emby_all_movies.json')
+            if all_movies:
                 return any(str(m.get('tmdb_id')) == str(tmdb_id) for m in all_movies)
         except Exception as e:
             logger.error(f"Error checking Emby library for movie {tmdb_id}: {e}")
@@ -381,12 +379,9 @@ class CollectionService:
             raise RuntimeError("The Plex all-movies cache could not be built")
 
     def get_collections_from_cache(self, user=None, path=None, service_name=None):
-        """Get collections from the cache file."""
+        """Get collections from the cache file (shared, read-only)."""
         cache_path = path or self._get_cache_path(user=user, service_name=service_name)
-        if os.path.exists(cache_path):
-            with open(cache_path, 'r') as f:
-                return json.load(f)
-        return None
+        return read_json(cache_path)
 
 
     def build_collections_cache(self, app, current_service, cache_manager=None, user=None, path=None, sid=None, tracking_user_id=None, trakt_user_id=None):
@@ -396,6 +391,9 @@ class CollectionService:
                 return
 
             self.cache_building = True
+            # Percent scale to match collections.js; completion is signalled separately below
+            progress = ProgressReporter(self.socketio, event='collections_cache_progress', room=sid,
+                                        complete_event=None, scale=100)
             try:
                 from flask import g
                 from movie_selector import plex, jellyfin, emby
@@ -436,8 +434,8 @@ class CollectionService:
                                     'overview': collection_info.get('overview'),
                                     'movies': []
                                 }
-                    if self.socketio:
-                        self.socketio.emit('collections_cache_progress', {'progress': (i + 1) / total_movies * 50}, room=sid)
+                    progress.update((i + 1) / total_movies * 0.5, current=i + 1, total=total_movies,
+                                    status='Scanning library')
 
                 user_id = user['internal_username'] if user else get_current_user_id()
                 effective_tracking_user_id = (
@@ -466,9 +464,9 @@ class CollectionService:
                                     'overview': collection_info.get('overview'),
                                     'movies': []
                                 }
-                        if self.socketio and total_tracking_movies > 0:
-                            progress = 50 + (i + 1) / total_tracking_movies * 25
-                            self.socketio.emit('collections_cache_progress', {'progress': progress}, room=sid)
+                        if total_tracking_movies > 0:
+                            progress.update(0.5 + (i + 1) / total_tracking_movies * 0.25, current=i + 1,
+                                            total=total_tracking_movies, status='Scanning watched history')
 
                 all_tmdb_ids = {str(movie.get('tmdb_id')) for movie in all_movies if movie.get('tmdb_id')}
 
@@ -524,24 +522,21 @@ class CollectionService:
                     if not is_fully_watched:
                         final_collections.append(collection_data)
 
-                    if self.socketio and total_collections > 0:
-                        progress_start = 75 if tracking_enabled else 50
-                        progress_range = 25 if tracking_enabled else 50
-                        progress = progress_start + (i + 1) / total_collections * progress_range
-                        self.socketio.emit('collections_cache_progress', {'progress': progress}, room=sid)
+                    if total_collections > 0:
+                        progress_start = 0.75 if tracking_enabled else 0.5
+                        progress_range = 0.25 if tracking_enabled else 0.5
+                        progress.update(progress_start + (i + 1) / total_collections * progress_range,
+                                        current=i + 1, total=total_collections, status='Checking collections')
                 
                 cache_path = path or self._get_cache_path(user=user, service_name=current_service)
-                if cache_path:
-                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-                
+
                 cache_content = {
                     'collections': final_collections,
                     'tracking_provider_in_cache': tracking_provider,
                     'trakt_enabled_in_cache': tracking_provider == 'trakt' and tracking_enabled,
                     'library_cache_scope': 'all',
                 }
-                with open(cache_path, 'w') as f:
-                    json.dump(cache_content, f)
+                write_json(cache_path, cache_content)
             finally:
                 self.cache_building = False
                 if self.socketio:
@@ -555,7 +550,7 @@ class CollectionService:
                 logger.info(f"Cache file not found for user {user['internal_username'] if user else 'default'}. Skipping update.")
                 return
 
-            cached_data = self.get_collections_from_cache(user=user, service_name=current_service)
+            cached_data = copy.deepcopy(self.get_collections_from_cache(user=user, service_name=current_service))
             if not isinstance(cached_data, dict) or 'collections' not in cached_data:
                 logger.warning(f"Invalid cache format for user {user['internal_username'] if user else 'default'}. Triggering full rebuild.")
                 self.build_collections_cache(app, current_service, cache_manager, user)
@@ -575,7 +570,7 @@ class CollectionService:
 
             user_id = user['internal_username'] if user else get_current_user_id()
             tracking_enabled = is_tracking_enabled(user_id)
-            tracking_watched_movies = set(get_local_watched_movies(user_id)) if tracking_enabled else set()
+            tracking_watched_movies = get_local_watched_set(user_id) if tracking_enabled else frozenset()
             
             cached_movie_ids = {str(movie['id']) for collection in collections for movie in collection.get('movies', [])}
 
@@ -660,8 +655,7 @@ class CollectionService:
 
             cached_data['collections'] = collections
             try:
-                with open(cache_path, 'w') as f:
-                    json.dump(cached_data, f)
+                write_json(cache_path, cached_data)
                 logger.info(f"Successfully updated and saved collections cache for user {user['internal_username'] if user else 'default'}.")
             except Exception as e:
                 logger.error(f"Failed to save updated collections cache for user {user['internal_username'] if user else 'default'}: {e}")
@@ -0,0 +1,117 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.json_storage import atomic_write_json, WriteBehind
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CURRENT_MOVIE_FILE = '/app/data/current_movie.json'
+
+
+class CurrentMovieState:
+    """In-process holder for the movie shown on the poster.
+
+    Every reader (poster routes, DefaultPosterManager, PlaybackMonitor) shares this object
+    instead of round-tripping current_movie.json. Each change bumps ``version`` so clients
+    can poll with If-None-Match; ETags also carry a per-process epoch so a version number
+    seen before a restart never matches the new process. The file is still written, but
+    write-behind at most once per ``persist_interval`` seconds, so it only serves to
+    restore the poster after a restart.
+    """
+
+    def __init__(self, file_path=CURRENT_MOVIE_FILE, persist_interval=3.0):
+        self.file_path = file_path
+        self.persist_interval = persist_interval
+        self._lock = threading.RLock()
+        self._data = None
+        self._version = 0
+        self._epoch = format(time.time_ns(), 'x')
+        self._load_from_disk()
+        self._writer = WriteBehind(self.snapshot, self._write, interval=persist_interval,
+                                   name='current-movie-writer', persisted_version=self._version)
+
+    def _load_from_disk(self):
+        try:
+            if os.path.exists(self.file_path):
+                with open(self.file_path, 'r') as f:
+                    self._data = json.load(f)
+                self._version = 1
+        except Exception as e:
+            logger.error(f"Error loading current movie state from {self.file_path}: {e}")
+            self._data = None
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    @property
+    def etag(self):
+        return self.etag_for(self.version)
+
+    def etag_for(self, version):
+        """ETag for a version returned by snapshot()"""
+        return f'"cm-{self._epoch}-{version}"'
+
+    def exists(self):
+        with self._lock:
+            return self._data is not None
+
+    def get(self):
+        """Return a copy of the current movie record, or None when nothing is playing"""
+        with self._lock:
+            return copy.deepcopy(self._data) if self._data is not None else None
+
+    def snapshot(self):
+        """Return (version, copy of data) read atomically"""
+        with self._lock:
+            data = copy.deepcopy(self._data) if self._data is not None else None
+            return self._version, data
+
+    def set(self, data):
+        with self._lock:
+            self._data = copy.deepcopy(data) if data is not None else None
+            self._version += 1
+        self._schedule_persist()
+
+    def update(self, **fields):
+        """Merge fields into the current record; no-op when nothing is set"""
+        with self._lock:
+            if self._data is None:
+                return False
+            self._data.update(fields)
+            self._version += 1
+        self._schedule_persist()
+        return True
+
+    def clear(self):
+        with self._lock:
+            if self._data is None:
+                return
+            self._data = None
+            self._version += 1
+        self._schedule_persist()
+
+    def _schedule_persist(self):
+        self._writer.schedule()
+
+    def _write(self, data):
+        if data is None:
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+        else:
+            atomic_write_json(self.file_path, data)
+
+    def flush(self):
+        """Write the latest state to disk now (atomic replace, or delete when cleared)"""
+        self._writer.flush()
+
+
+current_movie_state = CurrentMovieState()
+atexit.register(current_movie_state.flush)
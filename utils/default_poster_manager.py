@@ -7,6 +7,7 @@ import random
 from flask_socketio import SocketIO
 from flask import current_app
 from utils.settings import settings
+from utils.current_movie_state import current_movie_state
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,7 +24,7 @@ class DefaultPosterManager:
         self.last_state = None
         self.state_change_time = None
         self.lock = threading.Lock()
-        self.current_movie_file = '/app/data/current_movie.json'
+        self.current_movie_state = current_movie_state
         self.default_poster = '/static/images/default_poster.png'
         self.is_default_poster_active = False
         self.poster_mode = 'default'  # 'default' or 'screensaver'
@@ -59,7 +60,7 @@ class DefaultPosterManager:
             logger.info(f"- Old interval: {old_interval} -> New interval: {new_interval}")
             logger.info(f"- Movie service available: {bool(self.movie_service)}")
 
-            has_active_movie = os.path.exists(self.current_movie_file)
+            has_active_movie = self.current_movie_state.exists()
 
             self.stop_screensaver()
 
@@ -230,7 +231,7 @@ class DefaultPosterManager:
         logger.info("Stopping screensaver")
         if hasattr(self, 'screensaver_event'):
             self.screensaver_event.set()
-        if not os.path.exists(self.current_movie_file):
+        if not self.current_movie_state.exists():
             self.is_default_poster_active = True
             logger.info("Setting default poster after stopping screensaver")
             self.socketio.emit('set_default_poster',
@@ -264,12 +265,7 @@ class DefaultPosterManager:
         with self.lock:
             logger.info(f"Setting default poster - Mode: {self.poster_mode}, Movie Service: {bool(self.movie_service)}")
             if self.last_state == 'STOPPED' and time.time() - self.state_change_time >= 300:  # 5 minutes
-                if os.path.exists(self.current_movie_file):
-                    with open(self.current_movie_file, 'r') as f:
-                        movie_data = json.load(f)
-                    movie_data['session_type'] = 'STOP'
-                    with open(self.current_movie_file, 'w') as f:
-                        json.dump(movie_data, f)
+                self.current_movie_state.update(session_type='STOP')
                 self.clear_current_movie()
                 self.is_default_poster_active = True
                 settings_data = settings.get_all()
@@ -289,8 +285,7 @@ class DefaultPosterManager:
                                        namespace='/poster')
 
     def clear_current_movie(self):
-        if os.path.exists(self.current_movie_file):
-            os.remove(self.current_movie_file)
+        self.current_movie_state.clear()
 
     def handle_playback_state(self, state):
         """Handle playback state changes"""
@@ -307,10 +302,9 @@ class DefaultPosterManager:
             if self.current_screensaver_poster:
                 self.current_screensaver_poster = None
                 logger.info("Cleared screensaver poster state")
-            if os.path.exists(self.current_movie_file):
-                with open(self.current_movie_file, 'r') as f:
-                    current_movie = json.load(f)
-                    logger.info(f"Maintaining current movie: {current_movie.get('movie', {}).get('title')}")
+            current_movie = self.current_movie_state.get()
+            if current_movie:
+                logger.info(f"Maintaining current movie: {current_movie.get('movie', {}).get('title')}")
         elif state == 'STOPPED':
             if not self.default_poster_timer:
                 logger.info("Movie STOPPED - starting 5-minute timer before default/screensaver")
@@ -324,29 +318,28 @@ class DefaultPosterManager:
 
     def get_current_poster(self):
         with self.lock:
-            if os.path.exists(self.current_movie_file):
+            current_movie = self.current_movie_state.get()
+            if current_movie:
                 try:
-                    with open(self.current_movie_file, 'r') as f:
-                        current_movie = json.load(f)
-                        poster_url = current_movie['movie']['poster']
-
-                        self.is_default_poster_active = False
-
-                        jellyfin_service = current_app.config.get('JELLYFIN_SERVICE')
-                        emby_service = current_app.config.get('EMBY_SERVICE')
-
-                        if '/library/metadata' in poster_url:  # Plex
-                            parts = poster_url.split('/library/metadata/')[1].split('?')[0]
-                            return f"/proxy/poster/plex/{parts}"
-                        elif '/Items/' in poster_url:  # Both Jellyfin and Emby
-                            item_id = poster_url.split('/Items/')[1].split('/Images')[0]
-                            if jellyfin_service and jellyfin_service.server_url in poster_url:
-                                return f"/proxy/poster/jellyfin/{item_id}"
-                            elif emby_service and emby_service.server_url in poster_url:
-                                return f"/proxy/poster/emby/{item_id}"
-                        return poster_url
+                    poster_url = current_movie['movie']['poster']
+
+                    self.is_default_poster_active = False
+
+                    jellyfin_service = current_app.config.get('JELLYFIN_SERVICE')
+                    emby_service = current_app.config.get('EMBY_SERVICE')
+
+                    if '/library/metadata' in poster_url:  # Plex
+                        parts = poster_url.split('/library/metadata/')[1].split('?')[0]
+                        return f"/proxy/poster/plex/{parts}"
+                    elif '/Items/' in poster_url:  # Both Jellyfin and Emby
+                        item_id = poster_url.split('/Items/')[1].split('/Images')[0]
+                        if jellyfin_service and jellyfin_service.server_url in poster_url:
+                            return f"/proxy/poster/jellyfin/{item_id}"
+                        elif emby_service and emby_service.server_url in poster_url:
+                            return f"/proxy/poster/emby/{item_id}"
+                    return poster_url
                 except Exception as e:
-                    logger.error(f"Error reading current movie file: {e}")
+                    logger.error(f"Error reading current movie state: {e}")
 
             if self.poster_mode == 'screensaver' and self.current_screensaver_poster:
                 url = self.current_screensaver_poster
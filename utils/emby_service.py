@@ -9,6 +9,8 @@ import uuid
 from threading import Thread, Lock
 from datetime import datetime, timedelta
 from .settings import settings
+from .leader_election import leadership
+from .json_storage import write_json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -357,7 +359,8 @@ class EmbyService:
         while self.running:
             try:
                 current_time = time.time()
-                if current_time - self.last_cache_update >= self.update_interval:
+                if (current_time - self.last_cache_update >= self.update_interval and
+                        leadership.is_leader('emby-cache-update')):
                     with self._cache_lock:
                         logger.info("Starting Emby cache update")
                         self.cache_all_emby_movies()
@@ -400,10 +403,7 @@ class EmbyService:
                     "year": movie.get('ProductionYear', '')
                 })
 
-            temp_path = f"{self.cache_path}.tmp"
-            with open(temp_path, 'w') as f:
-                json.dump(all_movies, f)
-            os.replace(temp_path, self.cache_path)
+            write_json(self.cache_path, all_movies)
 
             logger.info(f"Cached {len(all_movies)} total Emby movies")
 
@@ -411,6 +411,8 @@ class EmbyService:
             movies_with_tmdb = [m for m in all_movies if m.get('tmdb_id')]
             if movies_with_tmdb:
                 enrichment_cache.build_for_movies(movies_with_tmdb)
+                from utils.backdrop_pool import backdrop_pool
+                backdrop_pool.refresh_async(movies_with_tmdb)
 
             return all_movies
         except Exception as e:
@@ -1,95 +1,284 @@
+import atexit
+import heapq
+import itertools
 import os
 import json
 import logging
 import time
-from threading import Thread, RLock
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Condition, Thread, RLock
+
+from utils.json_storage import atomic_write_json, WriteBehind
+from utils.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 ENRICHMENT_CACHE_FILE = '/app/data/enrichment_cache.json'
+ENRICHMENT_CACHE_DIR = '/app/data/enrichment_cache'
+ENRICHMENT_SHARD_COUNT = 256
 ENRICHMENT_TTL_DAYS = 30
+BUILD_CONCURRENCY = 4
+MAX_ON_DEMAND_QUEUE = 200
+PRIORITY_ON_DEMAND = 0
+PRIORITY_BULK = 10
+# Requests per second per upstream; TMDB allows ~50/s and Trakt 1000 per 5 minutes.
+# The YouTube trailer fallback is throttled inside utils.youtube_trailer.
+SOURCE_RATE_LIMITS = {
+    'tmdb': 20,
+    'trakt': 3,
+}
+
+
+def _shard_of(tmdb_id):
+    tmdb_id = str(tmdb_id)
+    if tmdb_id.isdigit():
+        return int(tmdb_id) % ENRICHMENT_SHARD_COUNT
+    return zlib.crc32(tmdb_id.encode()) % ENRICHMENT_SHARD_COUNT
 
 
 class EnrichmentCache:
-    def __init__(self):
+    """Enrichment entries keyed by TMDb id, persisted as shard files.
+
+    Entries are spread over ``ENRICHMENT_SHARD_COUNT`` files by tmdb id, loaded the
+    first time an id in that shard is touched, and only shards that changed are
+    rewritten, so saving one entry costs one small file instead of the whole cache.
+
+    Bulk builds and on-demand lookups share one priority queue drained by at most
+    ``max_in_flight`` workers; on-demand jobs run first and duplicate ids coalesce.
+    """
+
+    def __init__(self, cache_dir=ENRICHMENT_CACHE_DIR, legacy_file=ENRICHMENT_CACHE_FILE,
+                 max_in_flight=BUILD_CONCURRENCY):
+        self.cache_dir = cache_dir
+        self.legacy_file = legacy_file
+        self.max_in_flight = max_in_flight
         self._cache = {}
         self._lock = RLock()
         self._building = False
-        self._pending = set()
-        self._load_from_disk()
+        self._work_ready = Condition(self._lock)
+        self._jobs = {}
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_flight = set()
+        self._workers = []
+        self._bulk_outstanding = 0
+        self._queue_stats = {'completed': 0, 'coalesced': 0, 'dropped': 0}
+        self._buckets = {source: TokenBucket(rate) for source, rate in SOURCE_RATE_LIMITS.items()}
+        self._source_executor = None
+        self._source_calls = {source: 0 for source in SOURCE_RATE_LIMITS}
+        self._progress = {'total': 0, 'processed': 0, 'enriched': 0, 'errors': 0,
+                          'started_at': None, 'finished_at': None}
+        self._loaded_shards = set()
+        self._shard_keys = {}
+        self._shard_versions = {}
+        self._written_versions = {}
+        self._version = 0
+        self._migrated = False
+        self._writer = WriteBehind(self._snapshot, self._write, interval=5.0, name='enrichment-writer')
 
     def _should_cache_logo(self):
         from utils.settings import settings
         return settings.get('features', {}).get('enable_movie_logos', True)
 
-    def _load_from_disk(self):
-        if not os.path.exists(ENRICHMENT_CACHE_FILE):
+    def _shard_path(self, shard):
+        return os.path.join(self.cache_dir, f"{shard:02x}.json")
+
+    def _migrate_legacy_file(self):
+        """Split the old single-file cache into shards once, then remove it.
+
+        Entries are merged into any shard files already on disk (those are newer and
+        win) and written directly, so the legacy file is only removed after every
+        shard write succeeded; on failure it stays for the next start to retry.
+        """
+        self._migrated = True
+        if not os.path.exists(self.legacy_file):
             return
         try:
-            if os.path.getsize(ENRICHMENT_CACHE_FILE) == 0:
-                return
-            with open(ENRICHMENT_CACHE_FILE, 'r') as f:
-                self._cache = json.load(f)
-            logger.info(f"Loaded {len(self._cache)} enriched entries from disk")
+            if os.path.getsize(self.legacy_file) > 0:
+                with open(self.legacy_file, 'r') as f:
+                    legacy = json.load(f)
+                by_shard = {}
+                for tmdb_id, entry in legacy.items():
+                    by_shard.setdefault(_shard_of(tmdb_id), {})[str(tmdb_id)] = entry
+                for shard, entries in by_shard.items():
+                    path = self._shard_path(shard)
+                    if os.path.exists(path):
+                        with open(path, 'r') as f:
+                            entries.update(json.load(f))
+                    for entry in entries.values():
+                        credits = entry.get('credits')
+                        if credits and 'cast_total' not in credits:
+                            from utils.tmdb_service import project_credits
+                            entry['credits'] = project_credits(credits)
+                    atomic_write_json(path, entries)
+                logger.info(f"Migrated {len(legacy)} enriched entries into {self.cache_dir}")
+            os.remove(self.legacy_file)
         except Exception as e:
-            logger.error(f"Error loading enrichment cache: {e}")
-            self._cache = {}
+            logger.error(f"Error migrating legacy enrichment cache, keeping {self.legacy_file}: {e}")
 
-    def _save_to_disk(self):
-        temp_path = ENRICHMENT_CACHE_FILE + '.tmp'
-        try:
+    def _ensure_shard(self, shard):
+        if shard in self._loaded_shards:
+            return
+        with self._lock:
+            if not self._migrated:
+                self._migrate_legacy_file()
+            if shard in self._loaded_shards:
+                return
+            path = self._shard_path(shard)
+            try:
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        for tmdb_id, entry in json.load(f).items():
+                            if tmdb_id not in self._cache:
+                                self._cache[tmdb_id] = entry
+                                self._shard_keys.setdefault(shard, set()).add(tmdb_id)
+                                self._slim_credits(tmdb_id, entry)
+            except Exception as e:
+                logger.error(f"Error loading enrichment shard {path}: {e}")
+            self._loaded_shards.add(shard)
+
+    def _slim_credits(self, tmdb_id, entry):
+        # Entries written before credits were projected carry the raw TMDB payload
+        credits = entry.get('credits')
+        if credits and 'cast_total' not in credits:
+            from utils.tmdb_service import project_credits
+            entry['credits'] = project_credits(credits)
+            self._mark_dirty(tmdb_id)
+
+    def _load_all(self):
+        for shard in range(ENRICHMENT_SHARD_COUNT):
+            self._ensure_shard(shard)
+
+    def _mark_dirty(self, tmdb_id):
+        shard = _shard_of(tmdb_id)
+        self._shard_versions[shard] = self._shard_versions.get(shard, 0) + 1
+        self._version += 1
+
+    def _put(self, tmdb_id, entry):
+        tmdb_id = str(tmdb_id)
+        self._cache[tmdb_id] = entry
+        self._shard_keys.setdefault(_shard_of(tmdb_id), set()).add(tmdb_id)
+        self._mark_dirty(tmdb_id)
+
+    def _snapshot(self):
+        with self._lock:
+            dirty = {}
+            for shard, version in self._shard_versions.items():
+                if self._written_versions.get(shard) != version:
+                    entries = {k: self._cache[k] for k in self._shard_keys.get(shard, ())}
+                    dirty[shard] = (version, entries)
+            return self._version, dirty
+
+    def _write(self, dirty):
+        for shard, (version, entries) in dirty.items():
+            atomic_write_json(self._shard_path(shard), entries)
             with self._lock:
-                data = dict(self._cache)
-            with open(temp_path, 'w') as f:
-                json.dump(data, f)
-            os.replace(temp_path, ENRICHMENT_CACHE_FILE)
-        except Exception as e:
-            logger.error(f"Error saving enrichment cache: {e}")
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
+                self._written_versions[shard] = version
+        if dirty:
+            logger.debug(f"Persisted {len(dirty)} enrichment shards")
+
+    def _save_to_disk(self):
+        """Write every shard changed since the last save"""
+        self._writer.flush()
+
+    def flush(self):
+        self._writer.flush()
 
     def get(self, tmdb_id):
+        self._ensure_shard(_shard_of(tmdb_id))
         with self._lock:
             return self._cache.get(str(tmdb_id))
 
     def set(self, tmdb_id, data):
+        self._ensure_shard(_shard_of(tmdb_id))
         with self._lock:
-            self._cache[str(tmdb_id)] = data
+            self._put(tmdb_id, data)
 
-    def enrich_single(self, tmdb_id, title, year):
-        """Fetch enrichment data for one movie. Returns dict."""
-        from utils.tmdb_service import tmdb_service
-        from utils.youtube_trailer import search_youtube_trailer
+    def update_field(self, tmdb_id, key, value):
+        """Change one field of an existing entry; returns False if it is not cached"""
+        self._ensure_shard(_shard_of(tmdb_id))
+        with self._lock:
+            entry = self._cache.get(str(tmdb_id))
+            if entry is None:
+                return False
+            entry[key] = value
+            self._mark_dirty(tmdb_id)
+        return True
 
-        credits = None
-        try:
-            credits = tmdb_service.get_movie_cast(tmdb_id)
-        except Exception as e:
-            logger.warning(f"Error getting credits for tmdb_id={tmdb_id}: {e}")
+    def get_links(self, tmdb_id):
+        """Return cached (tmdb_url, trakt_url, imdb_url) without any network calls."""
+        if not tmdb_id:
+            return None, None, None
+        entry = self.get(tmdb_id) or {}
+        tmdb_url = entry.get('tmdb_url') or f"https://www.themoviedb.org/movie/{tmdb_id}"
+        return tmdb_url, entry.get('trakt_url'), entry.get('imdb_url')
 
-        tmdb_url = f"https://www.themoviedb.org/movie/{tmdb_id}"
-        trakt_url = None
-        imdb_url = None
-        try:
-            tmdb_url, trakt_url, imdb_url = tmdb_service.get_movie_links(tmdb_id)
-        except Exception as e:
-            logger.warning(f"Error getting links for tmdb_id={tmdb_id}: {e}")
+    def apply_links(self, movie_data):
+        """Fill missing link fields of movie_data in place from the cache."""
+        tmdb_url, trakt_url, imdb_url = self.get_links(movie_data.get('tmdb_id'))
+        for key, value in (('tmdb_url', tmdb_url), ('trakt_url', trakt_url), ('imdb_url', imdb_url)):
+            if value and not movie_data.get(key):
+                movie_data[key] = value
+        return movie_data
 
-        trailer_url = None
-        try:
-            trailer_url = search_youtube_trailer(title, year)
-        except Exception as e:
-            logger.warning(f"Error getting trailer for '{title}': {e}")
+    def _get_source_executor(self):
+        # Created lazily so the pool uses eventlet-patched threads in production
+        with self._lock:
+            if self._source_executor is None:
+                self._source_executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight * 4, thread_name_prefix='enrichment-source')
+            return self._source_executor
+
+    def _call_source(self, sources, func, *args):
+        """Run one upstream call after taking a token from each source it hits"""
+        for source in sources:
+            self._buckets[source].acquire()
+            with self._lock:
+                self._source_calls[source] += 1
+        return func(*args)
+
+    def _link_sources(self, tmdb_id):
+        from utils.trakt_id_map import trakt_id_map
+        known, _ = trakt_id_map.lookup(tmdb_id)
+        return () if known else ('trakt',)
 
-        logo_url = None
+    def enrich_single(self, tmdb_id, title, year):
+        """Fetch enrichment data for one movie, querying independent sources concurrently. Returns dict."""
+        from utils.tmdb_service import tmdb_service, project_credits
+        from utils.youtube_trailer import trailer_resolver
+
+        # The TMDB facets are all served by one appended movie record, so only the
+        # first task is charged a TMDB token; the rest join that request
+        tasks = {
+            'credits': (('tmdb',), tmdb_service.get_movie_cast, (tmdb_id,)),
+            'links': (self._link_sources(tmdb_id), tmdb_service.get_movie_links, (tmdb_id,)),
+            'trailer': ((), trailer_resolver.resolve, (tmdb_id, title, year)),
+        }
         if self._should_cache_logo():
+            tasks['logo'] = ((), tmdb_service.get_movie_logo_url, (tmdb_id,))
+
+        executor = self._get_source_executor()
+        futures = {
+            executor.submit(self._call_source, sources, func, *args): name
+            for name, (sources, func, args) in tasks.items()
+        }
+        results = {}
+        for future in as_completed(futures):
+            name = futures[future]
             try:
-                logo_url = tmdb_service.get_movie_logo_url(tmdb_id)
+                results[name] = future.result()
             except Exception as e:
-                logger.warning(f"Error getting logo for tmdb_id={tmdb_id}: {e}")
+                logger.warning(f"Error getting {name} for tmdb_id={tmdb_id} ('{title}'): {e}")
+
+        credits = project_credits(results.get('credits'))
+        tmdb_url = f"https://www.themoviedb.org/movie/{tmdb_id}"
+        trakt_url = None
+        imdb_url = None
+        if results.get('links') and results['links'][0]:
+            tmdb_url, trakt_url, imdb_url = results['links']
+        trailer_url = results.get('trailer')
+        logo_url = results.get('logo')
 
         return {
             'tmdb_id': str(tmdb_id),
@@ -103,68 +292,175 @@ class EnrichmentCache:
         }
 
     def build_for_movies(self, movies, force=False):
-        """Start background enrichment build for a list of movies."""
-        if self._building and not force:
-            logger.info("Enrichment build already in progress, skipping")
-            return
-        Thread(target=self._build_worker, args=(list(movies), force), daemon=True).start()
+        """Queue background enrichment for a list of movies behind any on-demand work."""
+        Thread(target=self._queue_build, args=(list(movies), force), daemon=True,
+               name='enrichment-build-queue').start()
 
-    def _build_worker(self, movies, force):
-        self._building = True
-        logger.info(f"Enrichment build starting for {len(movies)} movies")
-        saved = 0
-        errors = 0
-        try:
-            for i, movie in enumerate(movies):
-                tmdb_id = movie.get('tmdb_id')
-                if not tmdb_id:
-                    continue
-
-                if not force:
-                    existing = self.get(tmdb_id)
-                    if existing:
-                        age_days = (time.time() - existing.get('enriched_at', 0)) / 86400
-                        if age_days < ENRICHMENT_TTL_DAYS:
-                            continue
-
-                try:
-                    entry = self.enrich_single(tmdb_id, movie.get('title', ''), movie.get('year', ''))
-                    self.set(tmdb_id, entry)
-                    saved += 1
-                    if saved % 50 == 0:
-                        self._save_to_disk()
-                        logger.info(f"Enrichment progress: {i + 1}/{len(movies)}, {saved} new")
-                    time.sleep(0.25)
-                except Exception as e:
-                    logger.error(f"Error enriching tmdb_id={tmdb_id}: {e}")
-                    errors += 1
+    def _queue_build(self, movies, force):
+        todo = [m for m in movies if m.get('tmdb_id') and self._needs_enrichment(m['tmdb_id'], force)]
+        queued = 0
+        for movie in todo:
+            queued += self._enqueue(movie['tmdb_id'], movie.get('title', ''), movie.get('year', ''),
+                                    PRIORITY_BULK, force=force, bulk=True)
+        logger.info(f"Enrichment build queued {queued} of {len(movies)} movies")
 
-            self._save_to_disk()
-            logger.info(f"Enrichment build done: {saved} enriched, {errors} errors")
-        except Exception as e:
-            logger.error(f"Enrichment build worker error: {e}")
-        finally:
-            self._building = False
+    def _needs_enrichment(self, tmdb_id, force):
+        if force:
+            return True
+        existing = self.get(tmdb_id)
+        if not existing:
+            return True
+        age_days = (time.time() - existing.get('enriched_at', 0)) / 86400
+        return age_days >= ENRICHMENT_TTL_DAYS
 
     def enrich_on_demand(self, tmdb_id, title, year):
-        """Trigger single-movie background enrichment if not already cached or pending."""
-        tmdb_id_str = str(tmdb_id)
-        with self._lock:
-            if tmdb_id_str in self._cache or tmdb_id_str in self._pending:
-                return
-            self._pending.add(tmdb_id_str)
-        Thread(target=self._on_demand_worker, args=(tmdb_id_str, title, year), daemon=True).start()
+        """Enrich one movie ahead of any bulk work if it is not already cached or queued."""
+        if self.get(tmdb_id) is not None:
+            return False
+        return self._enqueue(tmdb_id, title, year, PRIORITY_ON_DEMAND)
+
+    def _enqueue(self, tmdb_id, title, year, priority, force=False, bulk=False):
+        """Add or promote a job in the shared queue; returns False if it coalesced or was dropped"""
+        tmdb_id = str(tmdb_id)
+        with self._work_ready:
+            job = self._jobs.get(tmdb_id)
+            if tmdb_id in self._in_flight or job:
+                self._queue_stats['coalesced'] += 1
+                if job:
+                    job['force'] = job['force'] or force
+                    if bulk and not job['bulk']:
+                        job['bulk'] = True
+                        self._start_bulk_job()
+                    if priority < job['priority']:
+                        # On-demand requests jump ahead; the old heap entry goes stale
+                        job['priority'] = priority
+                        heapq.heappush(self._queue, (priority, next(self._seq), tmdb_id))
+                        self._work_ready.notify()
+                        return True
+                return False
+            if not bulk and self._queued_on_demand() >= MAX_ON_DEMAND_QUEUE:
+                self._queue_stats['dropped'] += 1
+                return False
+            self._jobs[tmdb_id] = {'title': title, 'year': year, 'priority': priority,
+                                   'force': force, 'bulk': bulk}
+            if bulk:
+                self._start_bulk_job()
+            heapq.heappush(self._queue, (priority, next(self._seq), tmdb_id))
+            self._ensure_workers()
+            self._work_ready.notify()
+        return True
+
+    def _queued_on_demand(self):
+        return sum(1 for job in self._jobs.values() if job['priority'] == PRIORITY_ON_DEMAND)
+
+    def _start_bulk_job(self):
+        if self._bulk_outstanding == 0:
+            self._building = True
+            self._progress = {'total': 0, 'processed': 0, 'enriched': 0, 'errors': 0,
+                              'started_at': time.time(), 'finished_at': None}
+        self._bulk_outstanding += 1
+        self._progress['total'] += 1
+
+    def _ensure_workers(self):
+        while len(self._workers) < self.max_in_flight:
+            worker = Thread(target=self._worker_loop, daemon=True,
+                            name=f"enrichment-worker-{len(self._workers)}")
+            self._workers.append(worker)
+            worker.start()
 
-    def _on_demand_worker(self, tmdb_id_str, title, year):
+    def _next_job(self):
+        while self._queue:
+            priority, _, tmdb_id = heapq.heappop(self._queue)
+            job = self._jobs.get(tmdb_id)
+            if job and job['priority'] == priority:
+                del self._jobs[tmdb_id]
+                return tmdb_id, job
+        return None, None
+
+    def _worker_loop(self):
+        while True:
+            with self._work_ready:
+                tmdb_id, job = self._next_job()
+                while job is None:
+                    self._work_ready.wait()
+                    tmdb_id, job = self._next_job()
+                self._in_flight.add(tmdb_id)
+            self._run_job(tmdb_id, job)
+
+    def _run_job(self, tmdb_id, job):
+        ok = True
         try:
-            entry = self.enrich_single(tmdb_id_str, title, year)
-            self.set(tmdb_id_str, entry)
-            self._save_to_disk()
+            if self._needs_enrichment(tmdb_id, job['force']):
+                entry = self.enrich_single(tmdb_id, job['title'], job['year'])
+                self.set(tmdb_id, entry)
+                self._writer.schedule()
         except Exception as e:
-            logger.error(f"On-demand enrichment error for tmdb_id={tmdb_id_str}: {e}")
-        finally:
-            with self._lock:
-                self._pending.discard(tmdb_id_str)
+            logger.error(f"Error enriching tmdb_id={tmdb_id}: {e}")
+            ok = False
+
+        build_done = False
+        processed = None
+        with self._work_ready:
+            self._in_flight.discard(tmdb_id)
+            self._queue_stats['completed'] += 1
+            if job['bulk']:
+                self._progress['processed'] += 1
+                self._progress['enriched' if ok else 'errors'] += 1
+                processed = self._progress['processed']
+                self._bulk_outstanding -= 1
+                if self._bulk_outstanding == 0:
+                    self._progress['finished_at'] = time.time()
+                    self._building = False
+                    build_done = True
+            self._work_ready.notify_all()
+
+        if build_done:
+            self._save_to_disk()
+            stats = self.get_stats()
+            logger.info(f"Enrichment build done: {stats['enriched']} enriched, {stats['errors']} errors "
+                        f"in {stats['elapsed_seconds']:.0f}s")
+        elif processed and processed % 50 == 0:
+            stats = self.get_stats()
+            logger.info(f"Enrichment progress: {processed}/{stats['total']} "
+                        f"({stats['throughput_per_minute']:.0f}/min, {stats['queue']['queued']} queued)")
+
+    def wait_idle(self, timeout=None):
+        """Block until no jobs are queued or running; returns False on timeout"""
+        with self._work_ready:
+            return self._work_ready.wait_for(lambda: not self._jobs and not self._in_flight, timeout)
+
+    def get_stats(self):
+        """Progress of the current or last build, queue depth and upstream call counters."""
+        with self._lock:
+            progress = dict(self._progress)
+            source_calls = dict(self._source_calls)
+            cached = len(self._cache)
+            on_demand = self._queued_on_demand()
+            queue = {
+                'queued': len(self._jobs),
+                'queued_on_demand': on_demand,
+                'queued_bulk': len(self._jobs) - on_demand,
+                'in_flight': len(self._in_flight),
+                'max_in_flight': self.max_in_flight,
+                **self._queue_stats,
+            }
+        started = progress['started_at']
+        elapsed = ((progress['finished_at'] or time.time()) - started) if started else 0
+        return {
+            'building': self._building,
+            'cached_entries': cached,
+            **progress,
+            'elapsed_seconds': elapsed,
+            'throughput_per_minute': progress['processed'] * 60 / elapsed if elapsed else 0,
+            'queue': queue,
+            'source_calls': source_calls,
+            'trailers': self._trailer_stats(),
+        }
+
+    @staticmethod
+    def _trailer_stats():
+        from utils.youtube_trailer import trailer_resolver
+        return dict(trailer_resolver.stats)
 
     def build_logos_for_all(self):
         """Fetch missing logos for all cached entries (called when logo setting is enabled)."""
@@ -174,19 +470,16 @@ class EnrichmentCache:
         from utils.tmdb_service import tmdb_service
         logger.info("Building missing logos for all enriched entries")
         updated = 0
+        self._load_all()
         with self._lock:
             entries = list(self._cache.items())
         for tmdb_id_str, entry in entries:
             if entry.get('logo_url'):
                 continue
             try:
-                logo_url = tmdb_service.get_movie_logo_url(int(tmdb_id_str))
-                if logo_url:
-                    with self._lock:
-                        if tmdb_id_str in self._cache:
-                            self._cache[tmdb_id_str]['logo_url'] = logo_url
+                logo_url = self._call_source(('tmdb',), tmdb_service.get_movie_logo_url, int(tmdb_id_str))
+                if logo_url and self.update_field(tmdb_id_str, 'logo_url', logo_url):
                     updated += 1
-                time.sleep(0.25)
             except Exception as e:
                 logger.warning(f"Error getting logo for tmdb_id={tmdb_id_str}: {e}")
         if updated > 0:
@@ -195,3 +488,4 @@ class EnrichmentCache:
 
 
 enrichment_cache = EnrichmentCache()
+atexit.register(enrichment_cache.flush)
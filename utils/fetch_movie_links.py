@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 from plexapi.server import PlexServer
 from utils.settings import settings
 import logging
@@ -16,7 +15,7 @@ BATCH_SIZE = 20
 
 def initialize_services():
     """Initialize services based on settings"""
-    global PLEX_AVAILABLE, JELLYFIN_AVAILABLE, plex, PLEX_MOVIE_LIBRARIES
+    global PLEX_AVAILABLE, JELLYFIN_AVAILABLE, plex, PLEX_MOVIE_LIBRARIES, _plex_credentials
 
     plex_settings = settings.get('plex', {})
     jellyfin_settings = settings.get('jellyfin', {})
@@ -50,21 +49,39 @@ def initialize_services():
 
             PLEX_MOVIE_LIBRARIES = [lib.strip() for lib in PLEX_MOVIE_LIBRARIES if lib.strip()]
 
-            plex = PlexServer(plex_url, plex_token)
-            logger.info(f"Plex initialized with URL: {plex_url}, Libraries: [REDACTED]")
+            # Connected on first lookup so importing this module never blocks on Plex
+            plex = None
+            _plex_credentials = (plex_url, plex_token)
+            logger.info(f"Plex configured with URL: {plex_url}, Libraries: [REDACTED]")
         except Exception as e:
             logger.error(f"Error initializing Plex: {e}")
             PLEX_AVAILABLE = False
             plex = None
+            _plex_credentials = None
             PLEX_MOVIE_LIBRARIES = []
     else:
         plex = None
+        _plex_credentials = None
         PLEX_MOVIE_LIBRARIES = []
 
 PLEX_AVAILABLE = False
 JELLYFIN_AVAILABLE = False
 plex = None
 PLEX_MOVIE_LIBRARIES = []
+_plex_credentials = None
+_plex_connect_lock = Lock()
+
+def _get_plex():
+    """Plex connection for id lookups, opened on first use"""
+    global plex
+    if plex is None and _plex_credentials:
+        with _plex_connect_lock:
+            if plex is None:
+                try:
+                    plex = PlexServer(*_plex_credentials)
+                except Exception as e:
+                    logger.error(f"Error connecting to Plex: {e}")
+    return plex
 
 initialize_services()
 
@@ -77,13 +94,14 @@ def get_tmdb_id_from_plex(movie_id, title):
         if cache_key in TMDB_ID_CACHE:
             return TMDB_ID_CACHE[cache_key]
 
-    if not PLEX_AVAILABLE or not plex:
+    plex_server = _get_plex() if PLEX_AVAILABLE else None
+    if not plex_server:
         return None
 
     try:
         for library_name in PLEX_MOVIE_LIBRARIES:
             try:
-                library = plex.library.section(library_name.strip())
+                library = plex_server.library.section(library_name.strip())
                 try:
                     movie = library.fetchItem(int(movie_id))
                     for guid in movie.guids:
@@ -114,42 +132,16 @@ def get_tmdb_id_from_jellyfin(movie_data):
     provider_ids = movie_data.get('ProviderIds', {})
     return provider_ids.get('Tmdb')
 
-@lru_cache(maxsize=1000)
 def fetch_movie_links_from_tmdb_id(tmdb_id):
-    """Cached version of link fetching with optimized Trakt request"""
+    """Link lookup backed by the persistent Trakt id map"""
     if not tmdb_id:
         return None, None, None
 
     tmdb_url = f"https://www.themoviedb.org/movie/{tmdb_id}"
 
     try:
-        movie = tmdb_service.get_movie_details(tmdb_id)
-        if not movie:
-            return tmdb_url, None, None
-
-        imdb_id = movie.get('imdb_id')
-        imdb_url = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
-
-        trakt_url = None
-        trakt_client_id = os.getenv('TRAKT_CLIENT_ID', '')
-        if trakt_client_id:
-            try:
-                response = requests.get(
-                    f"https://api.trakt.tv/search/tmdb/{tmdb_id}?type=movie",
-                    headers={
-                        'Content-Type': 'application/json',
-                        'trakt-api-version': '2',
-                        'trakt-api-key': trakt_client_id
-                    },
-                    timeout=2
-                )
-                if response.ok and response.json():
-                    trakt_id = response.json()[0]['movie']['ids']['slug']
-                    trakt_url = f"https://trakt.tv/movies/{trakt_id}"
-            except (requests.RequestException, KeyError, IndexError) as e:
-                logger.debug(f"Trakt lookup failed for TMDb ID {tmdb_id}: {e}")
-
-        return tmdb_url, trakt_url, imdb_url
+        links = tmdb_service.get_movie_links(tmdb_id)
+        return links if links[0] else (tmdb_url, None, None)
     except Exception as e:
         logger.error(f"Error fetching movie links for TMDb ID {tmdb_id}: {e}")
         return tmdb_url, None, None
@@ -0,0 +1,201 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# fsync every write before the rename; caches can be rebuilt, so by default only
+# callers that pass fsync=True (settings, user records) pay for durability
+FSYNC = os.getenv('JSON_STORAGE_FSYNC', '').lower() in ('1', 'true', 'yes')
+READ_CACHE_SIZE = 64
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+_read_cache = OrderedDict()
+_read_cache_lock = threading.Lock()
+
+
+def atomic_write_json(path, data, fsync=None, **dump_kwargs):
+    """Write JSON to path via a uniquely named temp file in the same directory + os.replace"""
+    fsync = FSYNC if fsync is None else fsync
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+@contextmanager
+def file_lock(path):
+    """Serialize writers of one file across threads and, via an flock'd sidecar, processes"""
+    path = os.path.abspath(path)
+    with _path_locks_guard:
+        lock = _path_locks.setdefault(path, threading.RLock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(os.path.join(directory, f".{os.path.basename(path)}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _remember(path, data, stamp=None):
+    try:
+        stamp = stamp or _stamp(path)
+    except OSError:
+        return
+    with _read_cache_lock:
+        _read_cache[path] = (stamp, data)
+        _read_cache.move_to_end(path)
+        while len(_read_cache) > READ_CACHE_SIZE:
+            _read_cache.popitem(last=False)
+
+
+def write_json(path, data, fsync=None, **dump_kwargs):
+    """Atomically replace path under its lock; later read_json calls see data without re-parsing"""
+    path = os.path.abspath(path)
+    with file_lock(path):
+        atomic_write_json(path, data, fsync=fsync, **dump_kwargs)
+        _remember(path, data)
+
+
+def update_json(path, mutate, default=None, fsync=None, **dump_kwargs):
+    """Read-modify-write path under its lock; mutate(data) edits in place or returns a replacement"""
+    path = os.path.abspath(path)
+    with file_lock(path):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = default
+        result = mutate(data)
+        if result is not None:
+            data = result
+        atomic_write_json(path, data, fsync=fsync, **dump_kwargs)
+        _remember(path, data)
+        return data
+
+
+def read_json(path, default=None):
+    """Parsed contents of path, reused while the file is unchanged; treat the result as read-only.
+
+    Files are only ever replaced whole, so a reader never sees a half-written one and
+    a decode error means the file itself is bad; ``default`` is returned in that case.
+    """
+    path = os.path.abspath(path)
+    try:
+        stamp = _stamp(path)
+    except OSError:
+        return default
+    with _read_cache_lock:
+        cached = _read_cache.get(path)
+        if cached and cached[0] == stamp:
+            _read_cache.move_to_end(path)
+            return cached[1]
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading {path}: {e}")
+        return default
+    # Stamped with the stat taken before the read: if the file was replaced meanwhile
+    # the next call sees a different stamp and parses again
+    _remember(path, data, stamp)
+    return data
+
+
+def forget(path):
+    """Drop path from the read cache, e.g. after deleting the file"""
+    with _read_cache_lock:
+        _read_cache.pop(os.path.abspath(path), None)
+
+
+class WriteBehind:
+    """Coalesces change notifications into background writes.
+
+    ``snapshot()`` returns ``(version, data)`` from the owner and ``write(data)`` persists it.
+    ``schedule()`` is cheap to call on every change: a daemon thread flushes at most once per
+    ``interval`` seconds and exits after a minute idle. Flushes are serialized, so the atexit
+    flush and the writer thread can never race an older snapshot over a newer one.
+    """
+
+    def __init__(self, snapshot, write, interval=2.0, name='write-behind', persisted_version=0):
+        self._snapshot = snapshot
+        self._write = write
+        self.interval = interval
+        self.name = name
+        self._persisted_version = persisted_version
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._thread = None
+
+    def schedule(self):
+        with self._lock:
+            self._dirty.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name=self.name)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            if not self._dirty.wait(timeout=60):
+                with self._lock:
+                    if not self._dirty.is_set():
+                        self._thread = None
+                        return
+                continue
+            self._dirty.clear()
+            self.flush()
+            # Coalesce bursts of changes into at most one write per interval
+            time.sleep(self.interval)
+
+    def flush(self):
+        """Persist the owner's latest snapshot now if it changed since the last write"""
+        with self._flush_lock:
+            version, data = self._snapshot()
+            if version == self._persisted_version:
+                return
+            try:
+                self._write(data)
+                self._persisted_version = version
+            except Exception as e:
+                logger.error(f"Error persisting {self.name}: {e}")
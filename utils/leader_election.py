@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: there is only ever one process to elect
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = os.getenv('LEADER_LOCK_DIR', '/app/data/locks')
+
+
+class LeaderElection:
+    """File-lock leases so exactly one worker process runs each background job.
+
+    Each job name maps to a lock file; the process holding an exclusive flock on it
+    is the leader and records its pid there. The kernel drops the lock however the
+    holder dies, and the next follower to call is_leader() takes over, so failover
+    needs no heartbeats. Followers retry at most once per ``retry_interval`` seconds.
+    """
+
+    RETRY_INTERVAL = 15
+
+    def __init__(self, lock_dir=LOCK_DIR, retry_interval=RETRY_INTERVAL):
+        self.lock_dir = lock_dir
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._held = {}
+        self._last_attempt = {}
+
+    def _path(self, name):
+        return os.path.join(self.lock_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', name) + '.lock')
+
+    def is_leader(self, name):
+        """True if this process owns the lease for a job, acquiring it when it is free"""
+        if fcntl is None:
+            return True
+        with self._lock:
+            lease = self._held.get(name)
+            if lease and lease['pid'] == os.getpid():
+                return True
+            if lease:
+                # Inherited across fork; the parent still owns the lock
+                os.close(lease['fd'])
+                del self._held[name]
+
+            now = time.monotonic()
+            last = self._last_attempt.get(name)
+            if last is not None and now - last < self.retry_interval:
+                return False
+            self._last_attempt[name] = now
+
+            try:
+                os.makedirs(self.lock_dir, exist_ok=True)
+                fd = os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                # Without a lock file there is no way to coordinate; keep the job running here
+                logger.error(f"Cannot open lease file for '{name}': {e}")
+                return True
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+
+            acquired_at = time.time()
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps({'pid': os.getpid(), 'host': socket.gethostname(),
+                                     'acquired_at': acquired_at}).encode())
+            self._held[name] = {'fd': fd, 'pid': os.getpid(), 'acquired_at': acquired_at}
+        logger.info(f"Process {os.getpid()} is now leader for '{name}'")
+        return True
+
+    def release(self, name):
+        with self._lock:
+            lease = self._held.pop(name, None)
+            self._last_attempt.pop(name, None)
+        if lease:
+            fcntl.flock(lease['fd'], fcntl.LOCK_UN)
+            os.close(lease['fd'])
+            logger.info(f"Process {os.getpid()} released leadership for '{name}'")
+
+    def _read_holder(self, name):
+        try:
+            with open(self._path(name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def status(self):
+        """Lease state for every job this process has competed for"""
+        with self._lock:
+            names = set(self._held) | set(self._last_attempt)
+            held = {name: dict(lease) for name, lease in self._held.items()}
+        result = {}
+        for name in sorted(names):
+            holder = self._read_holder(name)
+            result[name] = {
+                'leader': name in held and held[name]['pid'] == os.getpid(),
+                'holder_pid': holder.get('pid') if holder else None,
+                'holder_host': holder.get('host') if holder else None,
+                'since': holder.get('acquired_at') if holder else None,
+            }
+        return {'pid': os.getpid(), 'leases': result}
+
+
+leadership = LeaderElection()
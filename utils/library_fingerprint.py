@@ -0,0 +1,94 @@
+import logging
+import os
+
+from utils.json_storage import forget, read_json, write_json
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_SUFFIX = '.fingerprint.json'
+_COUNT_ONLY = 'type=1&X-Plex-Container-Start=0&X-Plex-Container-Size=0'
+
+
+def fingerprint_path(cache_path):
+    return os.path.splitext(cache_path)[0] + FINGERPRINT_SUFFIX
+
+
+def _total_size(plex, path):
+    container = plex.query(path)
+    return int(container.attrib.get('totalSize', container.attrib.get('size', 0)))
+
+
+def compute_fingerprint(plex, library_names):
+    """Cheap per-section summary of a library as seen by one user.
+
+    One /library/sections listing plus two count-only queries per section:
+    movie count, and unwatched count from the given user's perspective.
+    ``updated_at`` moves when a section is scanned. Raises on any Plex error, or
+    when ``plex`` is None because no connection as that user is available.
+    """
+    if plex is None:
+        raise ConnectionError("no Plex connection with the user's own perspective")
+    wanted = set(library_names)
+    fingerprint = {}
+    for section in plex.library.sections():
+        if section.title not in wanted:
+            continue
+        base = f'/library/sections/{section.key}/all?{_COUNT_ONLY}'
+        updated_at = getattr(section, 'updatedAt', None)
+        fingerprint[section.title] = {
+            'total': _total_size(plex, base),
+            'unwatched': _total_size(plex, f'{base}&unwatched=1'),
+            'updated_at': int(updated_at.timestamp()) if updated_at else None,
+        }
+    missing = wanted - set(fingerprint)
+    if missing:
+        raise LookupError(f"Libraries not found on Plex server: {', '.join(sorted(missing))}")
+    return fingerprint
+
+
+def save_fingerprint(cache_path, plex, library_names):
+    """Store the current fingerprint next to a freshly written cache.
+
+    When it cannot be computed, the previous fingerprint (which describes older
+    data) is removed so the next validation falls back to the count check.
+    """
+    try:
+        write_json(fingerprint_path(cache_path), compute_fingerprint(plex, library_names))
+    except Exception as e:
+        logger.warning(f"Could not record library fingerprint for {cache_path}: {e}")
+        try:
+            os.remove(fingerprint_path(cache_path))
+            forget(fingerprint_path(cache_path))
+        except FileNotFoundError:
+            pass
+        except OSError as remove_err:
+            logger.error(f"Could not remove stale fingerprint for {cache_path}: {remove_err}")
+
+
+def verify_fingerprint(cache_path, plex, library_names, cached_count):
+    """True unless the library demonstrably changed since the cache at cache_path was built.
+
+    Errors talking to Plex keep the cache: a flaky connection is no reason for a
+    multi-minute rebuild. Caches from before fingerprints existed are accepted when
+    their size matches the server's unwatched count, and the fingerprint is recorded.
+    """
+    try:
+        current = compute_fingerprint(plex, library_names)
+    except Exception as e:
+        logger.warning(f"Cache validation skipped for {cache_path}, keeping cache (Plex unavailable: {e})")
+        return True
+
+    stored = read_json(fingerprint_path(cache_path))
+    if stored is None:
+        unwatched = sum(section['unwatched'] for section in current.values())
+        if unwatched != cached_count:
+            logger.info(f"Cache validation: {cached_count} cached vs {unwatched} unwatched on server for {cache_path}")
+            return False
+        write_json(fingerprint_path(cache_path), current)
+        return True
+
+    if stored != current:
+        changed = sorted(name for name in set(stored) | set(current) if stored.get(name) != current.get(name))
+        logger.info(f"Cache validation: library changed since {cache_path} was built ({', '.join(changed)})")
+        return False
+    return True
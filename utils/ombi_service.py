@@ -1,10 +1,10 @@
 import os
 import requests
 import logging
-import json
 from dotenv import load_dotenv
 from utils.settings import settings
 from utils.tmdb_service import tmdb_service
+from utils.json_storage import update_json, write_json
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -31,14 +31,12 @@ def initialize_ombi():
             OMBI_INITIALIZED = True
 
             state_file = '/app/data/ombi_state.json'
-            os.makedirs(os.path.dirname(state_file), exist_ok=True)
             state = {
                 'initialized': True,
                 'url': OMBI_URL,
                 'api_key': bool(OMBI_API_KEY)
             }
-            with open(state_file, 'w') as f:
-                json.dump(state, f)
+            write_json(state_file, state)
 
             logger.info("Ombi service initialized successfully")
             return True
@@ -131,18 +129,16 @@ def request_movie(movie_id, csrf_token=None):
             user = g.get('user')
             cache_path = collection_service._get_cache_path(user)
             
+            def mark_requested(collections_data):
+                for collection in collections_data.get('collections', []):
+                    for movie in collection.get('movies', []):
+                        if movie.get('id') == int(movie_id):
+                            movie['is_requested'] = True
+                            movie['status'] = 'Requested'
+                            break
+
             if os.path.exists(cache_path):
-                with open(cache_path, 'r+') as f:
-                    collections_data = json.load(f)
-                    for collection in collections_data.get('collections', []):
-                        for movie in collection.get('movies', []):
-                            if movie.get('id') == int(movie_id):
-                                movie['is_requested'] = True
-                                movie['status'] = 'Requested'
-                                break
-                    f.seek(0)
-                    json.dump(collections_data, f)
-                    f.truncate()
+                update_json(cache_path, mark_requested)
         except Exception as e:
             logger.error(f"Error updating collections cache: {e}")
             
@@ -0,0 +1,305 @@
+import json
+import logging
+import threading
+import time
+import uuid
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MediaServerSessionListener(threading.Thread):
+    """Subscribe to the Jellyfin/Emby websocket and keep a live snapshot of active sessions.
+
+    After connecting, the listener sends a ``SessionsStart`` message so the server pushes
+    the full session list whenever playback changes. The latest snapshot (filtered to
+    sessions with a ``NowPlayingItem``, same shape as ``get_active_sessions()``) is exposed
+    through ``sessions`` while ``connected`` is True; callers should poll otherwise.
+    """
+
+    SESSIONS_INTERVAL_MS = 1500
+
+    def __init__(self, service_name, server_url, api_key, on_change=None,
+                 endpoint='/socket', reconnect_delay=5, max_reconnect_delay=120):
+        super().__init__(daemon=True, name=f"{service_name}-session-events")
+        self.service_name = service_name
+        self.server_url = (server_url or '').rstrip('/')
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.on_change = on_change
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.device_id = f"movie-roulette-{uuid.uuid4().hex[:12]}"
+        self.running = True
+        self._ws = None
+        self._lock = threading.Lock()
+        self._connected = False
+        self._sessions = None
+        self._signature = None
+        self._keepalive_interval = None
+        self.last_event_time = None
+
+    @property
+    def connected(self):
+        with self._lock:
+            return self._connected and self._sessions is not None
+
+    @property
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions) if self._sessions is not None else None
+
+    def _build_url(self):
+        if self.server_url.startswith('https://'):
+            base = 'wss://' + self.server_url[len('https://'):]
+        elif self.server_url.startswith('http://'):
+            base = 'ws://' + self.server_url[len('http://'):]
+        else:
+            base = self.server_url
+        return f"{base}{self.endpoint}?api_key={self.api_key}&deviceId={self.device_id}"
+
+    def _set_disconnected(self):
+        with self._lock:
+            was_connected = self._connected
+            self._connected = False
+            self._sessions = None
+            self._signature = None
+            self._keepalive_interval = None
+        if was_connected:
+            logger.warning(f"{self.service_name} session events disconnected - falling back to polling")
+            self._notify()
+
+    @staticmethod
+    def _session_signature(sessions):
+        """The parts of a snapshot the monitor reacts to; progress ticks alone don't change it"""
+        return frozenset(
+            (s.get('UserId') or s.get('UserName'),
+             (s.get('NowPlayingItem') or {}).get('Id'),
+             bool((s.get('PlayState') or {}).get('IsPaused', False)))
+            for s in sessions
+        )
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(self.service_name)
+            except Exception as e:
+                logger.error(f"Error in {self.service_name} session event callback: {e}")
+
+    def _send(self, message_type, data=None):
+        payload = {'MessageType': message_type}
+        if data is not None:
+            payload['Data'] = data
+        ws = self._ws
+        if ws:
+            ws.send(json.dumps(payload))
+
+    def _on_open(self, ws):
+        with self._lock:
+            self._connected = True
+        logger.info(f"{self.service_name} session events connected")
+        threading.Thread(target=self._keepalive_loop, args=(ws,), daemon=True).start()
+        self._send('SessionsStart', f"0,{self.SESSIONS_INTERVAL_MS}")
+
+    def _on_message(self, ws, message):
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return
+
+        message_type = data.get('MessageType')
+        if message_type == 'Sessions':
+            sessions = data.get('Data') or []
+            active = [s for s in sessions if s.get('NowPlayingItem')]
+            signature = self._session_signature(active)
+            with self._lock:
+                changed = signature != self._signature
+                self._sessions = active
+                self._signature = signature
+                self.last_event_time = time.time()
+            if changed:
+                self._notify()
+        elif message_type == 'ForceKeepAlive':
+            try:
+                timeout = int(data.get('Data') or 60)
+            except (TypeError, ValueError):
+                timeout = 60
+            with self._lock:
+                self._keepalive_interval = max(timeout / 2, 5)
+            self._send('KeepAlive')
+
+    def _on_error(self, ws, error):
+        logger.debug(f"{self.service_name} session events error: {error}")
+
+    def _on_close(self, ws, *args):
+        self._set_disconnected()
+
+    def _keepalive_loop(self, ws):
+        last_sent = time.time()
+        while self.running and self._ws is ws and self._connected:
+            with self._lock:
+                interval = self._keepalive_interval
+            if interval and time.time() - last_sent >= interval:
+                try:
+                    self._send('KeepAlive')
+                except Exception:
+                    break
+                last_sent = time.time()
+            time.sleep(1)
+
+    def run(self):
+        if websocket is None:
+            logger.warning(f"websocket-client not installed - {self.service_name} session events disabled")
+            return
+
+        delay = self.reconnect_delay
+        while self.running:
+            started = time.time()
+            try:
+                self._ws = websocket.WebSocketApp(
+                    self._build_url(),
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_error=self._on_error,
+                    on_close=self._on_close
+                )
+                self._ws.run_forever(ping_interval=30, ping_timeout=10)
+            except Exception as e:
+                logger.error(f"{self.service_name} session events connection failed: {e}")
+            finally:
+                self._set_disconnected()
+                self._ws = None
+
+            if not self.running:
+                break
+            if time.time() - started > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def stop(self):
+        self.running = False
+        ws = self._ws
+        if ws:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+
+class PlexSessionListener(threading.Thread):
+    """Watch the Plex ``/:/websockets/notifications`` alert stream for playback changes.
+
+    Uses plexapi's ``AlertListener`` and keeps the most recent ``PlaySessionStateNotification``
+    per ratingKey (state and viewOffset), restarting the alert listener with backoff when it dies.
+    """
+
+    def __init__(self, plex_server, on_change=None, reconnect_delay=5, max_reconnect_delay=120):
+        super().__init__(daemon=True, name="plex-session-events")
+        self.plex_server = plex_server
+        self.on_change = on_change
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.running = True
+        self._alert_listener = None
+        self._lock = threading.Lock()
+        self._states = {}
+        self.last_event_time = None
+
+    @property
+    def connected(self):
+        listener = self._alert_listener
+        return bool(listener and listener.is_alive())
+
+    def get_state(self, rating_key, max_age=30):
+        """Return the last pushed {'state', 'position', 'time'} for rating_key if still fresh."""
+        with self._lock:
+            state = self._states.get(str(rating_key))
+        if state and time.time() - state['time'] <= max_age:
+            return dict(state)
+        return None
+
+    def _on_alert(self, data):
+        if data.get('type') != 'playing':
+            return
+        notifications = data.get('PlaySessionStateNotification') or []
+        if not notifications:
+            return
+
+        now = time.time()
+        changed = False
+        with self._lock:
+            for notification in notifications:
+                rating_key = notification.get('ratingKey')
+                if not rating_key:
+                    continue
+                previous = self._states.get(str(rating_key))
+                if not previous or previous['state'] != notification.get('state'):
+                    changed = True
+                self._states[str(rating_key)] = {
+                    'state': notification.get('state'),
+                    'position': (notification.get('viewOffset') or 0) / 1000,
+                    'time': now
+                }
+            self.last_event_time = now
+
+        # Progress-only timeline updates just refresh the stored position
+        if changed and self.on_change:
+            try:
+                self.on_change('plex')
+            except Exception as e:
+                logger.error(f"Error in Plex session event callback: {e}")
+
+    def _on_error(self, error):
+        logger.debug(f"Plex session events error: {error}")
+
+    def run(self):
+        if websocket is None:
+            logger.warning("websocket-client not installed - Plex session events disabled")
+            return
+
+        delay = self.reconnect_delay
+        while self.running:
+            started = time.time()
+            try:
+                self._alert_listener = self.plex_server.startAlertListener(
+                    callback=self._on_alert, callbackError=self._on_error
+                )
+                logger.info("Plex session events connected")
+                while self.running and self._alert_listener.is_alive():
+                    self._alert_listener.join(timeout=5)
+            except Exception as e:
+                logger.error(f"Plex session events connection failed: {e}")
+
+            with self._lock:
+                self._states.clear()
+            if not self.running:
+                break
+
+            logger.warning("Plex session events disconnected - falling back to polling")
+            if self.on_change:
+                try:
+                    self.on_change('plex')
+                except Exception as e:
+                    logger.error(f"Error in Plex session event callback: {e}")
+
+            if time.time() - started > self.max_reconnect_delay:
+                delay = self.reconnect_delay
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def stop(self):
+        self.running = False
+        listener = self._alert_listener
+        if listener:
+            try:
+                listener.stop()
+            except Exception:
+                pass
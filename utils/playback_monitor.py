@@ -11,14 +11,25 @@ from utils.poster_view import (set_current_movie, notify_now_playing_stopped, no
                                 emit_now_playing_update, get_poster_proxy_url, get_backdrop_proxy_url,
                                 get_current_timezone)
 from utils.now_playing_service import _get_plex_owner_info, _get_plex_session_account_id
+from utils.playback_events import MediaServerSessionListener, PlexSessionListener
+from utils.current_movie_state import current_movie_state
+from utils.leader_election import leadership
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PlaybackMonitor(threading.Thread):
-    def __init__(self, app, interval=10):
+    def __init__(self, app, interval=10, event_resync_interval=300):
         super().__init__()
         self.interval = interval
+        self.event_resync_interval = event_resync_interval
+        self._wake = threading.Event()
+        self._event_listeners = {}
+        self._listeners_lock = threading.Lock()
+        self._pending_events = set()
+        self._pending_lock = threading.Lock()
+        self._last_plex_sessions = None
+        self._last_plex_poll = 0
         self.jellyfin_service = None
         self.plex_service = None
         self.emby_service = None
@@ -85,6 +96,7 @@ class PlaybackMonitor(threading.Thread):
         features_settings = settings.get('features', {})
         poster_display = features_settings.get('poster_display', {}) 
         self.display_mode = poster_display.get('mode', 'first_active')
+        self.realtime_events = poster_display.get('realtime_events', True)
 
         preferred_user_config = poster_display.get('preferred_user', {})
         self.preferred_users = {
@@ -99,6 +111,7 @@ class PlaybackMonitor(threading.Thread):
                 self.preferred_users[preferred_service] = preferred_username
 
         logger.info(f"Initialized with display mode: {self.display_mode}")
+        logger.info(f"Realtime playback events: {self.realtime_events}")
         logger.info(f"Preferred users configuration: {self.preferred_users}")
 
         if os.getenv('PLEX_POSTER_USERS'):
@@ -140,6 +153,7 @@ class PlaybackMonitor(threading.Thread):
 
         poster_display = features_settings.get('poster_display', {})
         self.display_mode = poster_display.get('mode', 'first_active')
+        self.realtime_events = poster_display.get('realtime_events', True)
     
         preferred_user_config = poster_display.get('preferred_user', {})
         self.preferred_users = {
@@ -202,6 +216,7 @@ class PlaybackMonitor(threading.Thread):
                 self.emby_available = False
 
         self.update_authorized_users()
+        self._sync_event_listeners()
 
         logger.info(f"Updated service status:")
         logger.info(f"Plex available: {self.plex_available}")
@@ -361,6 +376,144 @@ class PlaybackMonitor(threading.Thread):
             return bool(owner_id) and stream_user_id == owner_id
         return False
 
+    def _on_playback_event(self, service):
+        """Wake the monitor loop when a media server pushes a session change"""
+        with self._pending_lock:
+            self._pending_events.add(service)
+        self._wake.set()
+
+    def _take_pending_event(self, service):
+        with self._pending_lock:
+            if service in self._pending_events:
+                self._pending_events.discard(service)
+                return True
+        return False
+
+    def _desired_event_sources(self):
+        """Map service name -> service instance that should have a push listener"""
+        if not self.realtime_events:
+            return {}
+        sources = {}
+        if self.plex_available and self.plex_service:
+            sources['plex'] = self.plex_service
+        if self.jellyfin_available and self.jellyfin_service:
+            sources['jellyfin'] = self.jellyfin_service
+        if self.emby_available and self.emby_service:
+            sources['emby'] = self.emby_service
+        return sources
+
+    def _create_event_listener(self, service_name, service):
+        if service_name == 'plex':
+            return PlexSessionListener(service.plex, on_change=self._on_playback_event)
+        if service_name == 'jellyfin':
+            return MediaServerSessionListener(
+                'jellyfin', service.server_url, service.admin_api_key,
+                on_change=self._on_playback_event, endpoint='/socket'
+            )
+        if service_name == 'emby':
+            return MediaServerSessionListener(
+                'emby', service.server_url, service.api_key,
+                on_change=self._on_playback_event, endpoint='/embywebsocket'
+            )
+        return None
+
+    def _sync_event_listeners(self):
+        """Start, restart or stop push listeners to match the currently available services"""
+        desired = self._desired_event_sources()
+
+        # Called from both the monitor loop and settings requests; check-and-start must be atomic
+        with self._listeners_lock:
+            for service_name in list(self._event_listeners.keys()):
+                listener, owner = self._event_listeners[service_name]
+                if desired.get(service_name) is not owner or not listener.is_alive():
+                    listener.stop()
+                    del self._event_listeners[service_name]
+
+            for service_name, service in desired.items():
+                if service_name in self._event_listeners:
+                    continue
+                try:
+                    listener = self._create_event_listener(service_name, service)
+                    if listener:
+                        listener.start()
+                        self._event_listeners[service_name] = (listener, service)
+                        logger.info(f"Started {service_name} playback event listener")
+                except Exception as e:
+                    logger.error(f"Failed to start {service_name} playback event listener: {e}")
+
+    def _get_event_listener(self, service_name):
+        with self._listeners_lock:
+            entry = self._event_listeners.get(service_name)
+        if entry and entry[0].connected:
+            return entry[0]
+        return None
+
+    def _events_cover_all_services(self):
+        """True when every available service is delivering push events"""
+        desired = self._desired_event_sources()
+        if not desired:
+            return False
+        return all(self._get_event_listener(name) for name in desired)
+
+    def _get_media_server_sessions(self, service_name, service):
+        """Return active Jellyfin/Emby sessions from the push snapshot, polling when disconnected"""
+        listener = self._get_event_listener(service_name)
+        if listener:
+            sessions = listener.sessions
+            if sessions is not None:
+                return sessions
+        return service.get_active_sessions()
+
+    def _get_plex_sessions(self):
+        """Return Plex sessions, only querying the server when a notification, a resync or a
+        session with no fresh pushed state calls for it"""
+        has_event = self._take_pending_event('plex')
+        listener = self._get_event_listener('plex')
+        if (listener and not has_event and self._last_plex_sessions is not None and
+                time.time() - self._last_plex_poll < self.event_resync_interval and
+                all(listener.get_state(s.ratingKey, max_age=self._plex_state_max_age())
+                    for s in self._last_plex_sessions)):
+            return self._last_plex_sessions
+
+        sessions = self.plex_service.plex.sessions()
+        self._last_plex_sessions = sessions
+        self._last_plex_poll = time.time()
+        return sessions
+
+    def _plex_state_max_age(self):
+        return max(self.interval * 5, 30)
+
+    def _get_plex_playback_info(self, rating_key):
+        """Return pause state and position for a Plex session, preferring pushed notifications"""
+        listener = self._get_event_listener('plex')
+        state = listener.get_state(rating_key, max_age=self._plex_state_max_age()) if listener else None
+        if state and state.get('state') in ('playing', 'paused', 'buffering'):
+            return {
+                'IsPaused': state['state'] == 'paused',
+                'position': state['position']
+            }
+        return self.plex_service.get_playback_info(rating_key)
+
+    def _has_live_streams(self):
+        return any(stream.get('status') != 'STOPPED' for stream in self.active_streams.values())
+
+    def _wait_for_next_tick(self):
+        """Sleep until the next poll, or until a push event arrives when events are live.
+
+        Progress-only updates never wake the loop, so while something is playing it keeps
+        ticking at ``interval`` and reads positions from the listeners' latest state; the
+        long resync timeout only applies when nothing is playing.
+        """
+        if self._events_cover_all_services() and not self._has_live_streams():
+            timeout = self.event_resync_interval
+        else:
+            timeout = self.interval
+        if self._wake.wait(timeout):
+            self._wake.clear()
+            # Let bursts of notifications (play + timeline + progress) settle into one update
+            time.sleep(0.25)
+            self._wake.clear()
+
     def run(self):
         """Main monitoring loop with improved stream tracking"""
         last_state = None
@@ -370,6 +523,12 @@ class PlaybackMonitor(threading.Thread):
 
         while self.running:
             try:
+                if not leadership.is_leader('playback-monitor'):
+                    # Another worker polls the media servers and broadcasts to everyone
+                    self._stop_event_listeners()
+                    time.sleep(self.interval)
+                    continue
+
                 with self.app.app_context():
                     default_poster_manager = self.app.config.get('DEFAULT_POSTER_MANAGER')
                     current_streams = {}
@@ -396,8 +555,10 @@ class PlaybackMonitor(threading.Thread):
                             self.emby_available = True
                             logger.info("Emby service recovered - resuming Emby session monitoring")
 
+                    self._sync_event_listeners()
+
                     if self.jellyfin_available and self.jellyfin_service:
-                        jellyfin_sessions = self.jellyfin_service.get_active_sessions()
+                        jellyfin_sessions = self._get_media_server_sessions('jellyfin', self.jellyfin_service)
                         for session in jellyfin_sessions:
                             now_playing = session.get('NowPlayingItem', {})
                             username = session.get('UserName')
@@ -416,7 +577,7 @@ class PlaybackMonitor(threading.Thread):
                                 }
 
                     if self.emby_available and self.emby_service:
-                        emby_sessions = self.emby_service.get_active_sessions()
+                        emby_sessions = self._get_media_server_sessions('emby', self.emby_service)
                         for session in emby_sessions:
                             now_playing = session.get('NowPlayingItem', {})
                             username = session.get('UserName')
@@ -435,12 +596,12 @@ class PlaybackMonitor(threading.Thread):
                                 }
 
                     if self.plex_available and self.plex_service:
-                        plex_sessions = self.plex_service.plex.sessions()
+                        plex_sessions = self._get_plex_sessions()
                         for session in plex_sessions:
                             username = session.usernames[0] if session.usernames else None
                             if session.type == 'movie' and self.is_poster_user(username, 'plex'):
                                 stream_id = f"plex_{session.ratingKey}"
-                                playback_info = self.plex_service.get_playback_info(session.ratingKey)
+                                playback_info = self._get_plex_playback_info(session.ratingKey)
                                 is_paused = playback_info.get('IsPaused', False)
                                 current_streams[stream_id] = {
                                     'id': session.ratingKey,
@@ -512,8 +673,8 @@ class PlaybackMonitor(threading.Thread):
                                 logger.info(f"First active stream - forcing update")
                                 should_force = True
 
-                            if should_force and not is_resume and os.path.exists('/app/data/current_movie.json'):
-                                os.remove('/app/data/current_movie.json')
+                            if should_force and not is_resume:
+                                current_movie_state.clear()
 
                     active_streams = [s for s in self.active_streams.values() if s['status'] in ('PLAYING', 'PAUSED')]
                     sorted_streams = sorted(active_streams, key=lambda x: x['first_active'])
@@ -750,7 +911,7 @@ class PlaybackMonitor(threading.Thread):
                             if old_nw.get('is_owner'):
                                 emit_now_playing_update({'active': False}, room='nw_global')
 
-                    time.sleep(self.interval)
+                self._wait_for_next_tick()
             except Exception as e:
                 logger.error(f"Error in PlaybackMonitor: {e}", exc_info=True)
                 time.sleep(self.interval)
@@ -772,5 +933,13 @@ class PlaybackMonitor(threading.Thread):
             return session.usernames[0] if session.usernames else None
         return session.get('UserName')
 
+    def _stop_event_listeners(self):
+        with self._listeners_lock:
+            for listener, _ in self._event_listeners.values():
+                listener.stop()
+            self._event_listeners.clear()
+
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self._stop_event_listeners()
+        self._wake.set()
\ No newline at end of file
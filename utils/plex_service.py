@@ -10,6 +10,9 @@ from plexapi.server import PlexServer
 from datetime import datetime, timedelta
 from utils.poster_view import set_current_movie
 from .settings import settings
+from .json_storage import write_json
+from .library_fingerprint import save_fingerprint, verify_fingerprint
+from .progress import ProgressReporter
 from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO)
@@ -19,10 +22,6 @@ class PlexService:
     _cache_build_in_progress = False
     _cache_lock = threading.Lock()
     _initializing = False
-    _watchlist_pool_cache: dict = {}
-    _WATCHLIST_CACHE_TTL = 900  # 15 minutes idle timeout (sliding)
-    _library_intersection_cache: dict = {}
-    _LIBRARY_CACHE_TTL = 300  # 5 minutes sliding
 
     def __init__(self, url=None, token=None, libraries=None, username=None, cache_manager=None):
         logger.info("Initializing PlexService")
@@ -98,6 +97,7 @@ class PlexService:
         self._cache_loaded = False
         self._initializing = False
         self._managed_user_server = None
+        self._user_token_server = None
         self.plex_account_id = None
         if self.username:
             self._connect_managed_user()
@@ -162,63 +162,46 @@ class PlexService:
             logger.warning(f"No managed user server available for {self.username}, using admin perspective")
         return self.plex
 
-    def _verify_cache_validity(self):
-        """Verify cache is still valid by checking unwatched status using switchUser"""
-        try:
-            if not self._movies_cache:
-                logger.info("Cache verification failed: No movies in memory cache")
-                return False
-
-            user_switched = False 
-            try:
-                plex_instance = self._get_user_plex_instance()
-                user_switched = (plex_instance != self.plex) 
-                logger.info(f"Using {'user (' + self.username + ')' if user_switched else 'default'} perspective for cache validation.")
-            except Exception as e:
-                logger.error(f"Failed to get Plex instance for user {self.username} during validation: {e}. Cache validation FAILED.")
-                return False
-
-            sample_size = min(5, len(self._movies_cache))
-            sample_movies = random.sample(self._movies_cache, sample_size)
-            logger.info(f"Cache Validation: Checking {sample_size} random movies...")
-
-            for movie in sample_movies:
-                movie_title = movie.get('title', 'Unknown')
-                movie_id = movie.get('id', 'N/A')
-                logger.info(f"Cache Validation: Checking movie '{movie_title}' (ID: {movie_id})")
-                movie_found_and_unwatched = False
-                failure_reason = "Not found in any library or is watched" 
-
-                for library_name in self.library_names: 
-                    try:
-                        fresh_library = plex_instance.library.section(library_name)
-
-                        plex_movie = fresh_library.fetchItem(int(movie['id']))
-
-                        if plex_movie:
-                            if not plex_movie.isWatched:
-                                movie_found_and_unwatched = True
-                                logger.info(f"Cache Validation: Movie '{movie_title}' (ID: {movie_id}) PASSED (found and unwatched in library '{library_name}')")
-                                break 
-                            else:
-                                failure_reason = f"Found in library '{library_name}' but isWatched=True"
-                                logger.warning(f"Cache Validation: Movie '{movie_title}' (ID: {movie_id}) FAILED ({failure_reason})")
-                                break 
-
-                    except Exception as e:
-                        logger.error(f"Cache Validation: Error checking movie '{movie_title}' (ID: {movie_id}) in library '{library_name}': {e}")
-                        failure_reason = f"Error during check in library '{library_name}': {e}"
-
-                if not movie_found_and_unwatched:
-                    logger.warning(f"Cache Validation: FINAL RESULT for movie '{movie_title}' (ID: {movie_id}): FAILED. Reason: {failure_reason}")
-                    logger.warning(f"Cache validation failed due to movie '{movie_title}' (ID: {movie_id}). Rebuilding cache.")
-
-            logger.info("Cache Validation: All sampled movies PASSED.")
-            return True
+    def _get_own_user_plex_instance(self):
+        """A PlexServer seeing this user's own watched state, or None if only the admin view exists.
 
+        Falls back to the Plex token the user signed in with when neither a managed
+        user connection nor switchUser() is available (e.g. some shared users).
+        """
+        if not self.username:
+            return self.plex
+        if self._managed_user_server is not None:
+            return self._managed_user_server
+        if self._user_token_server is not None:
+            return self._user_token_server
+        try:
+            if self.username.lower() == self.plex.myPlexAccount().username.lower():
+                return self.plex
         except Exception as e:
-            logger.error(f"Error verifying cache: {e}")
+            logger.warning(f"Could not identify the Plex owner account: {e}")
+        try:
+            from utils.auth import auth_manager
+            user = auth_manager.db.get_user(f"plex_{self.username}") or {}
+            if user.get('plex_token'):
+                self._user_token_server = PlexServer(self.PLEX_URL, user['plex_token'])
+                return self._user_token_server
+        except Exception as e:
+            logger.warning(f"Could not connect to Plex as {self.username}: {e}")
+        return None
+
+    def _verify_cache_validity(self):
+        """Check the cache against the library fingerprint recorded when it was saved"""
+        if not self._movies_cache:
+            logger.info("Cache verification failed: No movies in memory cache")
             return False
+        return verify_fingerprint(self.MOVIES_CACHE_FILE, self._get_own_user_plex_instance(),
+                                  self.library_names, len(self._movies_cache))
+
+    def _progress_reporter(self, socketio):
+        """Build progress sent to the owning user's room; the shared global cache broadcasts"""
+        cache_manager = getattr(self, 'cache_manager', None) or getattr(self, '_cache_manager', None)
+        room = getattr(cache_manager, 'username', None) or self.username
+        return ProgressReporter(socketio, room=room)
 
     def _initialize_cache(self):
         """Load all movies and their metadata at startup"""
@@ -275,27 +258,15 @@ class PlexService:
 
                 self._movies_cache = []
 
-                if socketio:
-                    logger.info("Sending initial loading progress via SocketIO")
-                    socketio.emit('loading_progress', {
-                        'progress': 0.1,
-                        'current': 0,
-                        'total': total_movies,
-                        'status': 'Building cache'
-                    }, namespace='/')
-                else:
+                if not socketio:
                     logger.warning("No socketio reference available from cache_manager for progress updates, trying self.socketio fallback...")
                     if hasattr(self, 'socketio') and self.socketio:
                         logger.info("Using self.socketio for progress updates")
-                        socketio = self.socketio 
-                        socketio.emit('loading_progress', {
-                            'progress': 0.1,
-                            'current': 0,
-                            'total': total_movies,
-                            'status': 'Building cache'
-                        }, namespace='/')
+                        socketio = self.socketio
                     else:
                          logger.error("Fallback failed: self.socketio is also unavailable. Progress updates disabled.")
+                progress = self._progress_reporter(socketio)
+                progress.update(0.1, current=0, total=total_movies, status='Building cache')
 
 
                 for i, movie in enumerate(all_movies, 1):
@@ -304,25 +275,20 @@ class PlexService:
                         if metadata:
                             self._metadata_cache[str(movie.ratingKey)] = metadata
 
-                        movie_data = self._basic_movie_data(movie)
+                        movie_data = self._basic_movie_data(movie, metadata)
                         if metadata:
                             self._enrich_with_metadata(movie_data, metadata)
                         self._movies_cache.append(movie_data)
 
-                        progress = (i / total_movies) * 100
+                        percent = (i / total_movies) * 100
                         elapsed = time.time() - start_time
                         rate = i / elapsed if elapsed > 0 else 0
 
                         if i % 10 == 0:
-                            logger.info(f"Cached {i}/{total_movies} movies ({progress:.1f}%) - {rate:.1f} movies/sec")
+                            logger.info(f"Cached {i}/{total_movies} movies ({percent:.1f}%) - {rate:.1f} movies/sec")
 
-                        if socketio:
-                            socketio.emit('loading_progress', {
-                                'progress': min(0.9, (i / total_movies)),
-                                'current': i,
-                                'total': total_movies,
-                                'status': 'Building cache'
-                            }, namespace='/')
+                        progress.update(min(0.9, (i / total_movies)), current=i, total=total_movies,
+                                        status='Building cache')
 
                     except Exception as e:
                         logger.error(f"Error caching movie {movie.title}: {e}")
@@ -332,26 +298,18 @@ class PlexService:
                 logger.info(f"Cache initialized with {len(self._movies_cache)} movies in {time.time() - start_time:.2f} seconds")
                 
                 self.save_cache_to_disk()
+
+                from utils.enrichment_cache import enrichment_cache
+                movies_with_tmdb = [m for m in self._movies_cache if m.get('tmdb_id')]
+                enrichment_cache.build_for_movies(movies_with_tmdb)
+                from utils.backdrop_pool import backdrop_pool
+                backdrop_pool.refresh_async(movies_with_tmdb)
                 
-                if socketio:
-                    logger.info("Sending final loading progress via SocketIO")
-                    socketio.emit('loading_progress', {
-                        'progress': 1.0,
-                        'current': total_movies,
-                        'total': total_movies,
-                        'status': 'Cache complete'
-                    }, namespace='/')
-                    socketio.emit('loading_complete', namespace='/')
-                
+                progress.finish(total_movies)
+
             except Exception as e:
                 logger.error(f"Error during cache initialization: {e}")
-                if socketio:
-                    socketio.emit('loading_progress', {
-                        'progress': 1.0,
-                        'error': str(e),
-                        'status': 'Error building cache'
-                    }, namespace='/')
-                    socketio.emit('loading_complete', namespace='/') 
+                self._progress_reporter(socketio).error(str(e), complete=True)
             finally:
                 self._initializing = False
 
@@ -471,12 +429,11 @@ class PlexService:
 
         try:
             start_time = time.time()
-            with open(movies_cache_path, 'w') as f:
-                json.dump(self._movies_cache, f)
+            write_json(movies_cache_path, self._movies_cache)
             logger.info(f"Successfully saved unwatched cache to {movies_cache_path}")
+            save_fingerprint(movies_cache_path, self._get_own_user_plex_instance(), self.library_names)
 
-            with open(metadata_cache_path, 'w') as f:
-                json.dump(self._metadata_cache, f)
+            write_json(metadata_cache_path, self._metadata_cache)
 
             logger.info(f"Successfully saved metadata cache to {metadata_cache_path}")
             logger.info(f"Cache saved to disk successfully in {time.time() - start_time:.2f} seconds for instance ({self.username or 'global'})")
@@ -495,23 +452,38 @@ class PlexService:
             pass
         return None
 
-    def _basic_movie_data(self, movie):
-        """Get basic movie data with optimized caching and attribute collection"""
+    @staticmethod
+    def _tmdb_id_from_metadata(metadata):
+        for guid in (metadata or {}).get('Guid', []) or []:
+            guid_id = guid.get('id', '')
+            if guid_id.startswith('tmdb://'):
+                return guid_id.split('//')[1]
+        return None
+
+    def _basic_movie_data(self, movie, metadata=None):
+        """Get basic movie data from Plex alone; external links come from the enrichment cache"""
         try:
             duration_ms = movie.duration or 0
             movie_duration_hours = (duration_ms / (1000 * 60 * 60)) % 24
             movie_duration_minutes = (duration_ms / (1000 * 60)) % 60
 
             tmdb_id = None
+            imdb_id = None
+            has_guids = False
             try:
                 if hasattr(movie, 'guids') and movie.guids:
+                    has_guids = True
                     for guid in movie.guids:
                         if 'tmdb://' in guid.id:
                             tmdb_id = guid.id.split('//')[1]
-                            break
+                        elif 'imdb://' in guid.id:
+                            imdb_id = guid.id.split('//')[1]
             except Exception:
                 pass
             if not tmdb_id:
+                tmdb_id = self._tmdb_id_from_metadata(metadata)
+            if not tmdb_id and not has_guids and metadata is None:
+                # Listing came back without guids; one fetchItem is the only way to find the id
                 tmdb_id = self._get_guid_tmdb_id(movie.ratingKey)
 
             directors = {director.tag for director in movie.directors} if hasattr(movie, 'directors') else set()
@@ -546,9 +518,12 @@ class PlexService:
                 return movie_data
 
             try:
-                from utils.fetch_movie_links import fetch_movie_links
-                current_service = 'plex'  
-                tmdb_url, trakt_url, imdb_url = fetch_movie_links(movie_data, current_service)
+                # No network here: Trakt/IMDb links are resolved by the background enrichment
+                # build and picked up from its persistent cache when available
+                from utils.enrichment_cache import enrichment_cache
+                tmdb_url, trakt_url, imdb_url = enrichment_cache.get_links(tmdb_id)
+                if not imdb_url and imdb_id:
+                    imdb_url = f"https://www.imdb.com/title/{imdb_id}"
 
                 enriched_data = {
                     "tmdb_url": tmdb_url,
@@ -583,7 +558,8 @@ class PlexService:
                     ]
                 }
 
-                self._metadata_cache[enriched_cache_key] = enriched_data
+                if trakt_url or not tmdb_id:
+                    self._metadata_cache[enriched_cache_key] = enriched_data
                 movie_data.update(enriched_data)
 
             except Exception as e:
@@ -799,16 +775,16 @@ class PlexService:
 
     def get_movie_data(self, movie):
         """Get complete movie data, using cached metadata if available"""
-        movie_data = self._basic_movie_data(movie)
-
         cache_key = str(movie.ratingKey)
-        if cache_key in self._metadata_cache:
-            self._enrich_with_metadata(movie_data, self._metadata_cache[cache_key])
-        else:
+        metadata = self._metadata_cache.get(cache_key)
+        if metadata is None:
             metadata = self._fetch_metadata(movie.ratingKey)
             if metadata:
                 self._metadata_cache[cache_key] = metadata
-                self._enrich_with_metadata(movie_data, metadata)
+
+        movie_data = self._basic_movie_data(movie, metadata)
+        if metadata:
+            self._enrich_with_metadata(movie_data, metadata)
 
         try:
             movie_data['watched'] = movie.isWatched
@@ -924,109 +900,41 @@ class PlexService:
             variables['after'] = page_info['endCursor']
         return guids
 
-    def get_shared_watchlist_pool(self, admin_token: str, partner_uuid: str) -> list:
-        """
-        Intersect admin's watchlist with a friend's watchlist (via GraphQL, no user token needed).
-        Matches against local library by plex_guid. Falls back to tmdb_id for older cache entries.
-        Result cached 5 minutes.
-        """
-        cache_key = f"{admin_token[:8]}:{partner_uuid}"
-        now = time.time()
-        cached = PlexService._watchlist_pool_cache.get(cache_key)
-        if cached and now - cached[1] < PlexService._WATCHLIST_CACHE_TTL:
-            PlexService._watchlist_pool_cache[cache_key] = (cached[0], now)  # slide TTL
-            logger.info("Shared watchlist pool (cached): %d movies", len(cached[0]))
-            return cached[0]
-
-        from concurrent.futures import ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=2) as _ex:
-            f_req = _ex.submit(self._get_requester_watchlist_guids, admin_token)
-            f_par = _ex.submit(self._get_friend_watchlist_guids, partner_uuid, admin_token)
-            requester_guids = f_req.result()
-            partner_guids = f_par.result()
-
-        shared_guids = requester_guids & partner_guids
-        logger.info("Shared watchlist: requester=%d partner=%d intersection=%d",
-                    len(requester_guids), len(partner_guids), len(shared_guids))
-
-        if not shared_guids:
-            PlexService._watchlist_pool_cache[cache_key] = ([], now)
-            return []
+    @staticmethod
+    def _participants(partners) -> list:
+        if isinstance(partners, str):
+            partners = partners.split(',')
+        return [p.strip() for p in partners if p and p.strip()]
 
-        all_movies_path = getattr(g.cache_manager, 'all_movies_cache_path', None) if hasattr(g, 'cache_manager') else None
-        if not all_movies_path or not os.path.exists(all_movies_path):
-            logger.warning("Shared watchlist: all_movies cache not ready at %s", all_movies_path)
-            return []
+    @staticmethod
+    def _current_all_movies_path():
+        return getattr(g.cache_manager, 'all_movies_cache_path', None) if hasattr(g, 'cache_manager') else None
 
-        with open(all_movies_path) as f:
-            all_movies = json.load(f)
-
-        # Primary: match by plex_guid (O(1) lookup); fallback: tmdb_id for old cache entries
-        guid_index = {m['plex_guid']: m for m in all_movies if m.get('plex_guid')}
-        pool = [guid_index[guid] for guid in shared_guids if guid in guid_index]
-        if not pool:
-            # Cache predates plex_guid field — fall back to hex_id substring match
-            shared_tmdb = set()
-            for guid in shared_guids:
-                hex_id = guid.replace('plex://movie/', '')
-                for m in all_movies:
-                    if str(m.get('tmdb_id', '')) and hex_id in str(m.get('plex_guid', '')):
-                        shared_tmdb.add(str(m['tmdb_id']))
-            pool = [m for m in all_movies if str(m.get('tmdb_id', '')) in shared_tmdb]
-
-        logger.info("Shared watchlist pool: %d movies in library", len(pool))
-        PlexService._watchlist_pool_cache[cache_key] = (pool, now)
-        return pool
-
-    def get_library_intersection_pool(self, partner_internal_username: str, watch_status: str = 'unwatched') -> list:
+    def get_shared_watchlist_pool(self, admin_token: str, partner_uuids) -> list:
+        """
+        Intersect admin's watchlist with one or more friends' watchlists (via GraphQL, no user tokens needed).
+        Matches against the local library by plex_guid. Watchlists are cached 15 minutes.
+        """
+        from utils.watch_party import watch_party_engine
+        token_key = admin_token[:8]
+        fetchers = {(token_key, 'self'): lambda: self._get_requester_watchlist_guids(admin_token)}
+        for uuid in self._participants(partner_uuids):
+            fetchers[(token_key, uuid)] = lambda uuid=uuid: self._get_friend_watchlist_guids(uuid, admin_token)
+        return watch_party_engine.watchlist_pool(fetchers, self._current_all_movies_path())
+
+    def get_library_intersection_pool(self, partner_internal_usernames, watch_status: str = 'unwatched') -> list:
         """
-        Return movies from the shared Plex library that match the watch_status for BOTH users.
+        Return movies from the shared Plex library that match the watch_status for every participant.
         Uses local JSON caches only — no API calls.
-        Result cached 5 minutes (sliding TTL).
         """
-        current_path = getattr(g.cache_manager, 'all_movies_cache_path', None) if hasattr(g, 'cache_manager') else None
+        from utils.watch_party import watch_party_engine, partner_library_path
+        current_path = self._current_all_movies_path()
         if not current_path or not os.path.exists(current_path):
             logger.warning("Library intersection: current user cache not available")
             return []
 
-        partner_path = f'/app/data/user_data/{partner_internal_username}/plex_all_movies.json'
-        if not os.path.exists(partner_path):
-            logger.warning("Library intersection: partner cache not found at %s", partner_path)
-            return []
-
-        cache_key = f"{current_path}:{partner_internal_username}:{watch_status}"
-        now = time.time()
-        cached = PlexService._library_intersection_cache.get(cache_key)
-        if cached and now - cached[1] < PlexService._LIBRARY_CACHE_TTL:
-            PlexService._library_intersection_cache[cache_key] = (cached[0], now)
-            logger.info("Library intersection pool (cached): %d movies", len(cached[0]))
-            return cached[0]
-
-        with open(current_path) as f:
-            current_movies = json.load(f)
-        with open(partner_path) as f:
-            partner_movies = json.load(f)
-
-        partner_index = {str(m.get('id', '')): m for m in partner_movies if m.get('id')}
-
-        pool = []
-        for movie in current_movies:
-            movie_id = str(movie.get('id', ''))
-            if not movie_id or movie_id not in partner_index:
-                continue
-            partner_movie = partner_index[movie_id]
-            current_watched = movie.get('watched', False)
-            partner_watched = partner_movie.get('watched', False)
-            if watch_status == 'unwatched' and not current_watched and not partner_watched:
-                pool.append(movie)
-            elif watch_status == 'watched' and current_watched and partner_watched:
-                pool.append(movie)
-            elif watch_status == 'all':
-                pool.append(movie)
-
-        logger.info("Library intersection pool: %d movies (watch_status=%s)", len(pool), watch_status)
-        PlexService._library_intersection_cache[cache_key] = (pool, now)
-        return pool
+        paths = [current_path] + [partner_library_path(p) for p in self._participants(partner_internal_usernames)]
+        return watch_party_engine.library_pool(paths, watch_status)
 
     def filter_movies(self, genres=None, years=None, pg_ratings=None, watch_status='unwatched', get_all=False, exclude_ids=None, movies_pool=None):
         """Filter movies based on criteria and return a random movie"""
@@ -1455,12 +1363,13 @@ class PlexService:
         
         cached_movie = next((movie for movie in self._movies_cache
                            if str(movie.get('id')) == movie_id_str), None)
+        if not cached_movie:
+            cached_movie = next((movie for movie in self._movies_cache
+                               if str(movie.get('tmdb_id')) == movie_id_str), None)
         if cached_movie:
-            return cached_movie
-
-        cached_movie = next((movie for movie in self._movies_cache
-                           if str(movie.get('tmdb_id')) == movie_id_str), None)
-        if cached_movie:
+            if not all(cached_movie.get(key) for key in ('tmdb_url', 'trakt_url', 'imdb_url')):
+                from utils.enrichment_cache import enrichment_cache
+                enrichment_cache.apply_links(cached_movie)
             return cached_movie
 
         try:
@@ -1576,13 +1485,9 @@ class PlexService:
             socketio = self.socketio
             logger.info("Using direct socketio reference for progress updates")
         
+        progress = self._progress_reporter(socketio)
         if socketio:
-            socketio.emit('loading_progress', {
-                'progress': 0.05,
-                'current': 0,
-                'total': 0,
-                'status': f'Starting cache build for {self.username or "global"}...'
-            }, namespace='/')
+            progress.update(0.05, current=0, total=0, status=f'Starting cache build for {self.username or "global"}...')
             logger.info(f"Emitted initial loading event for user: {self.username or 'global'}")
         else:
             logger.warning("No socketio available for progress updates, loading overlay won't appear")
@@ -1610,15 +1515,10 @@ class PlexService:
         except Exception as e:
             logger.error(f"Error refreshing cache: {e}")
             
-            if socketio:
-                socketio.emit('loading_progress', {
-                    'progress': 1.0,
-                    'error': str(e),
-                    'status': 'Error building cache'
-                }, namespace='/')
+            progress.error(str(e))
         finally:
             self._initializing = False
             
             if socketio and not self._cache_loaded:
-                socketio.emit('loading_complete', namespace='/')
+                progress.complete()
                 logger.info(f"Forced loading_complete event for {self.username or 'global'} as cache build ended")
@@ -1,4 +1,4 @@
-from flask import render_template, session, jsonify, Blueprint, current_app
+from flask import render_template, session, jsonify, Blueprint, current_app, request
 from flask_socketio import emit
 from datetime import datetime, timedelta
 import pytz
@@ -10,6 +10,7 @@ import requests
 from flask import Response
 from utils.settings import settings
 from utils.auth import auth_manager 
+from utils.current_movie_state import current_movie_state
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,8 +19,6 @@ logger.setLevel(logging.DEBUG)
 poster_bp = Blueprint('poster', __name__)
 socketio = None
 
-CURRENT_MOVIE_FILE = '/app/data/current_movie.json'
-
 def init_socket(socket):
     global socketio
     socketio = socket
@@ -31,14 +30,10 @@ def get_current_timezone():
     return pytz.timezone(tz)
 
 def save_current_movie(movie_data):
-    with open(CURRENT_MOVIE_FILE, 'w') as f:
-        json.dump(movie_data, f)
+    current_movie_state.set(movie_data)
 
 def load_current_movie():
-    if os.path.exists(CURRENT_MOVIE_FILE):
-        with open(CURRENT_MOVIE_FILE, 'r') as f:
-            return json.load(f)
-    return None
+    return current_movie_state.get()
 
 def get_poster_data():
     current_movie = load_current_movie()
@@ -129,15 +124,10 @@ def set_current_movie(movie_data, service, resume_position=0, session_type='NEW'
             logger.warning("PlaybackMonitor not available for authorization check")
 
     preserve_start_time = None
-    if os.path.exists(CURRENT_MOVIE_FILE) and session_type != 'NEW':
-        try:
-            with open(CURRENT_MOVIE_FILE, 'r') as f:
-                existing_data = json.load(f)
-                if existing_data.get('movie', {}).get('id') == movie_data.get('id'):
-                    preserve_start_time = existing_data.get('start_time')
-                    logger.info(f"Preserving original start time: {preserve_start_time}")
-        except Exception as e:
-            logger.error(f"Error reading existing movie file: {e}")
+    existing_data = current_movie_state.get() if session_type != 'NEW' else None
+    if existing_data and existing_data.get('movie', {}).get('id') == movie_data.get('id'):
+        preserve_start_time = existing_data.get('start_time')
+        logger.info(f"Preserving original start time: {preserve_start_time}")
 
     total_duration = timedelta(hours=movie_data['duration_hours'],
                              minutes=movie_data['duration_minutes'])
@@ -347,33 +337,30 @@ def poster():
         active_movie_found = False
 
         if poster_data:
-            logger.info("Active movie found from file - forcing playback mode")
+            logger.info("Active movie found in current movie state - forcing playback mode")
             if default_poster_manager:
                 default_poster_manager.is_default_poster_active = False
 
             movie_poster_url = None
-            if os.path.exists(CURRENT_MOVIE_FILE):
-                try:
-                    with open(CURRENT_MOVIE_FILE, 'r') as f:
-                        movie_data = json.load(f)
-                        raw_poster_url = movie_data['movie']['poster']
-
-                        if '/library/metadata/' in raw_poster_url:  
-                            parts = raw_poster_url.split('/library/metadata/')[1].split('?')[0]
-                            movie_poster_url = f"/proxy/poster/plex/{parts}"
-                        elif '/Items/' in raw_poster_url:  
-                            item_id = raw_poster_url.split('/Items/')[1].split('/Images')[0]
-                            if jellyfin and jellyfin.server_url in raw_poster_url:
-                                movie_poster_url = f"/proxy/poster/jellyfin/{item_id}"
-                            elif emby and emby.server_url in raw_poster_url:
-                                movie_poster_url = f"/proxy/poster/emby/{item_id}"
-                            else:
-                                movie_poster_url = raw_poster_url
-                        else:
-                            movie_poster_url = raw_poster_url
-                        logger.info(f"Using direct movie poster URL: {movie_poster_url}")
-                except Exception as e:
-                    logger.error(f"Error processing movie poster URL: {e}")
+            try:
+                raw_poster_url = poster_data['movie']['poster']
+
+                if '/library/metadata/' in raw_poster_url:  
+                    parts = raw_poster_url.split('/library/metadata/')[1].split('?')[0]
+                    movie_poster_url = f"/proxy/poster/plex/{parts}"
+                elif '/Items/' in raw_poster_url:  
+                    item_id = raw_poster_url.split('/Items/')[1].split('/Images')[0]
+                    if jellyfin and jellyfin.server_url in raw_poster_url:
+                        movie_poster_url = f"/proxy/poster/jellyfin/{item_id}"
+                    elif emby and emby.server_url in raw_poster_url:
+                        movie_poster_url = f"/proxy/poster/emby/{item_id}"
+                    else:
+                        movie_poster_url = raw_poster_url
+                else:
+                    movie_poster_url = raw_poster_url
+                logger.info(f"Using direct movie poster URL: {movie_poster_url}")
+            except Exception as e:
+                logger.error(f"Error processing movie poster URL: {e}")
 
             current_poster = movie_poster_url if movie_poster_url else default_poster_manager.get_current_poster()
             active_movie_found = True
@@ -551,6 +538,20 @@ def current_poster():
     logger.debug(f"Current poster route called, returning: {current_poster}")
     return jsonify({'poster': current_poster})
 
+@poster_bp.route('/current_movie_state')
+@auth_manager.require_auth
+def current_movie_state_route():
+    """Return the current poster movie; answers 304 while the state version is unchanged"""
+    version, current_movie = current_movie_state.snapshot()
+    etag = current_movie_state.etag_for(version)
+    if request.headers.get('If-None-Match') == etag:
+        response = Response(status=304)
+    else:
+        response = jsonify({'version': version, 'etag': etag, 'active': current_movie is not None, 'current_movie': current_movie})
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @poster_bp.route('/poster_settings')
 @auth_manager.require_auth 
 def poster_settings():
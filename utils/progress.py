@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+
+from utils.build_queue import check_cancelled
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 0.25
+
+
+class ProgressReporter:
+    """Rate-limited Socket.IO progress events for one build.
+
+    update() is cheap to call per item: values are coalesced and an event goes out
+    at most once per ``min_interval`` seconds, or at once when the status text
+    changes. Events carry throughput (items/s) and an ETA in seconds, measured
+    from the start of the current stage. ``room=None`` broadcasts, for builds of
+    the shared global cache; per-user builds pass the user's room.
+    """
+
+    def __init__(self, socketio, event='loading_progress', room=None, namespace='/',
+                 min_interval=MIN_INTERVAL, complete_event='loading_complete', scale=1.0):
+        self.socketio = socketio
+        self.event = event
+        self.room = room
+        self.namespace = namespace
+        self.min_interval = min_interval
+        self.complete_event = complete_event
+        self.scale = scale
+        self._lock = threading.Lock()
+        self._last_emit = 0.0
+        self._status = None
+        self._total = None
+        self._stage_started = time.monotonic()
+        self._stage_start_current = 0
+        self.emitted = 0
+
+    def _emit(self, event, payload=None):
+        if not self.socketio:
+            return
+        kwargs = {'namespace': self.namespace}
+        if self.room:
+            kwargs['room'] = self.room
+        try:
+            if payload is None:
+                self.socketio.emit(event, **kwargs)
+            else:
+                self.socketio.emit(event, payload, **kwargs)
+            self.emitted += 1
+        except Exception as e:
+            logger.error(f"Error emitting {event}: {e}")
+
+    def update(self, progress, current=None, total=None, status=None, force=False):
+        """Record progress (0..1) and emit it if the throttle allows; returns True when sent.
+
+        Also the cancellation point for queued builds: raises BuildCancelled once the
+        build running on this thread has been cancelled.
+        """
+        check_cancelled()
+        now = time.monotonic()
+        with self._lock:
+            if status != self._status or total != self._total:
+                # A new stage: reset the throughput baseline and always announce it
+                self._status, self._total = status, total
+                self._stage_started = now
+                self._stage_start_current = current or 0
+                force = True
+            if not force and now - self._last_emit < self.min_interval:
+                return False
+            self._last_emit = now
+
+            payload = {'progress': progress * self.scale}
+            if current is not None:
+                payload['current'] = current
+            if total is not None:
+                payload['total'] = total
+            if status is not None:
+                payload['status'] = status
+            elapsed = now - self._stage_started
+            done = (current or 0) - self._stage_start_current
+            if elapsed > 0 and done > 0:
+                rate = done / elapsed
+                payload['rate'] = round(rate, 1)
+                if total:
+                    payload['eta'] = round(max(0, total - current) / rate, 1)
+        self._emit(self.event, payload)
+        return True
+
+    def finish(self, total=None, status='Cache complete'):
+        """Send the final 100% update and the completion event"""
+        self.update(1.0, current=total, total=total, status=status, force=True)
+        self.complete()
+
+    def complete(self):
+        if self.complete_event:
+            self._emit(self.complete_event)
+
+    def error(self, message, status='Error building cache', complete=False):
+        payload = {'progress': 1.0 * self.scale, 'error': message, 'status': status}
+        self._emit(self.event, payload)
+        if complete:
+            self.complete()
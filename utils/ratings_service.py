@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RATINGS_TTL = 12 * 60 * 60
+EMPTY_RATING_TTL = 10 * 60
+MAX_CONCURRENT_FETCHES = 6
+# Requests per second; Trakt allows 1000 GETs per 5 minutes per app
+PROVIDER_RATE_LIMITS = {
+    'trakt': 3,
+    'simkl': 2,
+}
+
+
+def _fetch_provider_rating(provider, tmdb_id, user_id):
+    if provider == 'trakt':
+        from utils.trakt_service import get_trakt_rating
+        return get_trakt_rating(tmdb_id, user_id)
+    if provider == 'simkl':
+        from utils.simkl_service import get_simkl_rating
+        return get_simkl_rating(tmdb_id)
+    return 0
+
+
+class RatingsService:
+    """Community ratings per (provider, TMDb id), shared by every user.
+
+    Ratings are the same for everyone, so one TTL cache serves all users. Misses are
+    fetched on a small shared pool, each provider behind its own token bucket, and
+    concurrent requests for the same title wait on a single fetch.
+    """
+
+    def __init__(self, max_workers=MAX_CONCURRENT_FETCHES):
+        self.max_workers = max_workers
+        self._cache = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+        self._executor = None
+        self._buckets = {provider: TokenBucket(rate) for provider, rate in PROVIDER_RATE_LIMITS.items()}
+
+    def _get_executor(self):
+        # Created on first use so the pool is built after eventlet has patched threading
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='ratings')
+            return self._executor
+
+    def get_cached(self, provider, tmdb_id):
+        """Return (hit, rating) without touching the network"""
+        with self._lock:
+            entry = self._cache.get((provider, str(tmdb_id)))
+        if entry is None:
+            return False, None
+        fetched_at, rating = entry
+        ttl = RATINGS_TTL if rating else EMPTY_RATING_TTL
+        if time.time() - fetched_at > ttl:
+            return False, None
+        return True, rating
+
+    def _fetch(self, provider, tmdb_id, user_id):
+        bucket = self._buckets.get(provider)
+        if bucket:
+            bucket.acquire()
+        rating = _fetch_provider_rating(provider, tmdb_id, user_id) or 0
+        with self._lock:
+            self._cache[(provider, tmdb_id)] = (time.time(), rating)
+        return rating
+
+    def _submit(self, provider, tmdb_id, user_id):
+        key = (provider, str(tmdb_id))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._get_executor().submit(self._fetch, provider, key[1], user_id)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _f, key=key: self._inflight.pop(key, None))
+            return future
+
+    def iter_ratings(self, provider, tmdb_ids, user_id):
+        """Yield (tmdb_id, rating) pairs: cache hits first, then misses as they complete"""
+        pending = {}
+        for tmdb_id in tmdb_ids:
+            hit, rating = self.get_cached(provider, tmdb_id)
+            if hit:
+                yield tmdb_id, rating
+                continue
+            pending.setdefault(self._submit(provider, tmdb_id, user_id), []).append(tmdb_id)
+
+        for future in as_completed(pending):
+            try:
+                rating = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching {provider} rating: {e}")
+                rating = 0
+            for tmdb_id in pending[future]:
+                yield tmdb_id, rating
+
+    def get_rating(self, provider, tmdb_id, user_id):
+        for _, rating in self.iter_ratings(provider, [tmdb_id], user_id):
+            return rating
+        return 0
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+ratings_service = RatingsService()
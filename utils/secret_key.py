@@ -0,0 +1,48 @@
+import logging
+import os
+import secrets
+
+logger = logging.getLogger(__name__)
+
+SECRET_KEY_FILE = '/app/data/flask_secret_key'
+
+
+def load_or_create_secret_key(path=SECRET_KEY_FILE):
+    """Return the persisted Flask secret key, generating it on first start.
+
+    Every gunicorn worker must sign cookies and CSRF tokens with the same key. The
+    first worker to get here publishes a new key with an atomic hard link; the rest
+    (and later restarts) read that file. Falls back to a per-process key when the
+    data directory is not writable.
+    """
+    try:
+        with open(path, 'r') as f:
+            key = f.read().strip()
+        if key:
+            return key
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"Error reading secret key file {path}: {e}")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(secrets.token_hex(32))
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp_path, path)
+            logger.info(f"Generated a new Flask secret key in {path}")
+        except FileExistsError:
+            pass  # Another worker won the race; use its key
+        finally:
+            os.unlink(tmp_path)
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError as e:
+        logger.warning(f"Could not persist a Flask secret key to {path} ({e}); generating a key for this "
+                       "process only. Set FLASK_SECRET_KEY when running more than one worker.")
+        return secrets.token_hex(32)
@@ -60,7 +60,8 @@ DEFAULT_SETTINGS = {
         },
         'poster_display': {
             'mode': 'first_active',  # 'first_active' or 'preferred_user'
-            'preferred_user': {}
+            'preferred_user': {},
+            'realtime_events': True  # push updates from Plex/Jellyfin/Emby websockets, polling as fallback
         }
     },
     'request_services': {
@@ -126,6 +127,7 @@ ENV_MAPPINGS = {
     'POSTER_DISPLAY_MODE': ('features.poster_display', 'mode', str),
     'PREFERRED_POSTER_USER': ('features.poster_display.preferred_user', 'username', str),
     'PREFERRED_POSTER_SERVICE': ('features.poster_display.preferred_user', 'service', str),
+    'POSTER_REALTIME_EVENTS': ('features.poster_display', 'realtime_events', lambda x: x.upper() == 'TRUE'),
 
     # Plex ENV
     'PLEX_URL': ('plex', 'url', str),
@@ -1,15 +1,71 @@
 import os
 import json
 import re
+import threading
 from copy import deepcopy
+from types import MappingProxyType
+from utils.json_storage import write_json
 from .config import DEFAULT_SETTINGS, ENV_MAPPINGS, AUTH_ENV_MAPPINGS, AUTH_SETTINGS
 
 SETTINGS_FILE = '/app/data/settings.json'
 
+_EMPTY = MappingProxyType({})
+
+
+def _freeze(value):
+    """Deep read-only copy: dicts become mappingproxies and lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class SettingsSnapshot:
+    """Immutable view of the settings at one version, with hot-path fields resolved up front.
+
+    Environment fallbacks are applied once when the snapshot is built, so request
+    handlers read plain attributes instead of walking dicts and calling os.getenv.
+    """
+
+    def __init__(self, data, version):
+        self.version = version
+        self.data = _freeze(data)
+
+        self.features = self.get('features')
+        self.plex = self.get('plex')
+        self.jellyfin = self.get('jellyfin')
+        self.emby = self.get('emby')
+        self.tmdb = self.get('tmdb')
+
+        self.plex_enabled = bool(self.plex.get('enabled'))
+        self.jellyfin_enabled = bool(self.jellyfin.get('enabled'))
+        self.emby_enabled = bool(self.emby.get('enabled'))
+
+        self.plex_url = self.plex.get('url') or os.getenv('PLEX_URL')
+        self.plex_token = self.plex.get('token') or os.getenv('PLEX_TOKEN')
+        self.jellyfin_url = self.jellyfin.get('url') or os.getenv('JELLYFIN_URL')
+        self.jellyfin_api_key = self.jellyfin.get('api_key') or os.getenv('JELLYFIN_API_KEY')
+        self.jellyfin_user_id = self.jellyfin.get('user_id') or os.getenv('JELLYFIN_USER_ID')
+        self.emby_url = self.emby.get('url') or os.getenv('EMBY_URL')
+        self.emby_api_key = self.emby.get('api_key') or os.getenv('EMBY_API_KEY')
+        self.emby_user_id = self.emby.get('user_id') or os.getenv('EMBY_USER_ID')
+        self.tmdb_api_key = os.getenv('TMDB_API_KEY') or self.tmdb.get('api_key', '')
+
+        self.load_movie_on_start = bool(self.features.get('load_movie_on_start', False))
+
+    def get(self, category, default=None):
+        """Read-only category mapping, like Settings.get"""
+        return self.data.get(category, default if default is not None else _EMPTY)
+
+
 class Settings:
     def __init__(self):
         self._pattern_cache = {}
+        self._lock = threading.RLock()
+        self._subscribers = []
         self.settings = self.load_settings()
+        self._snapshot = SettingsSnapshot(self.settings, 1)
 
     def get(self, category, default=None):
         """Get a category of settings with an optional default"""
@@ -19,6 +75,46 @@ class Settings:
         """Get all settings"""
         return self.settings
 
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self):
+        """Current immutable settings snapshot; rebuilt only when settings change"""
+        return self._snapshot
+
+    def subscribe(self, callback, categories=None):
+        """Call ``callback(snapshot, changed_categories)`` after changes to any of ``categories`` (all if None).
+
+        Returns a function that removes the subscription.
+        """
+        entry = (callback, frozenset(categories) if categories else None)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _publish(self, changed):
+        """Swap in a new snapshot and notify the subscribers of the changed categories"""
+        changed = frozenset(changed)
+        with self._lock:
+            snapshot = SettingsSnapshot(self.settings, self._snapshot.version + 1)
+            self._snapshot = snapshot
+            subscribers = list(self._subscribers)
+
+        for callback, categories in subscribers:
+            if categories is not None and not categories & changed:
+                continue
+            try:
+                callback(snapshot, changed)
+            except Exception as e:
+                print(f"Error notifying settings subscriber {getattr(callback, '__name__', callback)}: {e}")
+        return snapshot
+
     def load_settings(self):
         """Load settings with priority: ENV > file > defaults"""
         current_settings = deepcopy(DEFAULT_SETTINGS)
@@ -44,9 +140,7 @@ class Settings:
         if save_needed:
             try:
                 print(f"Updating {SETTINGS_FILE} to ensure all default keys are present.")
-                os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-                with open(SETTINGS_FILE, 'w') as f_write:
-                    json.dump(self._clean_settings(deepcopy(current_settings)), f_write, indent=2)
+                write_json(SETTINGS_FILE, self._clean_settings(deepcopy(current_settings)), fsync=True, indent=2)
                 print(f"Settings file updated at {SETTINGS_FILE}")
             except Exception as e:
                 print(f"Error saving updated settings to {SETTINGS_FILE}: {e}")
@@ -327,8 +421,10 @@ class Settings:
                     for k in empty_keys:
                         del target[k]
 
-            update_nested(self.settings[category], data)
+            with self._lock:
+                update_nested(self.settings[category], data)
             self.save_settings()
+            self._publish({category})
             return True
 
         except Exception as e:
@@ -338,12 +434,11 @@ class Settings:
     def save_settings(self):
         """Save current settings to file"""
         try:
-            os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-            settings_to_save = deepcopy(self.settings)
+            with self._lock:
+                settings_to_save = deepcopy(self.settings)
             self._clean_settings(settings_to_save)
-            
-            with open(SETTINGS_FILE, 'w') as f:
-                json.dump(settings_to_save, f, indent=2)
+
+            write_json(SETTINGS_FILE, settings_to_save, fsync=True, indent=2)
                 
             print(f"Settings successfully saved to {SETTINGS_FILE}")
             
@@ -222,10 +222,6 @@ def update_settings(category):
                         'redirect': url_for('auth.setup')
                     })
 
-                if category == 'tmdb':
-                    from utils.tmdb_service import tmdb_service
-                    tmdb_service.clear_cache()
-
                 needs_reinit = False
 
                 if category in ['plex', 'jellyfin', 'emby']:
@@ -243,31 +239,6 @@ def update_settings(category):
                     from utils.poster_view import handle_settings_update
                     handle_settings_update(settings.get_all())  
 
-                playback_monitor = current_app.config.get('PLAYBACK_MONITOR')
-                if playback_monitor:
-                    features_settings = settings.get('features', {})
-                    poster_users = features_settings.get('poster_users', {})
-
-                    playback_monitor.plex_poster_users = (
-                        poster_users.get('plex', []) if isinstance(poster_users.get('plex'), list)
-                        else os.getenv('PLEX_POSTER_USERS', '').split(',')
-                    )
-
-                    playback_monitor.jellyfin_poster_users = (
-                        poster_users.get('jellyfin', []) if isinstance(poster_users.get('jellyfin'), list)
-                        else os.getenv('JELLYFIN_POSTER_USERS', '').split(',')
-                    )
-
-                    playback_monitor.emby_poster_users = (
-                        poster_users.get('emby', []) if isinstance(poster_users.get('emby'), list)
-                        else os.getenv('EMBY_POSTER_USERS', '').split(',')
-                    )
-
-                    logger.info(f"Updated PlaybackMonitor poster users:")
-                    logger.info(f"Plex: {playback_monitor.plex_poster_users}")
-                    logger.info(f"Jellyfin: {playback_monitor.jellyfin_poster_users}")
-                    logger.info(f"Emby: {playback_monitor.emby_poster_users}")
-
                 if data.get('default_poster_text') is not None:
                     logger.info("Default poster text changed, updating poster views")
                     from utils.poster_view import handle_settings_update
@@ -0,0 +1,266 @@
+import fnmatch
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# memory:// (default, single worker), sqlite:///path/to/file.db, or redis://host:port/db
+SHARED_STATE_URL = os.getenv('SHARED_STATE_URL', 'memory://')
+DEFAULT_SQLITE_PATH = '/app/data/shared_state.db'
+
+
+class MemoryBackend:
+    """Process-local store with the subset of the Redis API the app uses.
+
+    Values are strings, as with Redis; callers encode structured data as JSON.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = {}
+        self._expiry = {}
+
+    def _alive(self, key):
+        expires = self._expiry.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) and isinstance(self._data[key], str) else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = str(value)
+            self._expiry.pop(key, None)
+            if ex:
+                self._expiry[key] = time.time() + ex
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expiry.pop(key, None)
+            return removed
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expiry[key] = time.time() + seconds
+            return True
+
+    def keys(self, pattern='*'):
+        with self._lock:
+            return [k for k in list(self._data) if self._alive(k) and fnmatch.fnmatchcase(k, pattern)]
+
+    def sadd(self, key, *members):
+        with self._lock:
+            current = self._data.get(key) if self._alive(key) else None
+            if not isinstance(current, set):
+                current = self._data[key] = set()
+            before = len(current)
+            current.update(str(m) for m in members)
+            return len(current) - before
+
+    def smembers(self, key):
+        with self._lock:
+            value = self._data.get(key) if self._alive(key) else None
+            return set(value) if isinstance(value, set) else set()
+
+    def hset(self, name, key, value):
+        with self._lock:
+            current = self._data.get(name) if self._alive(name) else None
+            if not isinstance(current, dict):
+                current = self._data[name] = {}
+            created = key not in current
+            current[key] = str(value)
+            return int(created)
+
+    def hget(self, name, key):
+        with self._lock:
+            value = self._data.get(name) if self._alive(name) else None
+            return value.get(key) if isinstance(value, dict) else None
+
+    def hdel(self, name, *keys):
+        with self._lock:
+            value = self._data.get(name) if self._alive(name) else None
+            if not isinstance(value, dict):
+                return 0
+            return sum(1 for key in keys if value.pop(key, None) is not None)
+
+    def hgetall(self, name):
+        with self._lock:
+            value = self._data.get(name) if self._alive(name) else None
+            return dict(value) if isinstance(value, dict) else {}
+
+    def hlen(self, name):
+        return len(self.hgetall(name))
+
+
+class SQLiteBackend:
+    """Cross-process store in one SQLite file, for running several workers on one host.
+
+    Strings, set members and hash fields share one table keyed by (key, field);
+    per-key expiry lives beside it. Each thread uses its own connection in WAL mode.
+    """
+
+    shared = True
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                         '(key TEXT NOT NULL, field TEXT NOT NULL, value TEXT, PRIMARY KEY (key, field))')
+            conn.execute('CREATE TABLE IF NOT EXISTS expiry (key TEXT PRIMARY KEY, expires REAL NOT NULL)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    @staticmethod
+    def _expire_due(conn, key):
+        row = conn.execute('SELECT expires FROM expiry WHERE key = ?', (key,)).fetchone()
+        if row and row[0] <= time.time():
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            conn.execute('DELETE FROM expiry WHERE key = ?', (key,))
+
+    def get(self, key):
+        with self._conn() as conn:
+            self._expire_due(conn, key)
+            row = conn.execute("SELECT value FROM entries WHERE key = ? AND field = ''", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set(self, key, value, ex=None):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            conn.execute("INSERT INTO entries (key, field, value) VALUES (?, '', ?)", (key, str(value)))
+            conn.execute('DELETE FROM expiry WHERE key = ?', (key,))
+            if ex:
+                conn.execute('INSERT INTO expiry (key, expires) VALUES (?, ?)', (key, time.time() + ex))
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        with self._conn() as conn:
+            for key in keys:
+                self._expire_due(conn, key)
+                if conn.execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount:
+                    removed += 1
+                conn.execute('DELETE FROM expiry WHERE key = ?', (key,))
+        return removed
+
+    def expire(self, key, seconds):
+        with self._conn() as conn:
+            self._expire_due(conn, key)
+            if not conn.execute('SELECT 1 FROM entries WHERE key = ? LIMIT 1', (key,)).fetchone():
+                return False
+            conn.execute('INSERT OR REPLACE INTO expiry (key, expires) VALUES (?, ?)', (key, time.time() + seconds))
+            return True
+
+    def keys(self, pattern='*'):
+        with self._conn() as conn:
+            now = time.time()
+            rows = conn.execute('SELECT DISTINCT e.key FROM entries e LEFT JOIN expiry x ON x.key = e.key '
+                                'WHERE x.expires IS NULL OR x.expires > ?', (now,)).fetchall()
+        return [r[0] for r in rows if fnmatch.fnmatchcase(r[0], pattern)]
+
+    def sadd(self, key, *members):
+        with self._conn() as conn:
+            self._expire_due(conn, key)
+            added = 0
+            for member in members:
+                added += conn.execute('INSERT OR IGNORE INTO entries (key, field, value) VALUES (?, ?, NULL)',
+                                      (key, str(member))).rowcount
+            return added
+
+    def smembers(self, key):
+        with self._conn() as conn:
+            self._expire_due(conn, key)
+            rows = conn.execute("SELECT field FROM entries WHERE key = ? AND field != ''", (key,)).fetchall()
+        return {r[0] for r in rows}
+
+    def hset(self, name, key, value):
+        with self._conn() as conn:
+            self._expire_due(conn, name)
+            existed = conn.execute('SELECT 1 FROM entries WHERE key = ? AND field = ?', (name, key)).fetchone()
+            conn.execute('INSERT OR REPLACE INTO entries (key, field, value) VALUES (?, ?, ?)', (name, key, str(value)))
+            return 0 if existed else 1
+
+    def hget(self, name, key):
+        with self._conn() as conn:
+            self._expire_due(conn, name)
+            row = conn.execute('SELECT value FROM entries WHERE key = ? AND field = ?', (name, key)).fetchone()
+            return row[0] if row else None
+
+    def hdel(self, name, *keys):
+        with self._conn() as conn:
+            return sum(conn.execute('DELETE FROM entries WHERE key = ? AND field = ?', (name, key)).rowcount
+                       for key in keys)
+
+    def hgetall(self, name):
+        with self._conn() as conn:
+            self._expire_due(conn, name)
+            rows = conn.execute('SELECT field, value FROM entries WHERE key = ?', (name,)).fetchall()
+        return {field: value for field, value in rows}
+
+    def hlen(self, name):
+        with self._conn() as conn:
+            return conn.execute('SELECT COUNT(*) FROM entries WHERE key = ?', (name,)).fetchone()[0]
+
+
+class _Transaction:
+    """Wrap one statement group in an immediate transaction so other processes see it atomically"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def create_backend(url=None):
+    """Build the backend for a SHARED_STATE_URL; unknown or unavailable backends fall back to memory"""
+    url = url or SHARED_STATE_URL
+    if url.startswith('sqlite://'):
+        path = url[len('sqlite://'):] or DEFAULT_SQLITE_PATH
+        return SQLiteBackend(path)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            logger.error("SHARED_STATE_URL points at Redis but the redis package is not installed; "
+                         "falling back to process memory")
+            return MemoryBackend()
+        client = redis.Redis.from_url(url, decode_responses=True)
+        client.shared = True
+        return client
+    if url != 'memory://':
+        logger.error(f"Unknown SHARED_STATE_URL scheme in {url!r}; using process memory")
+    return MemoryBackend()
+
+
+shared_state = create_backend()
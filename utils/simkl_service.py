@@ -10,6 +10,8 @@ import requests
 from utils.auth.manager import auth_manager
 from utils.settings import settings
 from utils.version import VERSION
+from utils.watched_cache import watched_cache, are_ids_in
+from utils.json_storage import write_json
 
 
 logger = logging.getLogger(__name__)
@@ -183,11 +185,7 @@ def _read_json(path, default):
 
 
 def _write_json(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    temp_path = f'{path}.tmp'
-    with open(temp_path, 'w') as handle:
-        json.dump(data, handle)
-    os.replace(temp_path, path)
+    write_json(path, data)
 
 
 def get_local_watched_movies(user_id=None):
@@ -195,8 +193,19 @@ def get_local_watched_movies(user_id=None):
         from utils.tracking_service import get_current_user_id
         user_id = get_current_user_id()
     watched_path, _ = _cache_paths(user_id)
-    values = _read_json(watched_path, [])
-    return values if isinstance(values, list) else []
+    return watched_cache.get_list(watched_path)
+
+
+def get_local_watched_set(user_id=None):
+    if user_id is None:
+        from utils.tracking_service import get_current_user_id
+        user_id = get_current_user_id()
+    watched_path, _ = _cache_paths(user_id)
+    return watched_cache.get_set(watched_path)
+
+
+def are_movies_watched(tmdb_ids, user_id=None):
+    return are_ids_in(get_local_watched_set(user_id), tmdb_ids)
 
 
 def _extract_movie_changes(payload):
@@ -295,6 +304,7 @@ def sync_watched_status(user_id=None, force=False):
 
         result = sorted(watched)
         _write_json(watched_path, result)
+        watched_cache.put(watched_path, result)
         _write_json(state_path, current_state)
         return result
 
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+STARTING = 'starting'
+READY = 'ready'
+FAILED = 'failed'
+DISABLED = 'disabled'
+
+
+class StartupOrchestrator:
+    """Tracks startup phases and per-service readiness.
+
+    Services in a group are brought up concurrently so one slow or offline
+    server only delays itself. Every phase and service start is timed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._services = {}
+        self._phases = []
+        self._background = {}
+        self._ready = threading.Event()
+        self._started_at = time.time()
+        self._in_progress = False
+        self._error = None
+        self.generation = 0
+
+    def _set(self, name, **fields):
+        with self._lock:
+            entry = self._services.setdefault(name, {'state': PENDING})
+            entry.update(fields)
+
+    def begin(self):
+        """Start a new initialization round.
+
+        Readiness only gates the first boot: once set it stays set, so a settings
+        reinitialization never stalls requests.
+        """
+        with self._lock:
+            self.generation += 1
+            self._phases = []
+            self._in_progress = True
+            self._error = None
+
+    def finish(self, error=None):
+        """End the current round, marking it failed when ``error`` is given; always sets readiness"""
+        with self._lock:
+            total = sum(p['seconds'] for p in self._phases)
+            self._in_progress = False
+            self._error = error
+        summary = ", ".join(f"{p['name']}={p['seconds']:.2f}s" for p in self._phases)
+        if error:
+            logger.error(f"Startup failed after {total:.2f}s ({summary}): {error}")
+        else:
+            logger.info(f"Startup complete in {total:.2f}s: {summary}")
+        self._ready.set()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - started
+            with self._lock:
+                self._phases.append({'name': name, 'seconds': round(seconds, 3)})
+            logger.info(f"Startup phase '{name}' took {seconds:.2f}s")
+
+    def disable(self, name):
+        self._set(name, state=DISABLED, error=None, seconds=None)
+
+    def start_service(self, name, func):
+        """Run one service initializer, recording its state and timing; returns its result or None"""
+        self._set(name, state=STARTING, error=None)
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            seconds = time.monotonic() - started
+            logger.error(f"Service '{name}' failed to start after {seconds:.2f}s: {e}")
+            self._set(name, state=FAILED, error=str(e), seconds=round(seconds, 3))
+            return None
+        seconds = time.monotonic() - started
+        state = READY if result is not False and result is not None else FAILED
+        self._set(name, state=state, seconds=round(seconds, 3))
+        logger.info(f"Service '{name}' {state} in {seconds:.2f}s")
+        return result
+
+    def start_group(self, phase_name, initializers):
+        """Start ``{name: func}`` concurrently under one timed phase; returns ``{name: result}``"""
+        if not initializers:
+            return {}
+        with self.phase(phase_name):
+            with ThreadPoolExecutor(max_workers=len(initializers),
+                                    thread_name_prefix=f'startup-{phase_name}') as executor:
+                futures = {name: executor.submit(self.start_service, name, func)
+                           for name, func in initializers.items()}
+                return {name: future.result() for name, future in futures.items()}
+
+    def start_background(self, name, target):
+        """Start a daemon loop once per process, however often its owner is re-imported"""
+        with self._lock:
+            thread = self._background.get(name)
+            if thread and thread.is_alive():
+                return False
+            thread = threading.Thread(target=target, daemon=True, name=name)
+            self._background[name] = thread
+        thread.start()
+        return True
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def status(self):
+        with self._lock:
+            services = {name: dict(entry) for name, entry in self._services.items()}
+            phases = list(self._phases)
+        return {
+            'ready': self._ready.is_set(),
+            'initializing': self._in_progress,
+            'error': self._error,
+            'generation': self.generation,
+            'uptime': round(time.time() - self._started_at, 1),
+            'services': services,
+            'phases': phases,
+        }
+
+
+startup = StartupOrchestrator()
@@ -2,11 +2,74 @@ import os
 import logging
 import requests
 import json
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 from utils.settings import settings
 
 logger = logging.getLogger(__name__)
 
+CREDITS_CAST_LIMIT = 20
+# One request per title/person instead of one per facet
+MOVIE_APPENDS = 'credits,images,videos,external_ids,release_dates'
+PERSON_APPENDS = 'combined_credits,external_ids'
+RECORD_CACHE_SIZE = 512
+RECORD_WAIT_TIMEOUT = 30
+PRIMARY_CREW_JOBS = {
+    'Directing': ('Director',),
+    'Writing': ('Writer', 'Screenplay'),
+}
+
+
+def merge_crew(crew, department):
+    """One entry per person in a department with all their jobs; primary credits first"""
+    primary_jobs = PRIMARY_CREW_JOBS.get(department, ())
+    people = {}
+    for person in crew or []:
+        if person.get('department') != department and not (
+                department == 'Directing' and person.get('job') == 'Director'):
+            continue
+        job = person.get('job', '')
+        entry = people.get(person['id'])
+        if entry:
+            if job not in entry['jobs']:
+                entry['jobs'].append(job)
+            entry['is_primary'] = entry['is_primary'] or job in primary_jobs
+        else:
+            people[person['id']] = {
+                'id': person['id'],
+                'name': person['name'],
+                'department': department,
+                'job': job,
+                'jobs': [job],
+                'is_primary': job in primary_jobs,
+            }
+    return sorted(people.values(), key=lambda p: (not p['is_primary'], p['name']))
+
+
+def project_credits(credits, cast_limit=CREDITS_CAST_LIMIT):
+    """Compact credits: top-billed cast plus merged directors and writers, ids kept for linking"""
+    if not credits:
+        return None
+    if 'cast_total' in credits:
+        return credits
+    cast = sorted(credits.get('cast') or [], key=lambda a: a.get('order', 0))
+    crew = credits.get('crew') or []
+    return {
+        'cast': [
+            {
+                'id': actor['id'],
+                'name': actor['name'],
+                'character': actor.get('character', ''),
+                'profile_path': actor.get('profile_path'),
+            }
+            for actor in cast[:cast_limit]
+        ],
+        'cast_total': len(cast),
+        'crew': merge_crew(crew, 'Directing') + merge_crew(crew, 'Writing'),
+    }
+
+
 class TMDBService:
     """Centralized service for TMDB API operations"""
 
@@ -14,6 +77,9 @@ class TMDBService:
     BASE_URL = "https://api.themoviedb.org/3"
 
     def __init__(self):
+        self._records = OrderedDict()
+        self._records_lock = threading.Lock()
+        self._inflight = {}
         self.initialize_service()
 
     def initialize_service(self):
@@ -25,10 +91,10 @@ class TMDBService:
         """Clear all cached data"""
         self.get_api_key.cache_clear()
         self.search_person.cache_clear()
-        self.get_person_details.cache_clear()
-        self.get_movie_details.cache_clear()
-        self.get_movie_credits.cache_clear()
-        self.get_configuration.cache_clear() 
+        self.get_configuration.cache_clear()
+        self.get_movie_logo_url.cache_clear()
+        with self._records_lock:
+            self._records.clear()
         if hasattr(self, 'get_collection_details'):
             self.get_collection_details.cache_clear()
         if hasattr(self, 'get_movie_collection_info'):
@@ -58,34 +124,68 @@ class TMDBService:
         logger.debug("Using built-in TMDB API key")
         return self.DEFAULT_API_KEY
 
-    @lru_cache(maxsize=100)
+    def _get_record(self, kind, record_id, appends):
+        """Fetch a movie/person with its facets appended, once per id even under concurrency"""
+        key = (kind, str(record_id))
+        with self._records_lock:
+            if key in self._records:
+                self._records.move_to_end(key)
+                return self._records[key]
+            waiter = self._inflight.get(key)
+            owner = waiter is None
+            if owner:
+                waiter = self._inflight[key] = threading.Event()
+
+        if not owner:
+            waiter.wait(timeout=RECORD_WAIT_TIMEOUT)
+            with self._records_lock:
+                return self._records.get(key)
+
+        try:
+            record = self._make_request(f"{kind}/{record_id}", {'append_to_response': appends})
+            if record:
+                with self._records_lock:
+                    self._records[key] = record
+                    while len(self._records) > RECORD_CACHE_SIZE:
+                        self._records.popitem(last=False)
+            return record
+        finally:
+            with self._records_lock:
+                self._inflight.pop(key, None)
+            waiter.set()
+
+    def get_movie_record(self, movie_id):
+        """Details plus credits, images, videos, external ids and release dates in one request"""
+        logger.debug(f"Getting movie record for ID: {movie_id}")
+        return self._get_record('movie', movie_id, MOVIE_APPENDS)
+
+    def get_person_record(self, person_id):
+        """Person details plus combined credits and external ids in one request"""
+        logger.debug(f"Getting person record for ID: {person_id}")
+        return self._get_record('person', person_id, PERSON_APPENDS)
+
     def get_movie_cast(self, tmdb_id):
         """Get the correct cast for a movie using its TMDB ID"""
-        try:
-            credits = self._make_request(f"movie/{tmdb_id}/credits")
-            if credits and 'cast' in credits:
-                return {
-                    'cast': credits['cast'],
-                    'crew': credits.get('crew', [])
-                }
-            return None
-        except Exception as e:
-            logger.error(f"Error getting movie cast: {e}")
-            return None
+        credits = self.get_movie_credits(tmdb_id)
+        if credits and 'cast' in credits:
+            return {
+                'cast': credits['cast'],
+                'crew': credits.get('crew', [])
+            }
+        return None
 
     def get_person_external_ids(self, person_id):
         """Get external IDs for a person"""
-        logger.debug(f"Getting external IDs for person ID: {person_id}")
-        return self._make_request(f"person/{person_id}/external_ids")
+        person = self.get_person_record(person_id)
+        return person.get('external_ids') if person else None
 
-    @lru_cache(maxsize=100)
     def get_person_details_with_external_ids(self, person_id):
         """Get detailed information about a person including IMDb ID"""
         logger.debug(f"Getting person details with external IDs for ID: {person_id}")
         try:
-            data = self._make_request(f"person/{person_id}")
+            data = self.get_person_record(person_id)
             if data:
-                external_ids = self.get_person_external_ids(person_id)
+                external_ids = data.get('external_ids')
 
                 return {
                     'id': data.get('id'),
@@ -140,58 +240,37 @@ class TMDBService:
             return data['results'][0]
         return None
 
-    @lru_cache(maxsize=100)
     def get_person_details_with_credits(self, person_id):
         """Get person details and credits in one call"""
-        try:
-            person_url = f"{self.BASE_URL}/person/{person_id}"
-            credits_url = f"{self.BASE_URL}/person/{person_id}/combined_credits"
-            params = {'api_key': self.get_api_key()}
-
-            person_response = requests.get(person_url, params=params)
-            person_response.raise_for_status()
-            person_data = person_response.json()
-            logger.debug(f"TMDb person response for ID {person_id}: {json.dumps(person_data, indent=2)}")
-
-            credits_response = requests.get(credits_url, params=params)
-            credits_response.raise_for_status()
-            credits_data = credits_response.json()
-            logger.debug(f"TMDb credits response for ID {person_id}: {json.dumps(credits_data, indent=2)}")
-
-            person_data['credits'] = credits_data
-            return person_data
-        except requests.RequestException as e:
-            logger.error(f"Error fetching person details for ID {person_id}: {str(e)}")
-            if hasattr(e.response, 'text'):
-                logger.error(f"Response content: {e.response.text}")
+        person = self.get_person_record(person_id)
+        if not person:
+            logger.error(f"Error fetching person details for ID {person_id}")
             return None
+        person_data = dict(person)
+        person_data['credits'] = person.get('combined_credits', {})
+        return person_data
 
-    @lru_cache(maxsize=100)
     def get_person_details(self, person_id):
         """Get detailed information about a person"""
-        logger.debug(f"Getting person details for ID: {person_id}")
-        return self._make_request(f"person/{person_id}")
+        return self.get_person_record(person_id)
 
-    @lru_cache(maxsize=100)
     def get_movie_details(self, movie_id):
         """Get detailed information about a movie"""
-        logger.debug(f"Getting movie details for ID: {movie_id}")
-        params = {'append_to_response': 'images'}
-        return self._make_request(f"movie/{movie_id}", params=params)
+        return self.get_movie_record(movie_id)
+
+    def get_movie_videos(self, movie_id):
+        """Get the video list for a movie"""
+        details = self.get_movie_record(movie_id)
+        if not details:
+            return None
+        return (details.get('videos') or {}).get('results', [])
 
-    @lru_cache(maxsize=100)
     def get_movie_credits(self, movie_id):
         """Get cast and crew information for a movie"""
-        logger.debug(f"Getting movie credits for ID: {movie_id}")
-        try:
-            data = self._make_request(f"movie/{movie_id}/credits")
-            if data and 'crew' in data:
-                jobs = set(member['job'] for member in data['crew'])
-                logger.debug(f"Found job types in crew: {jobs}")
-            return data
-        except Exception as e:
-            logger.error(f"Error getting movie credits: {e}")
+        details = self.get_movie_record(movie_id)
+        if not details or not details.get('credits'):
             return None
+        return dict(details['credits'], id=details.get('id'))
 
     @lru_cache(maxsize=1)
     def get_configuration(self):
@@ -279,12 +358,11 @@ class TMDBService:
             logger.warning(f"Selected logo has no file_path for movie ID: {movie_id}")
             return None
 
-    @lru_cache(maxsize=100)
     def get_person_movies(self, person_id):
         """Get complete filmography for a person"""
         try:
-            movie_credits_url = f"person/{person_id}/movie_credits"
-            credits = self._make_request(movie_credits_url)
+            person = self.get_person_record(person_id)
+            credits = person.get('combined_credits') if person else None
 
             if credits:
                 movies = []
@@ -319,32 +397,20 @@ class TMDBService:
 
     def get_movie_links(self, movie_id):
         """Get TMDB, IMDB and Trakt URLs for a movie"""
-        movie = self.get_movie_details(movie_id)
-        if not movie:
-            return None, None, None
+        from utils.trakt_id_map import trakt_id_map
 
         tmdb_url = f"https://www.themoviedb.org/movie/{movie_id}"
-        imdb_id = movie.get('imdb_id')
-        imdb_url = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
+        trakt_url, imdb_url = trakt_id_map.links(movie_id)
+        if imdb_url:
+            return tmdb_url, trakt_url, imdb_url
 
-        try:
-            trakt_api_url = f"https://api.trakt.tv/search/tmdb/{movie_id}?type=movie"
-            headers = {
-                'Content-Type': 'application/json',
-                'trakt-api-version': '2',
-                'trakt-api-key': os.getenv('TRAKT_CLIENT_ID', '')
-            }
-            response = requests.get(trakt_api_url, headers=headers)
-            if response.ok:
-                data = response.json()
-                if data:
-                    trakt_id = data[0]['movie']['ids']['slug']
-                    trakt_url = f"https://trakt.tv/movies/{trakt_id}"
-                    return tmdb_url, trakt_url, imdb_url
-        except Exception as e:
-            logger.error(f"Error getting Trakt URL: {e}")
+        movie = self.get_movie_details(movie_id)
+        if not movie:
+            return (tmdb_url, trakt_url, None) if trakt_url else (None, None, None)
 
-        return tmdb_url, None, imdb_url
+        imdb_id = movie.get('imdb_id') or (movie.get('external_ids') or {}).get('imdb_id')
+        imdb_url = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
+        return tmdb_url, trakt_url, imdb_url
 
     @lru_cache(maxsize=100)
     def get_collection_details(self, collection_id):
@@ -363,3 +429,4 @@ class TMDBService:
         return None
 
 tmdb_service = TMDBService()
+settings.subscribe(lambda snapshot, changed: tmdb_service.clear_cache(), categories=('tmdb',))
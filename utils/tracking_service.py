@@ -6,6 +6,7 @@ from flask import has_request_context, request, session
 from utils.auth.manager import auth_manager
 from utils.settings import settings
 from utils.version import VERSION
+from utils.watched_cache import are_ids_in
 
 
 VALID_TRACKING_PROVIDERS = ('none', 'trakt', 'simkl')
@@ -184,29 +185,56 @@ def get_watched_movies(user_id=None):
     return sync_watched_status(user_id)
 
 
+def get_local_watched_set(user_id=None):
+    user_id = user_id or get_current_user_id()
+    provider = get_tracking_provider(user_id)
+    if provider == 'trakt':
+        from utils.trakt_service import get_local_watched_set as get_trakt_watched_set
+        return get_trakt_watched_set(user_id)
+    if provider == 'simkl':
+        from utils.simkl_service import get_local_watched_set as get_simkl_watched_set
+        return get_simkl_watched_set(user_id)
+    return frozenset()
+
+
 def is_movie_watched(tmdb_id, user_id=None):
-    try:
-        normalized_id = int(tmdb_id)
-    except (TypeError, ValueError):
-        return False
-    return normalized_id in set(get_local_watched_movies(user_id))
+    return are_movies_watched([tmdb_id], user_id)[tmdb_id]
+
+
+def are_movies_watched(tmdb_ids, user_id=None):
+    return are_ids_in(get_local_watched_set(user_id), tmdb_ids)
 
 
 def get_tracking_rating(tmdb_id, user_id=None):
     user_id = user_id or get_current_user_id()
     provider = get_tracking_provider(user_id)
-    if provider == 'trakt':
-        from utils.trakt_service import get_trakt_rating
-        return get_trakt_rating(tmdb_id, user_id)
-    if provider == 'simkl':
-        from utils.simkl_service import get_simkl_rating
-        return get_simkl_rating(tmdb_id)
+    if provider in ('trakt', 'simkl'):
+        from utils.ratings_service import ratings_service
+        return ratings_service.get_rating(provider, tmdb_id, user_id)
     return 0
 
 
 def get_movie_ratings(tmdb_id, user_id=None):
     provider = get_tracking_provider(user_id)
     rating = get_tracking_rating(tmdb_id, user_id) if provider != 'none' else 0
+    return _ratings_payload(provider, rating)
+
+
+def iter_movie_ratings(tmdb_ids, user_id=None):
+    """Yield (tmdb_id, ratings) as each title resolves; cached titles come first."""
+    user_id = user_id or get_current_user_id()
+    provider = get_tracking_provider(user_id)
+    if provider == 'none':
+        for tmdb_id in tmdb_ids:
+            yield tmdb_id, _ratings_payload(provider, 0)
+        return
+
+    from utils.ratings_service import ratings_service
+    for tmdb_id, rating in ratings_service.iter_ratings(provider, tmdb_ids, user_id):
+        yield tmdb_id, _ratings_payload(provider, rating)
+
+
+def _ratings_payload(provider, rating):
     return {
         'tracking_provider': provider,
         'tracking_rating_label': PROVIDER_LABELS[provider],
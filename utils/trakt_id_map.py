@@ -0,0 +1,152 @@
+import atexit
+import json
+import logging
+import os
+import time
+from threading import RLock
+
+import requests
+
+from utils.json_storage import atomic_write_json, WriteBehind
+
+logger = logging.getLogger(__name__)
+
+TRAKT_ID_MAP_FILE = '/app/data/trakt_id_map.json'
+NEGATIVE_TTL = 24 * 60 * 60
+TRAKT_SEARCH_TIMEOUT = 5
+
+
+class TraktIdMap:
+    """Persistent TMDb id -> {trakt, slug, imdb} table shared by every Trakt lookup.
+
+    Entries are learned from payloads that already carry Trakt's full ``ids`` block
+    (``sync/watched/movies``) and otherwise from ``search/tmdb``. Ids never change, so
+    hits are kept forever; misses are remembered for ``NEGATIVE_TTL`` seconds.
+    """
+
+    def __init__(self, file_path=TRAKT_ID_MAP_FILE):
+        self.file_path = file_path
+        self._lock = RLock()
+        self._entries = {}
+        self._version = 0
+        self._load_from_disk()
+        self._writer = WriteBehind(self._snapshot, self._write, interval=5.0, name='trakt-id-map-writer')
+
+    def _load_from_disk(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r') as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded {len(self._entries)} Trakt id mappings from disk")
+        except Exception as e:
+            logger.error(f"Error loading Trakt id map: {e}")
+            self._entries = {}
+
+    def _snapshot(self):
+        with self._lock:
+            return self._version, dict(self._entries)
+
+    def _write(self, entries):
+        atomic_write_json(self.file_path, entries)
+
+    def flush(self):
+        self._writer.flush()
+
+    def _store(self, tmdb_id, entry):
+        with self._lock:
+            if self._entries.get(tmdb_id) == entry:
+                return False
+            self._entries[tmdb_id] = entry
+            self._version += 1
+        return True
+
+    def record(self, ids):
+        """Remember a Trakt ``ids`` block; returns True if it added anything new"""
+        return self.record_many([ids]) > 0
+
+    def record_many(self, ids_list):
+        """Remember many ids blocks at once with a single deferred write"""
+        changed = 0
+        for ids in ids_list:
+            tmdb_id = (ids or {}).get('tmdb')
+            if tmdb_id and ids.get('trakt'):
+                entry = {'trakt': ids['trakt'], 'slug': ids.get('slug'), 'imdb': ids.get('imdb')}
+                changed += self._store(str(tmdb_id), entry)
+        if changed:
+            logger.debug(f"Learned {changed} Trakt id mappings")
+            self._writer.schedule()
+        return changed
+
+    def _mark_missing(self, tmdb_id):
+        self._store(tmdb_id, {'missing': True, 'checked_at': time.time()})
+        self._writer.schedule()
+
+    def lookup(self, tmdb_id):
+        """Return (known, entry) from the table only; entry is None for a cached miss"""
+        with self._lock:
+            entry = self._entries.get(str(tmdb_id))
+        if entry is None:
+            return False, None
+        if entry.get('missing'):
+            if time.time() - entry.get('checked_at', 0) < NEGATIVE_TTL:
+                return True, None
+            return False, None
+        return True, entry
+
+    def _search(self, tmdb_id):
+        from utils.trakt_service import TRAKT_CLIENT_ID
+        response = requests.get(
+            f"https://api.trakt.tv/search/tmdb/{tmdb_id}?type=movie",
+            headers={
+                'Content-Type': 'application/json',
+                'trakt-api-version': '2',
+                'trakt-api-key': TRAKT_CLIENT_ID
+            },
+            timeout=TRAKT_SEARCH_TIMEOUT
+        )
+        response.raise_for_status()
+        results = response.json()
+        return ((results[0] if results else {}).get('movie') or {}).get('ids')
+
+    def resolve(self, tmdb_id):
+        """Return the mapping for a TMDb id, searching Trakt only when it is unknown"""
+        if not tmdb_id:
+            return None
+        tmdb_id = str(tmdb_id)
+        known, entry = self.lookup(tmdb_id)
+        if known:
+            return entry
+        try:
+            ids = self._search(tmdb_id)
+        except (requests.RequestException, ValueError, KeyError, IndexError, TypeError) as e:
+            # Transient failures are not cached so the next lookup retries
+            logger.debug(f"Trakt search failed for TMDb ID {tmdb_id}: {e}")
+            return None
+        if ids and ids.get('trakt'):
+            ids = dict(ids, tmdb=ids.get('tmdb') or tmdb_id)
+            self.record(ids)
+            return self.lookup(tmdb_id)[1]
+        self._mark_missing(tmdb_id)
+        return None
+
+    def resolve_many(self, tmdb_ids):
+        """Resolve a batch of ids; only distinct unknown ids reach Trakt"""
+        results = {}
+        for tmdb_id in dict.fromkeys(str(t) for t in tmdb_ids if t):
+            results[tmdb_id] = self.resolve(tmdb_id)
+        return results
+
+    def links(self, tmdb_id):
+        """Return (trakt_url, imdb_url) for a TMDb id"""
+        entry = self.resolve(tmdb_id)
+        if not entry:
+            return None, None
+        slug = entry.get('slug') or entry.get('trakt')
+        trakt_url = f"https://trakt.tv/movies/{slug}" if slug else None
+        imdb_url = f"https://www.imdb.com/title/{entry['imdb']}" if entry.get('imdb') else None
+        return trakt_url, imdb_url
+
+
+trakt_id_map = TraktIdMap()
+atexit.register(trakt_id_map.flush)
@@ -9,6 +9,10 @@ import logging
 from utils.settings import settings
 from flask import request, session, current_app 
 from utils.auth.manager import auth_manager 
+from utils.trakt_id_map import trakt_id_map
+from utils.watched_cache import watched_cache, are_ids_in
+from utils.leader_election import leadership
+from utils.json_storage import write_json
 
 logger = logging.getLogger(__name__)
 
@@ -280,6 +284,7 @@ def make_trakt_request(method, endpoint, user_id=None, **kwargs):
     if 'headers' in kwargs:
         headers.update(kwargs.pop('headers'))
     kwargs['headers'] = headers
+    kwargs.setdefault('timeout', 20)
 
     response = requests.request(method, url, **kwargs)
 
@@ -344,6 +349,7 @@ def get_watched_movies(user_id=None):
 
     tmdb_ids = []
     seen_tmdb_ids = set()
+    trakt_ids = []
     page = 1
     total_pages = None
 
@@ -373,7 +379,9 @@ def get_watched_movies(user_id=None):
             break
 
         for movie in watched_movies:
-            tmdb_id = ((movie.get('movie') or {}).get('ids') or {}).get('tmdb')
+            ids = (movie.get('movie') or {}).get('ids') or {}
+            trakt_ids.append(ids)
+            tmdb_id = ids.get('tmdb')
             if tmdb_id and tmdb_id not in seen_tmdb_ids:
                 seen_tmdb_ids.add(tmdb_id)
                 tmdb_ids.append(tmdb_id)
@@ -395,6 +403,8 @@ def get_watched_movies(user_id=None):
             f"{TRAKT_WATCHED_PAGE_SAFETY_MAX} pages"
         )
 
+    # The watched payload carries every id Trakt knows, so later lookups need no search
+    trakt_id_map.record_many(trakt_ids)
     return tmdb_ids
 
 def get_trakt_rating(tmdb_id, user_id=None):
@@ -405,17 +415,12 @@ def get_trakt_rating(tmdb_id, user_id=None):
     if not is_trakt_enabled_for_user(user_id):
         return 0
 
-    search_response = make_trakt_request('GET', f'search/tmdb/{tmdb_id}?type=movie', user_id)
-    if not search_response or not search_response.ok:
-        print(f"Error searching for Trakt ID for user {user_id}: {search_response.status_code if search_response else 'No response'}")
-        return 0
-
-    search_data = search_response.json()
-    if not search_data:
+    trakt_ids = trakt_id_map.resolve(tmdb_id)
+    if not trakt_ids:
         print(f"No Trakt data found for TMDb ID: {tmdb_id}")
         return 0
 
-    trakt_id = search_data[0]['movie']['ids']['trakt']
+    trakt_id = trakt_ids['trakt']
 
     rating_response = make_trakt_request('GET', f'movies/{trakt_id}/ratings', user_id)
     if not rating_response or not rating_response.ok:
@@ -442,88 +447,67 @@ def sync_watched_status(user_id=None):
         )
         return get_local_watched_movies(user_id)
 
-    directory_key = user_id
-    watched_file = DEFAULT_WATCHED_FILE
+    watched_file = _watched_file(user_id, create=True)
+    write_json(watched_file, watched_movies)
+    watched_cache.put(watched_file, watched_movies)
 
-    if user_id != 'global':
-        user_data = None
-        managed_user_data = auth_manager.db.get_managed_user_by_username(user_id)
-        if managed_user_data:
-            user_type = 'plex_managed'
-            user_data = managed_user_data
+    return watched_movies
+
+def _watched_file(user_id, create=False):
+    """Path of the watched-movies cache file for a user"""
+    if user_id == 'global':
+        return DEFAULT_WATCHED_FILE
+
+    directory_key = user_id
+    user_type = None
+    user_data = None
+    managed_user_data = auth_manager.db.get_managed_user_by_username(user_id)
+    if managed_user_data:
+        user_type = 'plex_managed'
+        user_data = managed_user_data
+    else:
+        regular_user_data = auth_manager.db.get_user(user_id)
+        if regular_user_data:
+             user_type = regular_user_data.get('service_type', 'local')
+             user_data = regular_user_data
+
+    if user_type == 'plex_managed' and user_data:
+        plex_user_id = user_data.get('plex_user_id')
+        if plex_user_id:
+            directory_key = f"plex_managed_{plex_user_id}"
         else:
-            regular_user_data = auth_manager.db.get_user(user_id)
-            if regular_user_data:
-                 user_type = regular_user_data.get('service_type', 'local')
-                 user_data = regular_user_data
-
-        if user_type == 'plex_managed' and user_data:
-            plex_user_id = user_data.get('plex_user_id')
-            if plex_user_id:
-                directory_key = f"plex_managed_{plex_user_id}"
-                logger.info(f"Using directory key for managed user {user_id}: {directory_key}")
-            else:
-                logger.error(f"Managed user {user_id} is missing plex_user_id in DB record. Cannot determine correct data path.")
-                directory_key = user_id
+            logger.error(f"Managed user {user_id} is missing plex_user_id in DB record. Cannot determine correct data path.")
 
-        user_dir = os.path.join(USER_DATA_DIR, directory_key)
+    user_dir = os.path.join(USER_DATA_DIR, directory_key)
+    if create:
         os.makedirs(user_dir, exist_ok=True)
-        watched_file = os.path.join(user_dir, 'trakt_watched_movies.json')
-
-    with open(watched_file, 'w') as f:
-        json.dump(watched_movies, f)
-        
-    return watched_movies
+    return os.path.join(user_dir, 'trakt_watched_movies.json')
 
 def get_local_watched_movies(user_id=None):
     """Get locally cached watched movies for specific user"""
     if user_id is None:
         user_id = get_current_user_id()
-        
-    directory_key = user_id
-    watched_file = DEFAULT_WATCHED_FILE
+    return watched_cache.get_list(_watched_file(user_id))
 
-    if user_id != 'global':
-        user_data = None
-        managed_user_data = auth_manager.db.get_managed_user_by_username(user_id)
-        if managed_user_data:
-            user_type = 'plex_managed'
-            user_data = managed_user_data
-        else:
-            regular_user_data = auth_manager.db.get_user(user_id)
-            if regular_user_data:
-                 user_type = regular_user_data.get('service_type', 'local')
-                 user_data = regular_user_data
-
-        if user_type == 'plex_managed' and user_data:
-            plex_user_id = user_data.get('plex_user_id')
-            if plex_user_id:
-                directory_key = f"plex_managed_{plex_user_id}"
-            else:
-                logger.error(f"Managed user {user_id} is missing plex_user_id in DB record. Cannot determine correct data path for get_local_watched_movies.")
-                directory_key = user_id
-
-        user_dir = os.path.join(USER_DATA_DIR, directory_key)
-        watched_file = os.path.join(user_dir, 'trakt_watched_movies.json')
-
-    if os.path.exists(watched_file):
-        try:
-            with open(watched_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+def get_local_watched_set(user_id=None):
+    """Watched TMDB ids for a user as a frozenset, re-read only when the file changes"""
+    if user_id is None:
+        user_id = get_current_user_id()
+    return watched_cache.get_set(_watched_file(user_id))
 
 def is_movie_watched(tmdb_id, user_id=None):
     """Check if movie is watched by specific user"""
+    return are_movies_watched([tmdb_id], user_id)[tmdb_id]
+
+def are_movies_watched(tmdb_ids, user_id=None):
+    """Watched flags for many movies at once, keyed by the ids passed in"""
     if user_id is None:
         user_id = get_current_user_id()
-        
+
     if not is_trakt_enabled_for_user(user_id):
-        return False 
+        return {tmdb_id: False for tmdb_id in tmdb_ids}
 
-    watched_movies = get_local_watched_movies(user_id)
-    return tmdb_id in watched_movies
+    return are_ids_in(get_local_watched_set(user_id), tmdb_ids)
 
 def get_movie_ratings(tmdb_id, user_id=None):
     """Get movie ratings for specific user"""
@@ -547,18 +531,11 @@ def get_trakt_id_from_tmdb(tmdb_id, user_id=None):
     if not is_trakt_enabled_for_user(user_id):
         return None
 
-    response = make_trakt_request('GET', f'search/tmdb/{tmdb_id}?type=movie', user_id)
-    if response and response.ok:
-        results = response.json()
-        if results:
-            try:
-                return results[0]['movie']['ids']['trakt']
-            except (IndexError, KeyError, TypeError):
-                 print(f"Unexpected structure in Trakt search result for TMDb ID {tmdb_id}")
-                 return None
-    else:
-        print(f"Failed Trakt search for TMDb ID {tmdb_id}. Status: {response.status_code if response else 'No Response'}")
+    trakt_ids = trakt_id_map.resolve(tmdb_id)
+    if not trakt_ids:
+        print(f"No Trakt ID found for TMDb ID {tmdb_id}")
         return None
+    return trakt_ids['trakt']
 
 def update_watched_status_for_users():
     """Sync watched status for all users (regular and managed) with Trakt enabled."""
@@ -602,11 +579,14 @@ def update_watched_status_loop():
     """Background loop to update watched status for all users"""
     while True:
         try:
-            update_watched_status_for_users()
+            if leadership.is_leader('trakt-watched-sync'):
+                update_watched_status_for_users()
         except Exception as e:
             print(f"Error in Trakt update loop: {e}")
             
         time.sleep(UPDATE_INTERVAL)
 
-update_thread = Thread(target=update_watched_status_loop, daemon=True)
-update_thread.start()
+# Registered with the startup orchestrator so re-importing this module on service
+# reinitialization does not start a second loop
+from utils.startup import startup
+startup.start_background('trakt-watched-sync', update_watched_status_loop)
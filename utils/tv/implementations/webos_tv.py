@@ -5,6 +5,7 @@ from typing import List, Optional
 from pywebostv.connection import WebOSClient
 from pywebostv.controls import ApplicationControl
 
+from utils.json_storage import write_json
 from ..base.tv_base import TVControlBase, TVError, TVConnectionError, TVAppError
 
 logger = logging.getLogger(__name__)
@@ -44,8 +45,7 @@ class WebOSTV(TVControlBase):
     def _save_store(self, store: dict):
         """Save TV client store to disk"""
         try:
-            with open(self._store_path, 'w') as f:
-                json.dump(store, f)
+            write_json(self._store_path, store)
         except Exception as e:
             logger.error(f"Error saving store: {e}")
 
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+USER_DATA_DIR = '/app/data/user_data'
+WATCHLIST_TTL = 900  # 15 minutes idle timeout (sliding)
+MAX_LIBRARIES = 16
+MAX_POOLS = 64
+MAX_WATCHLISTS = 64
+MAX_FETCH_WORKERS = 5
+
+WATCH_STATUSES = ('unwatched', 'watched', 'all')
+
+
+def partner_library_path(internal_username):
+    return os.path.join(USER_DATA_DIR, internal_username, 'plex_all_movies.json')
+
+
+def _guid_key(guid):
+    """plex://movie/<hex> and bare <hex> guids index to the same key"""
+    return str(guid).rsplit('/', 1)[-1] if guid else None
+
+
+class LibrarySnapshot:
+    """One user's all-movies cache, indexed for set operations"""
+
+    def __init__(self, movies):
+        self.movies = [m for m in movies if m.get('id')]
+        self.by_id = {str(m['id']): m for m in self.movies}
+        self.ids = frozenset(self.by_id)
+        self.watched = frozenset(str(m['id']) for m in self.movies if m.get('watched'))
+        self.by_guid = {}
+        for movie in self.movies:
+            key = _guid_key(movie.get('plex_guid'))
+            if key:
+                self.by_guid[key] = movie
+
+
+class WatchPartyEngine:
+    """Shared-pool lookups for any number of watch-party participants.
+
+    Library mode intersects per-user id and watched sets; watchlist mode
+    intersects cached watchlist guid sets and maps them through the library's
+    guid index. Parsed libraries, watchlists and results live in bounded LRUs,
+    and library entries are reloaded only when the cache file changes.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._libraries = OrderedDict()
+        self._pools = OrderedDict()
+        self._watchlists = OrderedDict()
+
+    @staticmethod
+    def _lru_put(cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _library(self, path):
+        """Parsed library for ``path`` and the file stamp it was read at, or (None, None)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None, None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._libraries.get(path)
+            if cached and cached[0] == stamp:
+                self._libraries.move_to_end(path)
+                return cached[1], stamp
+
+        try:
+            with open(path) as f:
+                movies = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading library cache {path}: {e}")
+            return None, None
+        snapshot = LibrarySnapshot(movies if isinstance(movies, list) else [])
+        with self._lock:
+            self._lru_put(self._libraries, path, (stamp, snapshot), MAX_LIBRARIES)
+        return snapshot, stamp
+
+    def library_pool(self, paths, watch_status='unwatched'):
+        """Movies present in every participant's library, filtered by watch status across all of them"""
+        if watch_status not in WATCH_STATUSES:
+            watch_status = 'unwatched'
+        libraries = []
+        stamps = []
+        for path in paths:
+            library, stamp = self._library(path)
+            if library is None:
+                logger.warning(f"Library intersection: cache not available at {path}")
+                return []
+            libraries.append(library)
+            stamps.append(stamp)
+
+        key = ('library', tuple(paths), tuple(stamps), watch_status)
+        with self._lock:
+            if key in self._pools:
+                self._pools.move_to_end(key)
+                return self._pools[key]
+
+        shared = frozenset.intersection(*(lib.ids for lib in libraries))
+        if watch_status == 'unwatched':
+            shared = shared.difference(*(lib.watched for lib in libraries))
+        elif watch_status == 'watched':
+            shared = shared.intersection(*(lib.watched for lib in libraries))
+
+        pool = [m for m in libraries[0].movies if str(m['id']) in shared]
+        logger.info(f"Library intersection pool: {len(pool)} movies for {len(paths)} participants "
+                    f"(watch_status={watch_status})")
+        with self._lock:
+            self._lru_put(self._pools, key, pool, MAX_POOLS)
+        return pool
+
+    def _watchlist(self, key, fetch):
+        now = time.time()
+        with self._lock:
+            cached = self._watchlists.get(key)
+            if cached and now - cached[1] < WATCHLIST_TTL:
+                self._lru_put(self._watchlists, key, (cached[0], now), MAX_WATCHLISTS)
+                return cached[0]
+
+        guids = frozenset(filter(None, (_guid_key(g) for g in fetch())))
+        with self._lock:
+            self._lru_put(self._watchlists, key, (guids, now), MAX_WATCHLISTS)
+        return guids
+
+    def watchlist_pool(self, fetchers, library_path):
+        """Library movies on every participant's watchlist.
+
+        ``fetchers`` maps a participant cache key to a callable returning that
+        participant's watchlist guids; cached sets are reused for 15 idle minutes.
+        """
+        keys = list(fetchers)
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(keys)) or 1) as executor:
+            futures = [executor.submit(self._watchlist, key, fetchers[key]) for key in keys]
+            watchlists = [future.result() for future in futures]
+
+        shared = frozenset.intersection(*watchlists) if watchlists else frozenset()
+        logger.info(f"Shared watchlist: sizes={[len(w) for w in watchlists]} intersection={len(shared)}")
+        if not shared:
+            return []
+
+        library, _ = self._library(library_path) if library_path else (None, None)
+        if library is None:
+            logger.warning(f"Shared watchlist: all_movies cache not ready at {library_path}")
+            return []
+
+        pool = [library.by_guid[guid] for guid in shared if guid in library.by_guid]
+        logger.info(f"Shared watchlist pool: {len(pool)} movies in library")
+        return pool
+
+    def clear(self):
+        with self._lock:
+            self._libraries.clear()
+            self._pools.clear()
+            self._watchlists.clear()
+
+
+watch_party_engine = WatchPartyEngine()
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(tmdb_id):
+    try:
+        return int(tmdb_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class WatchedSetCache:
+    """In-memory copy of each watched-movies JSON file, keyed by path.
+
+    A file is re-read only when its mtime or size changes, and sync code can
+    publish a freshly written list directly so the next lookup needs no disk I/O.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._entries = {}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _build(stamp, values):
+        ids = tuple(values) if isinstance(values, list) else ()
+        watched = frozenset(i for i in map(_normalize, ids) if i is not None)
+        return {'stamp': stamp, 'ids': ids, 'set': watched}
+
+    def _entry(self, path):
+        stamp = self._stamp(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and entry['stamp'] == stamp:
+            return entry
+
+        values = []
+        if stamp is not None:
+            try:
+                with open(path, 'r') as f:
+                    values = json.load(f)
+            except (OSError, ValueError, TypeError) as e:
+                logger.error(f"Error reading watched movies from {path}: {e}")
+        entry = self._build(stamp, values)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+    def get_list(self, path):
+        """Watched TMDB ids in file order"""
+        return list(self._entry(path)['ids'])
+
+    def get_set(self, path):
+        """Watched TMDB ids as a frozenset of ints"""
+        return self._entry(path)['set']
+
+    def put(self, path, values):
+        """Record the list just written to ``path``"""
+        entry = self._build(self._stamp(path), list(values))
+        with self._lock:
+            self._entries[path] = entry
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+def are_ids_in(watched, tmdb_ids):
+    """Map each requested id to whether it is in ``watched``"""
+    return {tmdb_id: _normalize(tmdb_id) in watched for tmdb_id in tmdb_ids}
+
+
+watched_cache = WatchedSetCache()
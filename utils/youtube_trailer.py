@@ -1,24 +1,167 @@
+import atexit
+import json
+import logging
+import os
+import time
+from threading import RLock
+
 import requests
 
-def search_youtube_trailer(movie_title, movie_year):
+from utils.json_storage import atomic_write_json, WriteBehind
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+TRAILER_CACHE_FILE = '/app/data/trailer_cache.json'
+TRAILER_NOT_FOUND = "Trailer not found on YouTube."
+YOUTUBE_TIMEOUT = 10
+YOUTUBE_TOKEN_WAIT = 5
+NEGATIVE_TTL = 7 * 24 * 60 * 60
+TRAILER_TTL = 90 * 24 * 60 * 60
+
+# Search pages are scraped, so the fallback is kept to one request per second process-wide
+youtube_bucket = TokenBucket(rate=1, capacity=2)
+
+VIDEO_TYPE_RANK = {'Trailer': 0, 'Teaser': 1}
+
+
+def _scrape_youtube_trailer(movie_title, movie_year):
     """Fetch a trailer URL from YouTube using a direct search query."""
-    
     formatted_title = f'{movie_title.replace(" ", "+")}+{movie_year}+trailer'
     search_url = f'https://www.youtube.com/results?search_query={formatted_title}'
+    response = requests.get(search_url, timeout=YOUTUBE_TIMEOUT)
+    response.raise_for_status()
+
+    if 'watch?v=' not in response.text:
+        return None
+    start_index = response.text.find('watch?v=') + 8
+    end_index = response.text.find('"', start_index)
+    trailer_id = response.text[start_index:end_index]
+    return f'https://www.youtube.com/embed/{trailer_id}'
+
+
+def pick_tmdb_trailer(videos):
+    """Best YouTube trailer from a TMDB video list: official English trailers first"""
+    candidates = [
+        v for v in videos or []
+        if v.get('site') == 'YouTube' and v.get('key') and v.get('type') in VIDEO_TYPE_RANK
+    ]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda v: (
+        VIDEO_TYPE_RANK[v['type']],
+        not v.get('official', False),
+        v.get('iso_639_1') not in ('en', None),
+        -(v.get('size') or 0),
+    ))
+    return f"https://www.youtube.com/embed/{best['key']}"
+
+
+class TrailerResolver:
+    """Trailer URL per movie: TMDB videos first, throttled YouTube scraping as a fallback.
+
+    Results, including "no trailer", are cached persistently so a title is resolved once;
+    "no trailer" is only cached when TMDB answered and YouTube found nothing. Request
+    failures are never cached and are retried on the next lookup.
+    """
+
+    def __init__(self, file_path=TRAILER_CACHE_FILE):
+        self.file_path = file_path
+        self._lock = RLock()
+        self._entries = {}
+        self._version = 0
+        self.stats = {'cache_hits': 0, 'tmdb': 0, 'youtube': 0, 'not_found': 0, 'errors': 0}
+        self._load_from_disk()
+        self._writer = WriteBehind(self._snapshot, self._write, interval=5.0, name='trailer-cache-writer')
+
+    def _load_from_disk(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r') as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded {len(self._entries)} cached trailers from disk")
+        except Exception as e:
+            logger.error(f"Error loading trailer cache: {e}")
+            self._entries = {}
+
+    def _snapshot(self):
+        with self._lock:
+            return self._version, dict(self._entries)
+
+    def _write(self, entries):
+        atomic_write_json(self.file_path, entries)
+
+    def flush(self):
+        self._writer.flush()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return False, None
+        ttl = TRAILER_TTL if entry.get('url') else NEGATIVE_TTL
+        if time.time() - entry.get('checked_at', 0) > ttl:
+            return False, None
+        return True, entry.get('url')
+
+    def _store(self, key, url, source):
+        with self._lock:
+            self._entries[key] = {'url': url, 'source': source, 'checked_at': time.time()}
+            self._version += 1
+        self._writer.schedule()
+
+    def _from_youtube(self, title, year):
+        if not title:
+            return None
+        if not youtube_bucket.acquire(timeout=YOUTUBE_TOKEN_WAIT):
+            raise TimeoutError("YouTube fallback is rate limited")
+        return _scrape_youtube_trailer(title, year)
+
+    def resolve(self, tmdb_id, title=None, year=None):
+        """Return a trailer embed URL or None"""
+        key = str(tmdb_id) if tmdb_id else f"q:{(title or '').lower()}:{year or ''}"
+        hit, url = self._cached(key)
+        if hit:
+            self._count('cache_hits')
+            return url
+
+        source = None
+        tmdb_answered = not tmdb_id
+        try:
+            if tmdb_id:
+                from utils.tmdb_service import tmdb_service
+                videos = tmdb_service.get_movie_videos(tmdb_id)
+                # None means TMDB could not be reached; an empty list is a real "no videos"
+                tmdb_answered = videos is not None
+                url = pick_tmdb_trailer(videos)
+                source = 'tmdb' if url else None
+            if not url:
+                url = self._from_youtube(title, year)
+                source = 'youtube' if url else None
+        except Exception as e:
+            logger.debug(f"Trailer lookup failed for {key}: {e}")
+            self._count('errors')
+            return None
+
+        if not url and not tmdb_answered:
+            # Only a definitive answer from both sources is remembered as "no trailer"
+            self._count('errors')
+            return None
+
+        self._count(source or 'not_found')
+        self._store(key, url, source)
+        return url
+
+
+trailer_resolver = TrailerResolver()
+atexit.register(trailer_resolver.flush)
 
-    try:
-        response = requests.get(search_url)
-        response.raise_for_status()
-        
-        if 'watch?v=' in response.text:
-            start_index = response.text.find('watch?v=') + 8
-            end_index = response.text.find('"', start_index)
-            trailer_id = response.text[start_index:end_index]
-            trailer_url = f'https://www.youtube.com/embed/{trailer_id}'
-            return trailer_url
-        else:
-            return "Trailer not found on YouTube."
-
-    except requests.RequestException as e:
-        return f"Error fetching YouTube trailer: {e}"
 
+def get_trailer_url(tmdb_id, movie_title, movie_year):
+    """Cached trailer lookup returning the legacy not-found marker the UI understands"""
+    return trailer_resolver.resolve(tmdb_id, movie_title, movie_year) or TRAILER_NOT_FOUND